@@ -1,23 +1,315 @@
-from typing import List
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Any, Callable, ContextManager, Iterator, List, Sequence
 from typing_extensions import TypedDict, Annotated
+import httpx
+from pydantic import BaseModel, Field
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, RemoveMessage
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain.prompts import ChatPromptTemplate, PromptTemplate
 from langchain.retrievers.multi_query import MultiQueryRetriever
 
 from langgraph.graph import StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata
+
+
+logger = logging.getLogger(__name__)
 
 
 class ChatState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
     question: str
     standalone_question: str
+    search_queries: List[str]
     context: str
     answer: str
+    summary: str
+
+
+class RewriteAndExpand(BaseModel):
+    """Structured output of the fused rewrite-and-expand LLM call."""
+    standalone_question: str = Field(description= 'The latest user query rewritten as a clear, self-contained standalone question.')
+    search_queries: List[str] = Field(description= 'Exactly 4 topic-style search queries for the standalone question.')
+
+
+# defaults of the shared HTTP connection pools, see `ChatBot(http_limits=..., http_timeout=...)`
+HTTP_MAX_CONNECTIONS = 50
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 60.0
+HTTP_TIMEOUT = 60.0
+
+_http_client_lock = threading.Lock()
+_http_clients: dict[tuple, httpx.Client] = {}
+_http_async_clients: dict[tuple, httpx.AsyncClient] = {}
+
+
+# `_http2_available()` and `_LoopLocalTransport` have a twin in Researcher/utils/clients.py, Researcher/tests/test_clients.py keeps both identical
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)."""
+    try:
+        import h2  # noqa: F401
+        return True
+
+    except ImportError:
+        return False
+
+
+def _http_settings(limits: httpx.Limits | None, timeout: float) -> tuple[httpx.Limits, tuple]:
+    """The limits to use, defaults if None, and the key of the shared clients with these settings."""
+    limits = limits or httpx.Limits(
+        max_connections= HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections= HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry= HTTP_KEEPALIVE_EXPIRY
+    )
+    return limits, (limits.max_connections, limits.max_keepalive_connections, limits.keepalive_expiry, timeout)
+
+
+def get_http_client(limits: httpx.Limits | None = None, timeout: float = HTTP_TIMEOUT) -> httpx.Client:
+    """Returns the process-wide `httpx.Client` shared by the LLM and the embedding model, so both reuse one keep-alive connection pool instead of separate pools with their own TLS handshakes. HTTP/2 is used if the optional `h2` package is installed.
+
+    Args:
+        limits (httpx.Limits | None, optional): Connection pool limits. None means `HTTP_MAX_CONNECTIONS`, `HTTP_MAX_KEEPALIVE_CONNECTIONS` and `HTTP_KEEPALIVE_EXPIRY`. Defaults to None.
+        timeout (float, optional): Request timeout in seconds. Defaults to `HTTP_TIMEOUT`.
+
+    Returns:
+        httpx.Client: The shared client with these settings, created on the first call.
+    """
+    limits, key = _http_settings(limits, timeout)
+
+    with _http_client_lock:
+        client = _http_clients.get(key)
+
+        if client is None or client.is_closed:
+            client = _http_clients[key] = httpx.Client(http2= _http2_available(), timeout= timeout, limits= limits)
+
+        return client
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    def __init__(self, **transport_kwargs) -> None:
+        """Async transport keeping one connection pool per event loop. Pooled connections belong to the loop that opened them, so a single pool would fail with "Event loop is closed" once a second `asyncio.run()` reuses them. The pools of closed loops are dropped when the next pool is created."""
+        self.transport_kwargs = transport_kwargs
+        self._lock = threading.Lock()
+        self._transports: dict[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = {}
+
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            transport = self._transports.get(loop)
+
+            if transport is None:
+                # the connections of a closed loop can't be closed gracefully anymore, their sockets are closed on garbage collection
+                for closed in [other for other in self._transports if other.is_closed()]:
+                    del self._transports[closed]
+
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(**self.transport_kwargs)
+
+            return transport
+
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+
+    async def aclose(self) -> None:
+        # only the pool of the running loop can be closed from here
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+
+        if transport is not None:
+            await transport.aclose()
+
+
+def get_http_async_client(limits: httpx.Limits | None = None, timeout: float = HTTP_TIMEOUT) -> httpx.AsyncClient:
+    """Async counterpart of `get_http_client()`, used by the async calls of the LLM and the embedding model (`ainvoke`, e.g. through `ChatBot.graph.ainvoke`). Every event loop gets its own connection pool with these limits, see `_LoopLocalTransport`.
+
+    Args:
+        limits (httpx.Limits | None, optional): Connection pool limits, see `get_http_client()`. Defaults to None.
+        timeout (float, optional): Request timeout in seconds. Defaults to `HTTP_TIMEOUT`.
+
+    Returns:
+        httpx.AsyncClient: The shared client with these settings, created on the first call.
+    """
+    limits, key = _http_settings(limits, timeout)
+
+    with _http_client_lock:
+        client = _http_async_clients.get(key)
+
+        if client is None or client.is_closed:
+            client = _http_async_clients[key] = httpx.AsyncClient(
+                transport= _LoopLocalTransport(http2= _http2_available(), limits= limits),
+                timeout= timeout
+            )
+
+        return client
+
+
+class CachedQueryEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, max_size: int = 1024) -> None:
+        """Wraps an embedding model with a bounded LRU cache for query embeddings. `prime()` embeds many queries in one batched request, so that later `embed_query()` calls for them are served from the cache.
+
+        Args:
+            embeddings (Embeddings): The underlying embedding model.
+            max_size (int, optional): Maximum number of cached query embeddings. Defaults to 1024.
+        """
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, List[float]] = OrderedDict()
+
+
+    def _put(self, text: str, vector: List[float]) -> None:
+        with self._lock:
+            self._cache[text] = vector
+            self._cache.move_to_end(text)
+
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last= False)
+
+
+    def prime(self, texts: List[str]) -> None:
+        """Embeds all the uncached `texts` in a single batched request and caches them."""
+        with self._lock:
+            missing = list(dict.fromkeys(t for t in texts if t not in self._cache))
+
+        if not missing:
+            return
+        
+        for text, vector in zip(missing, self.embeddings.embed_documents(missing)):
+            self._put(text, vector)
+
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            vector = self._cache.get(text)
+
+            if vector is not None:
+                self._cache.move_to_end(text)
+                return vector
+
+        vector = self.embeddings.embed_query(text)
+        self._put(text, vector)
+        return vector
+
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        """Coalesces concurrent calls with the same key into one execution. The first caller (leader) runs the function, every caller that arrives while it is in flight (followers) waits for and shares the leader's result, or exception."""
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Runs `fn` for `key`, or joins the execution already in flight for `key`.
+
+        Args:
+            key (str): Key identifying identical calls.
+            fn (Callable[[], Any]): Function to execute if no call for `key` is in flight.
+
+        Returns:
+            tuple[Any, bool]: Result of `fn` and whether it was shared from another caller's execution.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+
+            if is_leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_leader:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+
+        except BaseException as e:
+            future.set_exception(e)
+
+        finally:
+            # only in-flight calls are shared, the next call with this key starts fresh
+            with self._lock:
+                del self._in_flight[key]
+
+        return future.result(), False
+
+
+class PruningMemorySaver(MemorySaver):
+    def __init__(self, *args, **kwargs) -> None:
+        """`MemorySaver` that keeps only the latest checkpoint of every thread. Whenever a checkpoint is saved, the previous one, its pending writes and the channel values no longer referenced are deleted, so a thread costs the size of its current state instead of every state it ever had. The checkpoint history (`get_state_history`, time travel) is given up for that.
+
+        A thread must have a single writer at a time: a run that started from a pruned checkpoint would reference deleted channel values. `ChatBot` ensures this with its per-thread locks."""
+        super().__init__(*args, **kwargs)
+        # (thread_id, checkpoint_ns) -> (checkpoint_id, channel_versions) of the latest checkpoint
+        self._latest: dict[tuple[str, str], tuple[str, ChannelVersions]] = {}
+
+
+    def put(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions
+        ) -> RunnableConfig:
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+
+        thread_id = config['configurable']['thread_id']
+        checkpoint_ns = config['configurable'].get('checkpoint_ns', '')
+        versions = checkpoint['channel_versions']
+        previous = self._latest.get((thread_id, checkpoint_ns))
+        self._latest[(thread_id, checkpoint_ns)] = (checkpoint['id'], dict(versions))
+
+        if previous is not None and previous[0] != checkpoint['id']:
+            previous_id, previous_versions = previous
+            self.storage[thread_id][checkpoint_ns].pop(previous_id, None)
+            self.writes.pop((thread_id, checkpoint_ns, previous_id), None)
+
+            for channel, version in previous_versions.items():
+                if versions.get(channel) != version:
+                    self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+        return next_config
+
+
+    def put_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[tuple[str, Any]],
+            task_id: str,
+            task_path: str = ''
+        ) -> None:
+        # writes of an already pruned checkpoint would never be read, nor deleted
+        checkpoint_id = config['configurable']['checkpoint_id']
+        latest = self._latest.get((config['configurable']['thread_id'], config['configurable'].get('checkpoint_ns', '')))
+
+        if latest is None or latest[0] == checkpoint_id:
+            super().put_writes(config, writes, task_id, task_path)
+
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+
+        for key in [key for key in self._latest if key[0] == thread_id]:
+            del self._latest[key]
 
 
 class ChatBot:
@@ -29,7 +321,15 @@ class ChatBot:
             embedding_model: str = 'text-embedding-3-large',
             temperature: float = 0.3,
             k: int = 4,
-            history_cap: int = 5
+            fetch_k: int | None = None,
+            lambda_mult: float = 0.5,
+            multi_query: bool = True,
+            history_cap: int = 5,
+            fused_rewrite: bool = False,
+            coalesce_first_turn: bool = True,
+            rolling_history: bool = False,
+            http_limits: httpx.Limits | None = None,
+            http_timeout: float = HTTP_TIMEOUT
         ) -> None:
         """Initializes the core components of the `ChatBot`, like Vector Database, Large Language Model, Retriever, and Graph.
 
@@ -39,7 +339,15 @@ class ChatBot:
             embedding_model (str, optional): Embedding model for the FAISS Index. Defaults to 'text-embedding-3-large'.
             temperature (float, optional): Temperature for the LLM. Defaults to 0.3.
             k (int, optional): Number of documents that should be retrieved by `self.retriever`. Defaults to 4.
+            fetch_k (int | None, optional): Number of candidates the MMR search chooses the `k` documents from. None means `max(k * 4, 20)`. Defaults to None.
+            lambda_mult (float, optional): MMR trade-off between relevance (1) and diversity (0). Defaults to 0.5.
+            multi_query (bool, optional): If True, every question is expanded into several search queries by the LLM before retrieval (see `self._create_retriever`). If False, the question is searched as-is, saving an LLM call per turn. Ignored with `fused_rewrite`, which always expands the question. Defaults to True.
             history_cap (int, optional): Number of `HumanMessage` & `AIMessage` pairs to store. Not to be confused with actual chat history, this limit will be used for rewriting the user queries. Defaults to 5.
+            fused_rewrite (bool, optional): If True, rewriting and query expansion are done in a single structured LLM call instead of two sequential ones. Falls back to the two-step path if the structured output cannot be parsed. Defaults to False.
+            coalesce_first_turn (bool, optional): If True, concurrent identical first-turn (history-free) questions share one pipeline execution. Every thread still gets its own messages in the checkpointer. Defaults to True.
+            rolling_history (bool, optional): If True, a thread keeps only its last `history_cap` message pairs plus a running summary of everything before, instead of its complete history, and the checkpointer keeps only the latest state of a thread (see `PruningMemorySaver`). This keeps the per-turn checkpoint cost and the memory of long conversations constant. The summary is updated in the background after a turn returned (see `self._compact`), and the turns of a thread are run one at a time. Defaults to False.
+            http_limits (httpx.Limits | None, optional): Limits of the connection pool shared by the LLM and the embedding model, see `get_http_client()`. None means `HTTP_MAX_CONNECTIONS`, `HTTP_MAX_KEEPALIVE_CONNECTIONS` and `HTTP_KEEPALIVE_EXPIRY`. Defaults to None.
+            http_timeout (float, optional): Timeout of the LLM and embedding requests in seconds. Defaults to `HTTP_TIMEOUT`.
         """
         # basic attributes
         self.model = model
@@ -47,21 +355,46 @@ class ChatBot:
         self.temperature = temperature
         self.vector_db_path = vector_db_path
         self.k = k
+        self.fetch_k = fetch_k or max(k * 4, 20)
+        self.lambda_mult = lambda_mult
+        self.multi_query = multi_query
         self.history_cap = history_cap
+        self.fused_rewrite = fused_rewrite
+        self.coalesce_first_turn = coalesce_first_turn
+        self.rolling_history = rolling_history
+        self.http_limits = http_limits
+        self.http_timeout = http_timeout
 
         # Core components
+        http_client = get_http_client(self.http_limits, self.http_timeout)
+        http_async_client = get_http_async_client(self.http_limits, self.http_timeout)
+        self.embeddings = CachedQueryEmbeddings(
+            OpenAIEmbeddings(model= self.embedding_model, http_client= http_client, http_async_client= http_async_client)
+        )
         self.vector_db = self._load_faiss_index()
         self.llm = ChatOpenAI(
             model= self.model,
             temperature= self.temperature,
-            max_retries= 3
+            max_retries= 3,
+            http_client= http_client,
+            http_async_client= http_async_client
         )
+        self.base_retriever = self._create_base_retriever()
         self.retriever = self._create_retriever()
 
         # Build graph
-        self.checkpointer = MemorySaver()
+        self.checkpointer = PruningMemorySaver() if self.rolling_history else MemorySaver()
         self.graph = self._build_graph()
 
+        # Request coalescing for first-turn questions
+        self._single_flight = SingleFlight()
+
+        # Background compaction of rolling histories, and the per-thread locks serializing the writes to a thread
+        self._compactor = ThreadPoolExecutor(max_workers= 2, thread_name_prefix= 'compact') if self.rolling_history else None
+        self._compactions: dict[str, Future] = {}
+        self._locks_guard = threading.Lock()
+        self._thread_locks: dict[str, list] = {}
+
 
     # ------------* Prompts *------------
     @staticmethod
@@ -103,6 +436,30 @@ class ChatBot:
         )
     
 
+    @staticmethod
+    def _fused_rewriting_prompt() -> ChatPromptTemplate:
+        """Prompt for rewriting the user query and expanding it into search queries in a single call."""
+        system_instructions = (
+            "ROLE: You are a careful assistant that also improves search queries for document retrieval.\n"
+            "TASK 1: Rewrite the LATEST USER QUERY into a clear, self-contained standalone query based on CHAT HISTORY.\n"
+            "- Strictly preserve the user's intent and meaning. Do not add, remove, or invent details.\n"
+            "- If the query is already standalone, there is no history, or it is too vague to rewrite faithfully, return it unchanged.\n"
+            "TASK 2: Generate exactly 4 topic-style search queries (not questions) for the standalone query.\n"
+            "- Preserve key entities/terms from the question.\n"
+            "- Provide: 1 broader, 1 narrower, and 2 specific variants.\n"
+            "- Each query distinct, <=12 words, noun-heavy, no filler words.\n"
+            "- Use at least one domain-specific synonym where natural.\n"
+            "- Maintain original intent.\n"
+            "OUTPUT: The standalone query and the 4 search queries, following the provided schema."
+        )
+        return ChatPromptTemplate(
+            messages= [
+                ('system', system_instructions),
+                ('human', 'CHAT HISTORY (most recent first):\n{history}\n\nLATEST USER QUERY: {last}')
+            ]
+        )
+
+
     @staticmethod
     def _generation_prompt() -> ChatPromptTemplate:
         """Prompt for response generation based on the provided context and user question."""
@@ -128,6 +485,26 @@ class ChatBot:
         )
 
 
+    @staticmethod
+    def _summary_prompt() -> ChatPromptTemplate:
+        """Prompt for folding older messages into the running summary of the conversation."""
+        system_instructions = (
+            "ROLE: You keep the memory of a conversation between a user and an assistant.\n"
+            "TASK: Update the CURRENT SUMMARY with the NEW MESSAGES, which are about to be forgotten.\n"
+            "CONSTRAINTS:\n"
+            "- Keep the people, projects, topics and facts later questions could refer to.\n"
+            "- Drop greetings, filler and details of answers that can be looked up again.\n"
+            "- At most 120 words, plain prose.\n"
+            "OUTPUT: Return only the updated summary."
+        )
+        return ChatPromptTemplate(
+            messages= [
+                ('system', system_instructions),
+                ('human', 'CURRENT SUMMARY: {summary}\n\nNEW MESSAGES:\n{messages}')
+            ]
+        )
+
+
     # ------------* Vector Database *------------
     def _load_faiss_index(self) -> FAISS:
         """Loads the FAISS Index (Vector Database). NOTE: a dangerous deserialization of pickle file is activated, the `index.pkl` file contains the metadata for FAISS Index. Completely safe for non-server applications.
@@ -137,30 +514,36 @@ class ChatBot:
         """
         return FAISS.load_local(
             folder_path= self.vector_db_path,
-            embeddings= OpenAIEmbeddings(model= self.embedding_model),
+            embeddings= self.embeddings,
             allow_dangerous_deserialization= True
         )
 
         
     # ------------* Retriever *------------
-    def _create_retriever(self) -> MultiQueryRetriever:
-        """Creates a `MultiQueryRetriever` with Maximal Margin Relevance, using `self.llm`.
-
-        Returns:
-            MultiQueryRetriever:
-        """
-        # Base retriever with a maximal margin relevance
-        base_retriever = self.vector_db.as_retriever(
+    def _create_base_retriever(self) -> VectorStoreRetriever:
+        """Creates the base retriever with Maximal Margin Relevance over `self.vector_db`."""
+        return self.vector_db.as_retriever(
             search_type= 'mmr',
             search_kwargs= {
                 'k': self.k,
-                'fetch_k': max(self.k * 4, 20)
+                'fetch_k': self.fetch_k,
+                'lambda_mult': self.lambda_mult
             }
         )
 
+
+    def _create_retriever(self) -> MultiQueryRetriever | VectorStoreRetriever:
+        """Creates a `MultiQueryRetriever` on top of `self.base_retriever`, using `self.llm`. Without `self.multi_query`, `self.base_retriever` is used directly.
+
+        Returns:
+            MultiQueryRetriever | VectorStoreRetriever:
+        """
+        if not self.multi_query:
+            return self.base_retriever
+
         # MultiQueryRetriever on top of the base retriever for breadth + diversity
         mq_retriever = MultiQueryRetriever.from_llm(
-            retriever= base_retriever,
+            retriever= self.base_retriever,
             llm= self.llm,
             prompt= self._query_expansion_prompt(),
             include_original= True
@@ -198,7 +581,13 @@ class ChatBot:
             history_lines.append(f'{role}: {msg.content}')
 
         # Reversing so that the last message is first, excluding last user question
-        history_text = '\n'.join(reversed(history_lines[:-1]))
+        history_lines = list(reversed(history_lines[:-1]))
+
+        # the summary of the compacted messages is the oldest part of the history
+        if state.get('summary'):
+            history_lines.append(f'summary of earlier conversation: {state["summary"]}')
+
+        history_text = '\n'.join(history_lines)
 
         return last_user, history_text
 
@@ -229,6 +618,56 @@ class ChatBot:
         return {'question': last_user, 'standalone_question': rewritten or last_user}
     
 
+    def _rewrite_and_expand(self, state: ChatState) -> ChatState:
+        """Fused alternative to `self._rewrite` + query expansion of `self.retriever`. A single structured LLM call returns both the standalone question and the search queries, which halves the serial LLM round trips before retrieval. If the call or the parsing fails, it falls back to the two-step path (`self._rewrite` now, multi-query expansion later in `self._retrieve`).
+
+        Args:
+            state (ChatState): The current conversation state, including the latest user message and chat history.
+
+        Returns:
+            ChatState: An updated state dictionary containing:
+            - "question": The raw latest user message.
+            - "standalone_question": The rewritten or original question.
+            - "search_queries": The generated search queries, empty if the fallback path was taken.
+        """
+        last_user, history_text = self._get_last_user_and_history(state)
+        prompt = self._fused_rewriting_prompt()
+
+        try:
+            result = self.llm.with_structured_output(RewriteAndExpand).invoke(
+                prompt.format_messages(history= history_text or '(none)', last= last_user)
+            )
+            standalone = result.standalone_question.strip() or last_user
+            queries = [q.strip() for q in result.search_queries if q.strip()]
+
+            if not queries:
+                raise ValueError('No search queries were generated.')
+
+        except Exception:
+            # falling back to the two-step path
+            return {**self._rewrite(state), 'search_queries': []}
+
+        return {
+            'question': last_user, 
+            'standalone_question': standalone, 
+            'search_queries': queries
+        }
+
+
+    def _retrieve_for_queries(self, queries: List[str]) -> List[Document]:
+        """Runs `self.base_retriever` for every query and returns the unique union of the documents, in order of first appearance (same as `MultiQueryRetriever`)."""
+        results = self.base_retriever.batch(queries)
+
+        docs = []
+        seen = set()
+        for doc in (d for batch in results for d in batch):
+            if doc.page_content not in seen:
+                seen.add(doc.page_content)
+                docs.append(doc)
+
+        return docs
+
+
     def _retrieve(self, state: ChatState) -> ChatState:
         """Retrieve relevant documents for the given user query. This method extracts the standalone (or raw) question from the conversation state, queries the retriever for relevant documents, and formats the retrieved results into a structured context string. If no question is found, an empty context is returned.
 
@@ -244,8 +683,15 @@ class ChatBot:
         if not que:
             return {'context': ''}
         
-        # multi query retrieval
-        docs = self.retriever.invoke(que)
+        queries = state.get('search_queries') or []
+
+        if queries:
+            # queries were already expanded by the fused node, original question included
+            docs = self._retrieve_for_queries([que, *queries])
+
+        else:
+            # multi query retrieval
+            docs = self.retriever.invoke(que)
 
         # Build joined context
         context_blocks = []
@@ -287,6 +733,112 @@ class ChatBot:
         return {'messages': [AIMessage(content= ans)]}
     
 
+    def _needs_compaction(self, messages: List[BaseMessage]) -> bool:
+        """Whether a thread holds more than twice the rolling window (`self.history_cap` pairs), so the summarization call is made once every `self.history_cap` turns instead of every turn."""
+        window = max(self.history_cap, 1) * 2
+        return len(messages) > window * 2
+
+
+    def _compact(self, thread_id: str) -> None:
+        """Fold the messages older than the rolling window of a thread into its running summary. The LLM updates the summary with the older messages, which are then removed from the state, and with it from the checkpoint. Runs in `self._compactor`, off the response path: the LLM call is made without holding the thread, only reading and updating the state wait for a running turn of the thread.
+
+        Args:
+            thread_id (str): The conversation thread to compact.
+        """
+        config = {'configurable': {'thread_id': thread_id}}
+
+        # a running turn's checkpoints hold its question without the answer, which would split the window mid-pair
+        with self._thread_lock(thread_id):
+            state = self.graph.get_state(config).values
+
+        window = max(self.history_cap, 1) * 2
+        old = state.get('messages', [])[:-window]
+
+        if not old:
+            return
+
+        lines = []
+        for msg in old:
+            role = 'user' if isinstance(msg, HumanMessage) else 'assistant' if isinstance(msg, AIMessage) else 'system'
+            lines.append(f'{role}: {msg.content}')
+
+        prompt = self._summary_prompt()
+
+        summary = self.llm.invoke(
+            prompt.format_messages(summary= state.get('summary') or '(none)', messages= '\n'.join(lines))
+        ).content.strip()
+
+        # turns that ran in the meantime only appended messages, the compacted ones are still there
+        with self._thread_lock(thread_id):
+            self.graph.update_state(
+                config,
+                {
+                    'summary': summary or state.get('summary', ''),
+                    'messages': [RemoveMessage(id= msg.id) for msg in old]
+                },
+                as_node= 'finalize'
+            )
+
+
+    def _schedule_compaction(self, thread_id: str, state: ChatState) -> None:
+        """Submits `self._compact` for a thread that outgrew its rolling window, unless a compaction of the thread is already running."""
+        if not self.rolling_history or not self._needs_compaction(state.get('messages', [])):
+            return
+
+        with self._locks_guard:
+            running = self._compactions.get(thread_id)
+
+            if running is not None and not running.done():
+                return
+
+            future = self._compactor.submit(self._compact, thread_id)
+            self._compactions[thread_id] = future
+
+        future.add_done_callback(lambda done: self._forget_compaction(thread_id, done))
+
+
+    def _forget_compaction(self, thread_id: str, future: Future) -> None:
+        with self._locks_guard:
+            if self._compactions.get(thread_id) is future:
+                del self._compactions[thread_id]
+
+        # nobody waits on the future, its exception would be lost otherwise
+        if not future.cancelled() and future.exception() is not None:
+            logger.error('Compaction of thread "%s" failed, it is retried after the next turn.', thread_id, exc_info= future.exception())
+
+
+    def wait_for_compaction(self) -> None:
+        """Blocks until the running background compactions are done, e.g. before reading the state of the threads or timings in benchmarks."""
+        with self._locks_guard:
+            running = list(self._compactions.values())
+
+        wait(running)
+
+
+    @contextmanager
+    def _thread_lock(self, thread_id: str) -> Iterator[None]:
+        """Holds the lock of a thread for the `with` block, so that a thread's state has a single writer at a time. A lock is dropped once no caller holds or waits for it, so idle threads cost nothing."""
+        with self._locks_guard:
+            entry = self._thread_locks.setdefault(thread_id, [threading.Lock(), 0])
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                yield
+
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+
+                if not entry[1]:
+                    del self._thread_locks[thread_id]
+
+
+    def _writing(self, thread_id: str) -> ContextManager[None]:
+        """The thread lock with `rolling_history`, where background compaction writes to the thread too, otherwise a no-op."""
+        return self._thread_lock(thread_id) if self.rolling_history else nullcontext()
+
+
     def _build_graph(self) -> StateGraph:
         """
         Construct and compile the state graph for the chatbot agent.
@@ -294,6 +846,8 @@ class ChatBot:
         This method defines the conversation workflow as a sequence of stateful nodes and edges. The graph controls how the user query flows through the pipeline:
             - rewrite -> retrieve -> generate -> finalize
 
+        If `self.fused_rewrite` is True, the "rewrite" node also expands the query into search variants (see `self._rewrite_and_expand`).
+
         Each node corresponds to a specific processing step, and the edges enforce the execution order. A checkpointer is attached to maintain state across interactions.
 
         Returns:
@@ -302,7 +856,7 @@ class ChatBot:
         builder = StateGraph(ChatState)
 
         # adding nodes
-        builder.add_node('rewrite', self._rewrite)
+        builder.add_node('rewrite', self._rewrite_and_expand if self.fused_rewrite else self._rewrite)
         builder.add_node('retrieve', self._retrieve)
         builder.add_node('generate', self._generate)
         builder.add_node('finalize', self._finalize)
@@ -328,11 +882,156 @@ class ChatBot:
         Returns:
             str: The chatbot's generated answer.
         """
-        state: ChatState = {'messages': [HumanMessage(content= user_message)]}
-        result = self.graph.invoke(
-            state,
-            config= {'configurable': {'thread_id': thread_id}}
-        )
+        config = {'configurable': {'thread_id': thread_id}}
+
+        with self._writing(thread_id):
+            # only history-free questions are identical across threads, follow-ups depend on the thread's history
+            if self.coalesce_first_turn and not self._has_history(config):
+                return self._run_coalesced(user_message, config)
+
+            state: ChatState = {'messages': [HumanMessage(content= user_message)]}
+            result = self.graph.invoke(state, config= config)
+
+        self._schedule_compaction(thread_id, result)
+        return result['answer']
+
+
+    def run_batch(
+            self, 
+            items: List[tuple[str, str]], 
+            *, 
+            max_concurrency: int = 8
+        ) -> List[dict[str, Any]]:
+        """Execute many chatbot interactions at once, e.g. for offline evaluation runs. The questions that are searched as asked are embedded in one shared batched request (see `self._searched_as_is`), then all of them run through the compiled graph with LangGraph batch execution and bounded concurrency. Items sharing a `thread_id` are executed in successive waves, so follow-up questions still see the earlier answers of their thread.
+
+        Args:
+            items (List[tuple[str, str]]): List of (question, thread_id) pairs.
+            max_concurrency (int, optional): Maximum number of graph executions running at the same time. Defaults to 8.
+
+        Returns:
+            List[dict[str, Any]]: One result per item, in the same order as `items`, containing:
+                - "question": The raw question.
+                - "thread_id": The thread of the question.
+                - "answer": The generated answer, None if the execution failed.
+                - "error": The error message, None if the execution succeeded.
+                - "elapsed": Time taken by the item's graph execution in seconds, until the failure if it failed.
+        """
+        results: List[dict[str, Any]] = [None] * len(items)
+
+        # shared embedding batch for the questions, later `embed_query()` calls are cache hits
+        self.embeddings.prime(self._searched_as_is(items))
+
+        # splitting into waves so that a thread is never executed concurrently with itself
+        waves: List[List[int]] = []
+        seen: dict[str, int] = {}
+
+        for index, (_, thread_id) in enumerate(items):
+            wave = seen.get(thread_id, 0)
+            seen[thread_id] = wave + 1
+
+            if wave == len(waves):
+                waves.append([])
+
+            waves[wave].append(index)
+
+        elapsed: List[float] = [None] * len(items)
+
+        def timed_invoke(index: int) -> ChatState:
+            question, thread_id = items[index]
+            start = perf_counter()
+
+            try:
+                with self._writing(thread_id):
+                    state = self.graph.invoke(
+                        {'messages': [HumanMessage(content= question)]},
+                        config= {'configurable': {'thread_id': thread_id}}
+                    )
+
+            finally:
+                # failed items are timed too, a timeout shows up in their latency
+                elapsed[index] = perf_counter() - start
+
+            self._schedule_compaction(thread_id, state)
+            return state
+
+        for wave in waves:
+            outputs = RunnableLambda(timed_invoke).batch(
+                wave,
+                config= {'max_concurrency': max_concurrency},
+                return_exceptions= True
+            )
+
+            for index, output in zip(wave, outputs):
+                question, thread_id = items[index]
+                failed = isinstance(output, Exception)
+
+                results[index] = {
+                    'question': question,
+                    'thread_id': thread_id,
+                    'answer': None if failed else output['answer'],
+                    'error': str(output) if failed else None,
+                    'elapsed': elapsed[index]
+                }
+
+        return results
+
+
+    def _searched_as_is(self, items: List[tuple[str, str]]) -> List[str]:
+        """Questions of `items` that are searched exactly as asked, the only ones worth embedding before the graph runs. Those are the first questions of threads without history: a follow-up is searched as its standalone rewrite, and the fused rewrite may rephrase any question, neither is known before the "rewrite" node ran. The expanded search queries of multi-query retrieval are embedded when they are generated."""
+        if self.fused_rewrite:
+            return []
+
+        first: dict[str, str] = {}
+        for question, thread_id in items:
+            first.setdefault(thread_id, question)
+
+        return [question for thread_id, question in first.items() if not self._has_history({'configurable': {'thread_id': thread_id}})]
+
+
+    def _has_history(self, config: dict) -> bool:
+        """Checks whether the thread in `config` already has messages in the checkpointer."""
+        return bool(self.graph.get_state(config).values.get('messages'))
+
+
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        """Normalizes a question for coalescing, "What projects has Harshit worked on?" -> "what projects has harshit worked on"."""
+        return ' '.join(question.lower().split()).rstrip('?!. ')
+
+
+    def _run_coalesced(self, user_message: str, config: dict) -> str:
+        """Runs a first-turn question through `self._single_flight`. The leader runs the graph on its own thread, followers copy the leader's result into their own thread in the checkpointer, as if the graph was executed for them. Followers on the leader's thread copy nothing, the question is answered once in that thread.
+
+        Args:
+            user_message (str): The raw input provided by the user.
+            config (dict): Graph config containing the `thread_id`.
+
+        Returns:
+            str: The chatbot's generated answer.
+        """
+        thread_id = config['configurable']['thread_id']
+
+        def execute() -> tuple[str, ChatState]:
+            state: ChatState = {'messages': [HumanMessage(content= user_message)]}
+            return thread_id, self.graph.invoke(state, config= config)
+
+        (leader_thread_id, result), shared = self._single_flight.do(self._normalize_question(user_message), execute)
+
+        # a follower on the leader's own thread asked the same question at the same time, the thread already has the answer
+        if shared and leader_thread_id != thread_id:
+            self.graph.update_state(
+                config,
+                {
+                    'messages': [HumanMessage(content= user_message), AIMessage(content= result['answer'])],
+                    'question': user_message,
+                    'standalone_question': result.get('standalone_question', user_message),
+                    'search_queries': result.get('search_queries', []),
+                    'context': result.get('context', ''),
+                    'answer': result['answer']
+                },
+                as_node= 'finalize'
+            )
+
         return result['answer']
 
 
@@ -0,0 +1,248 @@
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from time import monotonic
+from typing import Iterable, Iterator
+
+
+class AdmissionError(Exception):
+    def __init__(self, message: str, retry_after: float) -> None:
+        """Base class for rejected requests.
+
+        Args:
+            message (str): Reason of the rejection.
+            retry_after (float): Seconds after which the client may retry.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Overloaded(AdmissionError):
+    """Raised when the wait queue is full or the wait timed out, served as 503."""
+
+
+class RateLimited(AdmissionError):
+    """Raised when a `thread_id` exceeds its rate limit, served as 429."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        """A simple token bucket, refilled at `rate` tokens per second up to `burst` tokens."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = monotonic()
+
+
+    def wait(self, count: int = 1) -> float:
+        """Seconds until `count` tokens are available, 0.0 if they are available now. Nothing is taken."""
+        now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        return max(0.0, (count - self.tokens) / self.rate)
+
+
+    def take(self, count: int = 1) -> float:
+        """Takes `count` tokens if available.
+
+        Args:
+            count (int, optional): Number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: 0.0 if the tokens were taken, otherwise seconds until they are available.
+        """
+        wait = self.wait(count)
+
+        if not wait:
+            self.tokens -= count
+
+        return wait
+
+
+class AdmissionController:
+    def __init__(
+            self,
+            *,
+            max_in_flight: int = 8,
+            max_queue: int = 32,
+            queue_timeout: float = 10.0,
+            rate_per_minute: float = 20.0,
+            burst: int = 5,
+            max_threads: int = 10_000
+        ) -> None:
+        """Admission control and backpressure for the chat API. Every admitted request runs the chatbot pipeline, which makes several sequential LLM calls, so capping the running pipelines caps the in-flight LLM calls. Requests beyond the cap wait in a bounded queue. When the queue is full or the wait times out, the request is shed immediately instead of piling up upstream 429s and retries.
+
+        Args:
+            max_in_flight (int, optional): Maximum number of requests running at the same time. Defaults to 8.
+            max_queue (int, optional): Maximum number of requests waiting for a slot. Defaults to 32.
+            queue_timeout (float, optional): Maximum seconds a request waits for a slot. Defaults to 10.0.
+            rate_per_minute (float, optional): Sustained request rate allowed per `thread_id`. Defaults to 20.0.
+            burst (int, optional): Number of requests a `thread_id` can make in a burst. Defaults to 5.
+            max_threads (int, optional): Maximum number of `thread_id` buckets to remember, least recently used are dropped. Defaults to 10_000.
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_threads = max_threads
+
+        self._slots = threading.Semaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+
+    def _bucket(self, thread_id: str) -> TokenBucket:
+        """Bucket of `thread_id`, created if needed. Must be called with `self._lock` held."""
+        bucket = self._buckets.get(thread_id)
+
+        if bucket is None:
+            bucket = self._buckets[thread_id] = TokenBucket(self.rate, self.burst)
+
+            if len(self._buckets) > self.max_threads:
+                self._buckets.popitem(last= False)
+
+        self._buckets.move_to_end(thread_id)
+        return bucket
+
+
+    def _check_rate(self, thread_ids: Iterable[str]) -> None:
+        """Takes a token per request from the bucket of its thread. A thread appearing several times needs as many tokens, and nothing is taken unless every thread has enough.
+
+        Raises:
+            RateLimited: If a thread has not enough tokens left.
+        """
+        counts = Counter(thread_ids)
+
+        for thread_id, count in counts.items():
+            if count > self.burst:
+                raise RateLimited(f'{count} requests for thread "{thread_id}" at once exceed its burst of {self.burst}, split them across requests.', retry_after= count / self.rate)
+
+        with self._lock:
+            buckets = {thread_id: self._bucket(thread_id) for thread_id in counts}
+            waits = {thread_id: bucket.wait(counts[thread_id]) for thread_id, bucket in buckets.items()}
+            limited = [thread_id for thread_id, wait in waits.items() if wait]
+
+            if not limited:
+                for thread_id, bucket in buckets.items():
+                    bucket.take(counts[thread_id])
+
+        if limited:
+            thread_id = max(limited, key= waits.get)
+            raise RateLimited(f'Rate limit exceeded for thread "{thread_id}".', retry_after= waits[thread_id])
+
+
+    def _acquire(self) -> None:
+        """Takes a slot, waiting in the queue if none is free.
+
+        Raises:
+            Overloaded: If the wait queue is full or no slot was free within `self.queue_timeout`.
+        """
+        # fast path, a slot is free
+        acquired = self._slots.acquire(blocking= False)
+
+        if not acquired:
+            with self._lock:
+                if self._waiting >= self.max_queue:
+                    raise Overloaded('Server is overloaded, wait queue is full.', retry_after= self.queue_timeout)
+
+                self._waiting += 1
+
+            try:
+                acquired = self._slots.acquire(timeout= self.queue_timeout)
+
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+
+            if not acquired:
+                raise Overloaded('Server is overloaded, timed out waiting for a slot.', retry_after= self.queue_timeout)
+
+        with self._lock:
+            self._in_flight += 1
+
+
+    def _release(self, count: int = 1) -> None:
+        """Gives back `count` slots taken by `self._acquire()` or `self._try_acquire()`."""
+        with self._lock:
+            self._in_flight -= count
+
+        for _ in range(count):
+            self._slots.release()
+
+
+    def _try_acquire(self) -> bool:
+        """Takes a slot only if one is free right now."""
+        if not self._slots.acquire(blocking= False):
+            return False
+
+        with self._lock:
+            self._in_flight += 1
+
+        return True
+
+
+    @contextmanager
+    def admit(self, thread_id: str) -> Iterator[None]:
+        """Holds a slot for the duration of the `with` block.
+
+        Args:
+            thread_id (str): Conversation thread of the request, used for rate limiting.
+
+        Raises:
+            RateLimited: If the `thread_id` exceeded its rate limit.
+            Overloaded: If the wait queue is full or no slot was free within `self.queue_timeout`.
+        """
+        self._check_rate([thread_id])
+        self._acquire()
+
+        try:
+            yield
+
+        finally:
+            self._release()
+
+
+    @contextmanager
+    def admit_batch(self, thread_ids: list[str], max_slots: int) -> Iterator[int]:
+        """Holds up to `max_slots` slots for the duration of the `with` block, for requests running several pipelines at once. The first slot is acquired like in `admit()`, the others only if they are free right now, so a batch never waits for more than one slot nor pushes the running pipelines over `self.max_in_flight`.
+
+        Every item counts against the rate limit of its own thread, as if it was sent on its own, so batching is no way around the limits. The batch is admitted only if all of its threads are within their limits.
+
+        Args:
+            thread_ids (list[str]): Thread of every item of the request, used for rate limiting.
+            max_slots (int): Maximum number of slots to hold.
+
+        Yields:
+            int: Number of slots held, the number of pipelines the request may run at the same time.
+
+        Raises:
+            RateLimited: If a thread exceeded its rate limit.
+            Overloaded: If the wait queue is full or no slot was free within `self.queue_timeout`.
+        """
+        self._check_rate(thread_ids)
+        self._acquire()
+        held = 1
+
+        while held < max_slots and self._try_acquire():
+            held += 1
+
+        try:
+            yield held
+
+        finally:
+            self._release(held)
+
+
+    def stats(self) -> dict[str, int]:
+        """Current load, useful for health checks."""
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue
+            }
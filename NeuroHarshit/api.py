@@ -1,11 +1,14 @@
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import getpass
 import os
 
 from Agent.chatbot import ChatBot
+from admission import AdmissionController, AdmissionError, RateLimited
 
 
 class ChatRequest(BaseModel):
@@ -17,18 +20,67 @@ class ChatResponse(BaseModel):
     question: str
     answer: str
 
-try: 
-    load_dotenv()
-    if not os.environ.get('OPENAI_API_KEY'):
-        os.environ['OPENAI_API_KEY'] = getpass.getpass('Enter your OpenAI API key: ')
 
-    chatbot = ChatBot(vector_db_path= r'.\Databases\faiss_index')
+class BatchChatRequest(BaseModel):
+    items: list[ChatRequest]
+    max_concurrency: int = 8
 
-except Exception as e:
-    raise HTTPException(status_code= 500, detail= f'Cannot load chatbot: {e}')
+
+class BatchChatItem(BaseModel):
+    question: str
+    thread_id: str
+    answer: str | None
+    error: str | None
+    elapsed: float | None
+
+
+class BatchChatResponse(BaseModel):
+    results: list[BatchChatItem]
+
+# loaded on startup, unless it was set before (e.g. a `ChatBot` with fake models for load tests)
+chatbot: ChatBot | None = None
+
+
+def load_chatbot() -> ChatBot:
+    try: 
+        load_dotenv()
+        if not os.environ.get('OPENAI_API_KEY'):
+            os.environ['OPENAI_API_KEY'] = getpass.getpass('Enter your OpenAI API key: ')
+
+        return ChatBot(vector_db_path= r'.\Databases\faiss_index')
+
+    except Exception as e:
+        raise HTTPException(status_code= 500, detail= f'Cannot load chatbot: {e}')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global chatbot
+
+    if chatbot is None:
+        chatbot = load_chatbot()
+
+    yield
 
 
-app = FastAPI()
+app = FastAPI(lifespan= lifespan)
+admission = AdmissionController(
+    max_in_flight= 8,
+    max_queue= 32,
+    queue_timeout= 10.0,
+    rate_per_minute= 20.0,
+    burst= 5
+)
+
+
+@app.exception_handler(AdmissionError)
+def admission_error_handler(request: Request, exc: AdmissionError):
+    # 429 for per thread rate limits, 503 for shedding due to overload
+    return JSONResponse(
+        status_code= 429 if isinstance(exc, RateLimited) else 503,
+        content= {'detail': str(exc)},
+        headers= {'Retry-After': str(max(1, round(exc.retry_after)))}
+    )
 
 
 @app.get('/', response_model= dict[str, str])
@@ -36,8 +88,18 @@ def root():
     return {'Hello': 'world'}
 
 
+@app.get('/health', response_model= dict[str, int])
+def health():
+    return admission.stats()
+
+
 @app.post('/chat', response_model= ChatResponse)
 def generate(data: ChatRequest):
+    with admission.admit(data.thread_id or 'default'):
+        return _generate(data)
+
+
+def _generate(data: ChatRequest):
     try:
         answer = chatbot.run(data.question, thread_id= data.thread_id)
         return {'question': data.question, 'answer': answer}
@@ -46,4 +108,26 @@ def generate(data: ChatRequest):
         raise HTTPException(status_code= 400, detail= f'Generation failed: {e}')
 
 
-uvicorn.run(app)
+@app.post('/chat/batch', response_model= BatchChatResponse)
+def generate_batch(data: BatchChatRequest):
+    # a batch holds one slot per pipeline it runs at the same time, so it counts against the global limit like single requests, and every item against the rate limit of its thread
+    thread_ids = [item.thread_id or 'default' for item in data.items]
+
+    with admission.admit_batch(thread_ids, max(1, min(data.max_concurrency, len(data.items)))) as slots:
+        return _generate_batch(data, slots)
+
+
+def _generate_batch(data: BatchChatRequest, max_concurrency: int):
+    try:
+        results = chatbot.run_batch(
+            [(item.question, item.thread_id or 'default') for item in data.items],
+            max_concurrency= max_concurrency
+        )
+        return {'results': results}
+    
+    except Exception as e:
+        raise HTTPException(status_code= 400, detail= f'Batch generation failed: {e}')
+
+
+if __name__ == '__main__':
+    uvicorn.run(app)
@@ -0,0 +1,4 @@
+from .fakes import HashingEmbeddings, FakeChatModel
+from .suite import TimedChatBot, fake_models, build_index, bench_faiss_load, bench_mmr, bench_chatbot, bench_api, latency_stats
+
+__all__ = [HashingEmbeddings, FakeChatModel, TimedChatBot, fake_models, build_index, bench_faiss_load, bench_mmr, bench_chatbot, bench_api, latency_stats]
@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+
+from benchmark.fakes import HashingEmbeddings
+from benchmark.suite import TimedChatBot, fake_models, build_index, bench_faiss_load, bench_mmr, bench_chatbot, bench_coalescing, bench_http, bench_api, HTTP_CLIENTS
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog= 'python -m benchmark',
+        description= 'Offline benchmark of NeuroHarshit retrieval and serving, with a fake LLM and deterministic fake embeddings.'
+    )
+    parser.add_argument('--text-dir', default= os.path.join(BASE_DIR, 'Databases', 'text_data'), help= 'Knowledge base to index. Defaults to Databases/text_data.')
+    parser.add_argument('--latency-scale', type= float, default= 0.1, help= 'Factor applied to the simulated LLM and embedding latencies, 0 measures the code only. Defaults to 0.1.')
+    parser.add_argument('--ks', type= int, nargs= '+', default= [2, 4, 8], help= 'Values of k for the MMR search. Defaults to 2 4 8.')
+    parser.add_argument('--fetch-ks', type= int, nargs= '+', default= [10, 20, 40], help= 'Values of fetch_k for the MMR search. Defaults to 10 20 40.')
+    parser.add_argument('--conversations', type= int, default= 8, help= 'Conversations for the end-to-end ChatBot.run latency. Defaults to 8.')
+    parser.add_argument('--fused-rewrite', action= 'store_true', help= 'Benchmark the ChatBot with the fused rewrite-and-expand node.')
+    parser.add_argument('--rolling-history', action= 'store_true', help= 'Benchmark the ChatBot with the rolling history window and running summary.')
+    parser.add_argument('--coalesce-clients', type= int, default= 32, help= 'Concurrent first-turn conversations of the coalescing comparison, 0 skips it. Defaults to 32.')
+    parser.add_argument('--mock-server', nargs= '*', choices= HTTP_CLIENTS, default= [], help= 'Compare the connections opened by these HTTP clients against a local mock OpenAI server: "fresh" pools per model, the "shared" pools, or the shared pools over HTTP/2 ("shared-h2"). Skipped by default.')
+    parser.add_argument('--requests', type= int, default= 400, help= 'Requests of the /chat load test, 0 skips it. Defaults to 400.')
+    parser.add_argument('--concurrency', type= int, default= 32, help= 'Concurrent clients of the /chat load test. Defaults to 32.')
+    parser.add_argument('--threads', type= int, default= 100, help= 'Distinct thread_ids of the /chat load test. Defaults to 100.')
+    parser.add_argument('--output', default= os.path.join(BASE_DIR, 'benchmark', 'results.jsonl'), help= 'JSON Lines file the results are appended to, one line per run. Defaults to benchmark/results.jsonl.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    # one HTTP round trip per embedding request, ~0.2s for OpenAI
+    embeddings = HashingEmbeddings(latency= 0.2 * args.latency_scale)
+    llm_kwargs = {'first_token_latency': 0.4 * args.latency_scale, 'seconds_per_token': 0.01 * args.latency_scale}
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec= 'seconds'),
+        'config': {key: value for key, value in vars(args).items() if key not in ('text_dir', 'output')},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()}
+    }
+
+    with tempfile.TemporaryDirectory(prefix= 'faiss_') as index_path:
+        results['index'] = build_index(args.text_dir, embeddings, index_path)
+        print(f'Indexed {results['index']['files']} files into {results['index']['chunks']} chunks.', file= sys.stderr)
+
+        results['faiss_load'] = bench_faiss_load(index_path, embeddings)
+
+        with fake_models(embeddings, **llm_kwargs):
+            chatbot = TimedChatBot(vector_db_path= index_path, fused_rewrite= args.fused_rewrite, rolling_history= args.rolling_history)
+
+        results['mmr'] = bench_mmr(chatbot.vector_db, embeddings, ks= args.ks, fetch_ks= args.fetch_ks)
+        print('Measured the MMR search.', file= sys.stderr)
+
+        results['chatbot'] = bench_chatbot(chatbot, conversations= args.conversations)
+        print('Measured ChatBot.run.', file= sys.stderr)
+
+        if args.coalesce_clients:
+            results['coalescing'] = bench_coalescing(index_path, embeddings, clients= args.coalesce_clients, **llm_kwargs)
+            print(f'Measured coalescing, {results['coalescing']['off']['llm_calls']} -> {results['coalescing']['on']['llm_calls']} LLM calls.', file= sys.stderr)
+
+        if args.mock_server:
+            # TCP + TLS setup of a new connection, ~0.15s for OpenAI
+            results['mock_server'] = bench_http(index_path, embeddings, clients= args.mock_server, handshake_latency= 0.15 * args.latency_scale, **llm_kwargs)
+            print('Measured the HTTP clients: ' + ', '.join(f'{kind} {values['connections']} connections' for kind, values in results['mock_server'].items()), file= sys.stderr)
+
+        if args.requests:
+            # a fresh chatbot, so the conversations of the previous step don't count as history
+            with fake_models(embeddings, **llm_kwargs):
+                server_chatbot = TimedChatBot(vector_db_path= index_path, fused_rewrite= args.fused_rewrite, rolling_history= args.rolling_history)
+
+            results['api'] = bench_api(server_chatbot, requests= args.requests, concurrency= args.concurrency, threads= args.threads)
+            server_chatbot.wait_for_compaction()
+            results['api']['nodes'] = {node: len(values) for node, values in server_chatbot.node_timings.items()}
+            print('Measured the /chat endpoint.', file= sys.stderr)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok= True)
+    with open(args.output, 'a', encoding= 'utf-8') as f:
+        f.write(json.dumps(results) + '\n')
+
+    print(json.dumps(results, indent= 2))
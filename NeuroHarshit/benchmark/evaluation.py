@@ -0,0 +1,210 @@
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+from datetime import datetime
+from itertools import product
+from time import perf_counter
+from typing import Any, List
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from Agent.chatbot import ChatBot
+from benchmark.fakes import HashingEmbeddings
+from benchmark.suite import fake_models, build_index, latency_stats
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLD_PATH = os.path.join(BASE_DIR, 'benchmark', 'gold_questions.json')
+
+
+def load_gold(path: str = GOLD_PATH) -> List[dict[str, Any]]:
+    """Loads the gold set: a list of {"question": ..., "sources": [file names in `Databases/text_data` that answer it]}."""
+    with open(path, encoding= 'utf-8') as f:
+        return json.load(f)
+
+
+def _source_name(doc) -> str:
+    # the shipped index stores Windows paths, the benchmark index plain file names
+    return re.split(r'[\\/]', doc.metadata.get('source', ''))[-1]
+
+
+def rank_by_relevance(chatbot: ChatBot, question: str, docs: List[Document]) -> List[Document]:
+    """Orders the retrieved documents by the L2 distance of their stored vector to the question's, the score of the FAISS index. The multi-query retriever returns the union of several searches in no meaningful order, so its documents are ranked the same way as a single search before cutting to the top `k`. Documents not found in the index keep their order, after the others."""
+    query = np.asarray(chatbot.embeddings.embed_query(question), dtype= np.float32)
+    positions = {docstore_id: position for position, docstore_id in chatbot.vector_db.index_to_docstore_id.items()}
+
+    def distance(doc: Document) -> float:
+        position = positions.get(doc.id)
+
+        if position is None:
+            return float('inf')
+
+        return float(np.sum((chatbot.vector_db.index.reconstruct(position) - query) ** 2))
+
+    return sorted(docs, key= distance)
+
+
+def evaluate_retriever(chatbot: ChatBot, gold: List[dict[str, Any]]) -> dict[str, Any]:
+    """Runs every gold question through `chatbot.retriever`, i.e. the retrieval step of the graph with its embedding, query expansion and MMR search, and scores the retrieved documents against the gold sources. Ranked metrics use the top `chatbot.k` documents by `rank_by_relevance()`, so configurations with and without multi-query are compared on the same number of documents and the same score.
+
+    Args:
+        chatbot (ChatBot): The chatbot, configured with the retriever settings to evaluate.
+        gold (List[dict[str, Any]]): Gold set, see `load_gold()`.
+
+    Returns:
+        dict[str, Any]: Averages over the questions:
+            - "recall_at_k": Share of the gold sources found in the top `k` documents.
+            - "mrr": Mean reciprocal rank of the first top `k` document from a gold source.
+            - "hit_rate": Share of questions with a gold source in the top `k` documents.
+            - "context_recall": Share of the gold sources found in all the retrieved documents, the context the answer is generated from (`k` documents per search query with multi-query).
+            - "docs" and "context_chars": Size of the retrieved context.
+            - "latency": Latency stats of the retrieval.
+    """
+    recalls, reciprocal_ranks, hits, context_recalls, docs_counts, context_sizes, timings = [], [], [], [], [], [], []
+
+    for item in gold:
+        start = perf_counter()
+        docs = chatbot.retriever.invoke(item['question'])
+        timings.append(perf_counter() - start)
+
+        relevant = set(item['sources'])
+        top_k = [_source_name(doc) for doc in rank_by_relevance(chatbot, item['question'], docs)[:chatbot.k]]
+        ranks = [rank for rank, source in enumerate(top_k, start= 1) if source in relevant]
+
+        recalls.append(len(relevant & set(top_k)) / len(relevant))
+        reciprocal_ranks.append(1 / ranks[0] if ranks else 0.0)
+        hits.append(1.0 if ranks else 0.0)
+        context_recalls.append(len(relevant & {_source_name(doc) for doc in docs}) / len(relevant))
+        docs_counts.append(len(docs))
+        context_sizes.append(sum(len(doc.page_content) for doc in docs))
+
+    count = len(gold)
+    return {
+        'recall_at_k': sum(recalls) / count,
+        'mrr': sum(reciprocal_ranks) / count,
+        'hit_rate': sum(hits) / count,
+        'context_recall': sum(context_recalls) / count,
+        'docs': sum(docs_counts) / count,
+        'context_chars': sum(context_sizes) / count,
+        'latency': latency_stats(timings)
+    }
+
+
+def pareto_front(results: List[dict[str, Any]]) -> None:
+    """Marks every result with "pareto": True if no other configuration is at least as fast (median latency) and at least as good (recall@k and MRR), while strictly better in one of them."""
+    def key(result: dict) -> tuple[float, float, float]:
+        return (-result['latency']['p50'], result['recall_at_k'], result['mrr'])
+
+    for result in results:
+        own = key(result)
+        result['pareto'] = not any(
+            all(a >= b for a, b in zip(key(other), own)) and key(other) != own
+            for other in results if other is not result
+        )
+
+
+def format_table(results: List[dict[str, Any]]) -> str:
+    """Speed versus quality table, fastest first. Pareto-optimal configurations are marked with "*", the others are beaten on both axes by one of them. "ctx rec" is the recall over the whole retrieved context, "docs" documents, the other quality columns are over the top `k`."""
+    lines = [f'{'':1} {'embedding':<24} {'k':>3} {'fetch_k':>7} {'lambda':>6} {'multi':>5} {'recall':>7} {'mrr':>6} {'hit':>6} {'ctx rec':>7} {'docs':>5} {'p50 ms':>8} {'p95 ms':>8}']
+
+    for result in sorted(results, key= lambda result: result['latency']['p50']):
+        config = result['config']
+        lines.append(
+            f'{'*' if result['pareto'] else ' ':1} {config['embedding_model']:<24} {config['k']:>3} {config['fetch_k']:>7} {config['lambda_mult']:>6} '
+            f'{'on' if config['multi_query'] else 'off':>5} {result['recall_at_k']:>7.3f} {result['mrr']:>6.3f} {result['hit_rate']:>6.3f} {result['context_recall']:>7.3f} '
+            f'{result['docs']:>5.1f} {result['latency']['p50'] * 1000:>8.1f} {result['latency']['p95'] * 1000:>8.1f}'
+        )
+
+    return '\n'.join(lines)
+
+
+def create_models(embedding_model: str, llm_model: str, latency_scale: float) -> tuple[Embeddings, BaseChatModel | None]:
+    """The embedding model and LLM to evaluate with. "hashing" and "fake" are the offline fakes with simulated latency, other names are OpenAI models and need `OPENAI_API_KEY`."""
+    if embedding_model == 'hashing':
+        embeddings = HashingEmbeddings(latency= 0.2 * latency_scale)
+
+    else:
+        from langchain_openai import OpenAIEmbeddings
+        embeddings = OpenAIEmbeddings(model= embedding_model)
+
+    if llm_model == 'fake':
+        # `fake_models` creates the `FakeChatModel`
+        return embeddings, None
+
+    from langchain_openai import ChatOpenAI
+    return embeddings, ChatOpenAI(model= llm_model, temperature= 0.0)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog= 'python -m benchmark.evaluation',
+        description= 'Offline evaluation of the ChatBot retrieval over a gold question set: recall@k, MRR and latency for every retriever configuration, as a speed versus quality Pareto table.'
+    )
+    parser.add_argument('--gold', default= GOLD_PATH, help= 'Gold question set. Defaults to benchmark/gold_questions.json.')
+    parser.add_argument('--text-dir', default= os.path.join(BASE_DIR, 'Databases', 'text_data'), help= 'Knowledge base to index. Defaults to Databases/text_data.')
+    parser.add_argument('--ks', type= int, nargs= '+', default= [2, 4, 8], help= 'Values of k. Defaults to 2 4 8.')
+    parser.add_argument('--fetch-ks', type= int, nargs= '+', default= [20], help= 'Values of fetch_k, combinations with fetch_k < k are skipped. Defaults to 20.')
+    parser.add_argument('--lambdas', type= float, nargs= '+', default= [0.25, 0.5, 1.0], help= 'Values of the MMR lambda_mult. Defaults to 0.25 0.5 1.0.')
+    parser.add_argument('--multi-query', nargs= '+', choices= ['on', 'off'], default= ['on', 'off'], help= 'Multi-query expansion settings. Defaults to on off.')
+    parser.add_argument('--embedding-models', nargs= '+', default= ['hashing'], help= 'Embedding models, "hashing" for the offline fake or OpenAI model names. Defaults to hashing.')
+    parser.add_argument('--llm', default= 'fake', help= 'LLM of the query expansion, "fake" for the offline fake or an OpenAI model name. Defaults to fake.')
+    parser.add_argument('--latency-scale', type= float, default= 0.1, help= 'Factor applied to the simulated latencies of the fakes. Defaults to 0.1.')
+    parser.add_argument('--output', default= os.path.join(BASE_DIR, 'benchmark', 'evaluation.jsonl'), help= 'JSON Lines file the results are appended to, one line per run. Defaults to benchmark/evaluation.jsonl.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    gold = load_gold(args.gold)
+    llm_kwargs = {'first_token_latency': 0.4 * args.latency_scale, 'seconds_per_token': 0.01 * args.latency_scale}
+    results = []
+
+    for embedding_model in args.embedding_models:
+        embeddings, llm = create_models(embedding_model, args.llm, args.latency_scale)
+
+        with tempfile.TemporaryDirectory(prefix= 'faiss_') as index_path:
+            build_index(args.text_dir, embeddings, index_path)
+
+            for k, fetch_k, lambda_mult, multi_query in product(args.ks, args.fetch_ks, args.lambdas, args.multi_query):
+                if fetch_k < k:
+                    continue
+
+                config = {
+                    'embedding_model': embedding_model,
+                    'k': k,
+                    'fetch_k': fetch_k,
+                    'lambda_mult': lambda_mult,
+                    'multi_query': multi_query == 'on'
+                }
+
+                with fake_models(embeddings, llm, **llm_kwargs):
+                    chatbot = ChatBot(
+                        vector_db_path= index_path,
+                        k= k,
+                        fetch_k= fetch_k,
+                        lambda_mult= lambda_mult,
+                        multi_query= config['multi_query']
+                    )
+
+                results.append({'config': config, **evaluate_retriever(chatbot, gold)})
+                print(f'Evaluated {config}', file= sys.stderr)
+
+    pareto_front(results)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok= True)
+    with open(args.output, 'a', encoding= 'utf-8') as f:
+        f.write(json.dumps({
+            'started_at': datetime.now().isoformat(timespec= 'seconds'),
+            'llm': args.llm,
+            'questions': len(gold),
+            'latency_scale': args.latency_scale,
+            'results': results
+        }) + '\n')
+
+    print(format_table(results))
@@ -0,0 +1,156 @@
+import re
+import json
+import time
+import hashlib
+import threading
+from math import sqrt
+from typing import Any, List
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import PrivateAttr
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+_STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'do', 'does', 'did', 'has', 'have', 'had', 'what', 'which', 'who',
+    'how', 'when', 'where', 'why', 'of', 'in', 'on', 'for', 'to', 'and', 'or', 'with', 'about', 'his', 'he', 'him',
+    'can', 'you', 'tell', 'me', 'any', 'some'
+}
+
+
+def _tokens(text: str) -> int:
+    # ~4 characters per token, close enough for English prose
+    return max(1, len(text) // 4)
+
+
+class HashingEmbeddings(Embeddings):
+    def __init__(self, size: int = 256, latency: float = 0.0) -> None:
+        """Deterministic stand-in for `OpenAIEmbeddings`. Every word is hashed into one of `size` dimensions (feature hashing), so texts sharing words get similar vectors and retrieval still returns relevant chunks, without network or randomness.
+
+        Args:
+            size (int, optional): Number of dimensions. Defaults to 256.
+            latency (float, optional): Simulated seconds per request, every call is one request. Defaults to 0.0.
+        """
+        self.size = size
+        self.latency = latency
+
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+
+        for word in _WORD_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode('utf-8'), digest_size= 8).digest()
+            # the sign bit keeps unrelated words from adding up in a shared dimension
+            vector[int.from_bytes(digest[:4], 'little') % self.size] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._embed(text)
+
+
+def _keywords(text: str) -> List[str]:
+    return [word for word in _WORD_PATTERN.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def _search_queries(question: str) -> List[str]:
+    """4 topic-style variants of a question: broader, narrower and 2 specific, like the query expansion prompt asks for."""
+    words = _keywords(question) or ['harshit']
+    return [
+        ' '.join(words[:2]),
+        ' '.join(words + ['details']),
+        ' '.join(['harshit'] + words),
+        ' '.join(words[::-1])
+    ]
+
+
+def respond(messages: List[BaseMessage]) -> str:
+    """Deterministic answer to every prompt of the `ChatBot`, recognized by its instructions.
+
+    Args:
+        messages (List[BaseMessage]): Formatted prompt messages.
+
+    Returns:
+        str: The response, in the format the prompt asks for.
+    """
+    text = '\n'.join(message.content for message in messages)
+
+    # running summary of the rolling history, the keywords of the user messages, up to ~120 words
+    if 'NEW MESSAGES:\n' in text:
+        summary, new = text.split('CURRENT SUMMARY: ', 1)[1].split('\n\nNEW MESSAGES:\n', 1)
+        asked = [' '.join(_keywords(line[len('user: '):])) for line in new.split('\n') if line.startswith('user: ')]
+        words = ' '.join([summary if summary != '(none)' else '', *asked]).split()
+        return ' '.join(words[-120:])
+
+    # fused rewrite-and-expand, a JSON object for the structured output
+    if 'TASK 2:' in text:
+        last = text.rsplit('LATEST USER QUERY: ', 1)[1].strip()
+        return json.dumps({'standalone_question': last, 'search_queries': _search_queries(last)})
+
+    # rewriting, the follow-ups of the benchmark are already standalone
+    if 'LATEST USER QUERY: ' in text:
+        return text.rsplit('LATEST USER QUERY: ', 1)[1].strip()
+
+    # query expansion of the `MultiQueryRetriever`
+    if 'USER QUESTION: ' in text:
+        return '\n'.join(_search_queries(text.split('USER QUESTION: ', 1)[1].split('\n', 1)[0]))
+
+    # generation, the first sentence of every retrieved chunk, up to ~150 words
+    if 'CONTEXT: ' in text:
+        context = text.split('CONTEXT: ', 1)[1].rsplit('\n\nQUESTION: ', 1)[0]
+        sentences = [block.split(': ', 1)[-1].split('. ')[0].strip() for block in context.split('\n\n') if block.strip()]
+        words = ' '.join(sentences).split()[:150]
+        return ' '.join(words) or "I don't have information on that topic."
+
+    raise ValueError(f'Unknown prompt: {text[:80]!r}')
+
+
+class FakeChatModel(BaseChatModel):
+    """Drop-in replacement of `ChatOpenAI` answering with `respond()`, after a simulated latency (time to first token, then time per output token). It accepts the keyword arguments the `ChatBot` passes to `ChatOpenAI`, and supports `with_structured_output` for the fused rewrite. `calls` counts the requests it answered, the upstream calls a real model would have made."""
+    model: str = 'fake'
+    temperature: float = 0.0
+    max_retries: int = 0
+    http_client: Any = None
+    http_async_client: Any = None
+    first_token_latency: float = 0.4
+    seconds_per_token: float = 0.01
+    calls: int = 0
+    _calls_lock: threading.Lock = PrivateAttr(default_factory= threading.Lock)
+
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-chat'
+
+
+    def _generate(self, messages: List[BaseMessage], stop: List[str] | None = None, run_manager= None, **kwargs) -> ChatResult:
+        text = respond(messages)
+
+        with self._calls_lock:
+            self.calls += 1
+
+        time.sleep(self.first_token_latency + _tokens(text) * self.seconds_per_token)
+
+        prompt_tokens = sum(_tokens(message.content) for message in messages)
+        message = AIMessage(
+            content= text,
+            usage_metadata= {'input_tokens': prompt_tokens, 'output_tokens': _tokens(text), 'total_tokens': prompt_tokens + _tokens(text)}
+        )
+        return ChatResult(generations= [ChatGeneration(message= message)])
+
+
+    def with_structured_output(self, schema, **kwargs):
+        # the response of the fused prompt is already the JSON of the schema
+        return self | RunnableLambda(lambda message: schema.model_validate_json(message.content))
@@ -0,0 +1,431 @@
+import os
+import socket
+import threading
+from math import ceil
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
+from typing import Any, Callable, Iterator, List
+
+import httpx
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_community.vectorstores import FAISS
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import Agent.chatbot
+from Agent.chatbot import ChatBot, ChatState, HTTP_TIMEOUT, _http_settings, _LoopLocalTransport
+from benchmark.fakes import FakeChatModel, respond
+from benchmark.mock_openai import MockOpenAIServer
+
+
+# questions a recruiter would ask, the follow-ups are asked in the same thread
+QUESTIONS = [
+    'What projects has Harshit worked on?',
+    'What are his technical skills?',
+    'Where did Harshit study?',
+    'Which certifications does he have?',
+    'What is his work experience?',
+    'What does Harshit do in his free time?',
+    'Has he worked with LangChain or LangGraph?',
+    'Tell me about his machine learning projects.'
+]
+FOLLOW_UPS = [
+    'Which of those is the most recent one?',
+    'What tools did he use for it?'
+]
+
+
+# HTTP clients of the models with a mock server, see `mock_server_models()`
+HTTP_CLIENTS = ('fresh', 'shared', 'shared-h2')
+
+
+def _percentile(values: List[float], q: float) -> float:
+    # nearest rank
+    ordered = sorted(values)
+    return ordered[max(0, ceil(q * len(ordered)) - 1)]
+
+
+def latency_stats(values: List[float]) -> dict[str, float]:
+    """Count, mean, p50, p95, p99 and max of latencies in seconds."""
+    if not values:
+        return {'count': 0}
+
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': _percentile(values, 0.50),
+        'p95': _percentile(values, 0.95),
+        'p99': _percentile(values, 0.99),
+        'max': max(values)
+    }
+
+
+def build_index(text_dir: str, embeddings: Embeddings, path: str) -> dict[str, Any]:
+    """Builds a FAISS index of the text files in `text_dir` like `Agent/vector_db.ipynb` does (500 character chunks, 50 overlap, flat L2 index), but with the given embeddings, and saves it at `path`.
+
+    Args:
+        text_dir (str): Folder of the knowledge base, e.g. `Databases/text_data`.
+        embeddings (Embeddings): Embedding model, e.g. `HashingEmbeddings`.
+        path (str): Folder to save the index in.
+
+    Returns:
+        dict[str, Any]: Number of "files" and "chunks", and "seconds" taken.
+    """
+    start = perf_counter()
+    docs = []
+
+    for name in sorted(os.listdir(text_dir)):
+        with open(os.path.join(text_dir, name), encoding= 'utf-8') as f:
+            docs.append(Document(page_content= f.read(), metadata= {'source': name}))
+
+    chunks = RecursiveCharacterTextSplitter(chunk_size= 500, chunk_overlap= 50).split_documents(docs)
+    FAISS.from_documents(chunks, embeddings).save_local(path)
+
+    return {'files': len(docs), 'chunks': len(chunks), 'seconds': perf_counter() - start}
+
+
+def bench_faiss_load(path: str, embeddings: Embeddings, repeat: int = 10) -> dict[str, float]:
+    """Latency of loading the FAISS index, as done by `ChatBot._load_faiss_index()`."""
+    timings = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        FAISS.load_local(folder_path= path, embeddings= embeddings, allow_dangerous_deserialization= True)
+        timings.append(perf_counter() - start)
+
+    return latency_stats(timings)
+
+
+def bench_mmr(
+        vector_db: FAISS,
+        embeddings: Embeddings,
+        *,
+        ks: List[int],
+        fetch_ks: List[int],
+        repeat: int = 20
+    ) -> List[dict[str, Any]]:
+    """Latency of the MMR search of the base retriever for every `k`/`fetch_k` combination. The questions are embedded up front, so only the search itself is timed.
+
+    Args:
+        vector_db (FAISS): The loaded index.
+        embeddings (Embeddings): Embedding model of the index.
+        ks (List[int]): Numbers of returned documents.
+        fetch_ks (List[int]): Numbers of candidates MMR chooses from, combinations with `fetch_k < k` are skipped.
+        repeat (int, optional): Searches per question and combination. Defaults to 20.
+
+    Returns:
+        List[dict[str, Any]]: One entry per combination, with "k", "fetch_k" and the latency stats.
+    """
+    vectors = [embeddings.embed_query(question) for question in QUESTIONS]
+    results = []
+
+    for k in ks:
+        for fetch_k in fetch_ks:
+            if fetch_k < k:
+                continue
+
+            timings = []
+            for _ in range(repeat):
+                for vector in vectors:
+                    start = perf_counter()
+                    vector_db.max_marginal_relevance_search_by_vector(vector, k= k, fetch_k= fetch_k)
+                    timings.append(perf_counter() - start)
+
+            results.append({'k': k, 'fetch_k': fetch_k, **latency_stats(timings)})
+
+    return results
+
+
+class TimedChatBot(ChatBot):
+    def __init__(self, *args, **kwargs) -> None:
+        """`ChatBot` recording the latency of every graph node, by node method: "rewrite" (or "rewrite_and_expand" with `fused_rewrite`), "retrieve", "generate", "finalize", and the background "compact" (with `rolling_history`)."""
+        self.node_timings: dict[str, List[float]] = {}
+        self._timings_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+
+    def _timed(self, node: str, fn: Callable[[ChatState], ChatState], state: ChatState) -> ChatState:
+        start = perf_counter()
+
+        try:
+            return fn(state)
+
+        finally:
+            elapsed = perf_counter() - start
+            with self._timings_lock:
+                self.node_timings.setdefault(node, []).append(elapsed)
+
+
+    def _rewrite(self, state: ChatState) -> ChatState:
+        return self._timed('rewrite', super()._rewrite, state)
+
+
+    def _rewrite_and_expand(self, state: ChatState) -> ChatState:
+        return self._timed('rewrite_and_expand', super()._rewrite_and_expand, state)
+
+
+    def _retrieve(self, state: ChatState) -> ChatState:
+        return self._timed('retrieve', super()._retrieve, state)
+
+
+    def _generate(self, state: ChatState) -> ChatState:
+        return self._timed('generate', super()._generate, state)
+
+
+    def _finalize(self, state: ChatState) -> ChatState:
+        return self._timed('finalize', ChatBot._finalize, state)
+
+
+    def _compact(self, thread_id: str) -> None:
+        self._timed('compact', super()._compact, thread_id)
+
+
+@contextmanager
+def fake_models(embeddings: Embeddings, llm: BaseChatModel | None = None, **llm_kwargs) -> Iterator[None]:
+    """`ChatBot`s created within the `with` block use `embeddings` and `llm` (a `FakeChatModel` with `llm_kwargs` by default) instead of the models they would create."""
+    originals = Agent.chatbot.ChatOpenAI, Agent.chatbot.OpenAIEmbeddings
+    Agent.chatbot.ChatOpenAI = lambda **kwargs: llm if llm is not None else FakeChatModel(**kwargs, **llm_kwargs)
+    Agent.chatbot.OpenAIEmbeddings = lambda **kwargs: embeddings
+
+    try:
+        yield
+
+    finally:
+        Agent.chatbot.ChatOpenAI, Agent.chatbot.OpenAIEmbeddings = originals
+
+
+@contextmanager
+def mock_server_models(server: MockOpenAIServer, clients: str) -> Iterator[None]:
+    """`ChatBot`s created within the `with` block use a real `ChatOpenAI` and `OpenAIEmbeddings` sending their requests to `server`, to measure the HTTP clients. With `clients`:
+        - "fresh": the LLM and the embedding model each get their own connection pools, like without shared clients.
+        - "shared": the shared pools of `get_http_client()` and `get_http_async_client()`, as the `ChatBot` uses them.
+        - "shared-h2": the shared pools speaking HTTP/2, as they do with the API when `h2` is installed. The API negotiates HTTP/2 over TLS, the mock server has no TLS, so it is used with prior knowledge.
+
+    The embedding requests send the texts, counting their tokens would need the `tiktoken` encodings from the network.
+    """
+    limits, _ = _http_settings(None, HTTP_TIMEOUT)
+    opened: List[httpx.Client] = []
+
+    def pools(**transport_kwargs) -> dict[str, Any]:
+        client = httpx.Client(timeout= HTTP_TIMEOUT, limits= limits, **transport_kwargs)
+        opened.append(client)
+        return {
+            'http_client': client,
+            'http_async_client': httpx.AsyncClient(transport= _LoopLocalTransport(limits= limits, **transport_kwargs), timeout= HTTP_TIMEOUT)
+        }
+
+    shared_h2 = pools(http1= False, http2= True) if clients == 'shared-h2' else {}
+
+    def with_clients(kwargs: dict) -> dict:
+        if clients == 'fresh':
+            return {**kwargs, **pools()}
+
+        return {**kwargs, **shared_h2}
+
+    originals = Agent.chatbot.ChatOpenAI, Agent.chatbot.OpenAIEmbeddings
+    Agent.chatbot.ChatOpenAI = lambda **kwargs: ChatOpenAI(base_url= server.url, api_key= 'mock', **with_clients(kwargs))
+    Agent.chatbot.OpenAIEmbeddings = lambda **kwargs: OpenAIEmbeddings(base_url= server.url, api_key= 'mock', check_embedding_ctx_length= False, **with_clients(kwargs))
+
+    try:
+        yield
+
+    finally:
+        Agent.chatbot.ChatOpenAI, Agent.chatbot.OpenAIEmbeddings = originals
+
+        for client in opened:
+            client.close()
+
+
+def bench_http(
+        index_path: str,
+        embeddings: Embeddings,
+        *,
+        clients: List[str] = HTTP_CLIENTS,
+        conversations: int = 16,
+        concurrency: int = 8,
+        handshake_latency: float = 0.0,
+        **llm_kwargs
+    ) -> dict[str, Any]:
+    """Connections opened and `ChatBot.run` latency with every kind of HTTP clients, against a local `MockOpenAIServer` answering like the `FakeChatModel` and embedding with `embeddings`. `conversations` conversations (a first question, then the follow-ups) run `concurrency` at a time, with a fresh `ChatBot` per kind of clients.
+
+    Args:
+        index_path (str): Folder of the FAISS index.
+        embeddings (Embeddings): Embedding model of the index, also serving the embedding requests.
+        clients (List[str], optional): Kinds of clients to compare, see `mock_server_models()`. Defaults to `HTTP_CLIENTS`.
+        conversations (int, optional): Number of conversations. Defaults to 16.
+        concurrency (int, optional): Conversations running at the same time. Defaults to 8.
+        handshake_latency (float, optional): Simulated seconds of TCP + TLS setup per new connection. Defaults to 0.0.
+        **llm_kwargs: "first_token_latency" and "seconds_per_token" of the responses.
+
+    Returns:
+        dict[str, Any]: By kind of clients: "connections" and "requests" seen by the server, "wall_seconds", and latency stats of the runs under "latency".
+    """
+    results = {}
+
+    for kind in clients:
+        with MockOpenAIServer(respond, embeddings= embeddings, handshake_latency= handshake_latency, **llm_kwargs) as server:
+            with mock_server_models(server, kind):
+                chatbot = ChatBot(vector_db_path= index_path)
+
+                def conversation(index: int) -> List[float]:
+                    timings = []
+
+                    for question in [QUESTIONS[index % len(QUESTIONS)], *FOLLOW_UPS]:
+                        start = perf_counter()
+                        chatbot.run(question, thread_id= f'bench-http-{index}')
+                        timings.append(perf_counter() - start)
+
+                    return timings
+
+                start = perf_counter()
+                with ThreadPoolExecutor(max_workers= concurrency, thread_name_prefix= 'client') as pool:
+                    timings = [elapsed for values in pool.map(conversation, range(conversations)) for elapsed in values]
+
+                results[kind] = {**server.stats(), 'wall_seconds': perf_counter() - start, 'latency': latency_stats(timings)}
+
+    return results
+
+
+def bench_chatbot(chatbot: TimedChatBot, *, conversations: int = 8) -> dict[str, Any]:
+    """Latency of `ChatBot.run`, end to end and per node. Every conversation runs in its own thread: a first question, then the follow-ups, so the rewrite node runs with history too.
+
+    Args:
+        chatbot (TimedChatBot): The chatbot, with fake models.
+        conversations (int, optional): Number of conversations, the questions are repeated if needed. Defaults to 8.
+
+    Returns:
+        dict[str, Any]: Latency stats of the "first_turn" and "follow_up" runs, and of every node under "nodes".
+    """
+    timings: dict[str, List[float]] = {'first_turn': [], 'follow_up': []}
+
+    for index in range(conversations):
+        for turn, question in enumerate([QUESTIONS[index % len(QUESTIONS)], *FOLLOW_UPS]):
+            start = perf_counter()
+            chatbot.run(question, thread_id= f'bench-run-{index}')
+            timings['follow_up' if turn else 'first_turn'].append(perf_counter() - start)
+
+    chatbot.wait_for_compaction()
+
+    return {
+        **{name: latency_stats(values) for name, values in timings.items()},
+        'nodes': {node: latency_stats(values) for node, values in chatbot.node_timings.items()}
+    }
+
+
+def bench_coalescing(index_path: str, embeddings: Embeddings, *, clients: int = 32, questions: int = 4, **llm_kwargs) -> dict[str, Any]:
+    """Upstream LLM calls and latency of concurrent identical first-turn questions, with request coalescing off and on (`ChatBot(coalesce_first_turn=...)`). `clients` conversations ask their first question at the same time, `questions` distinct questions between them, like a burst of visitors clicking the same suggested questions.
+
+    Args:
+        index_path (str): Folder of the FAISS index.
+        embeddings (Embeddings): Embedding model of the index.
+        clients (int, optional): Number of concurrent conversations. Defaults to 32.
+        questions (int, optional): Number of distinct questions. Defaults to 4.
+        **llm_kwargs: Keyword arguments of the `FakeChatModel`, e.g. its latencies.
+
+    Returns:
+        dict[str, Any]: For "off" and "on": "llm_calls", "wall_seconds", and latency stats of the runs under "latency".
+    """
+    items = [(QUESTIONS[index % questions], f'bench-coalesce-{index}') for index in range(clients)]
+    results = {}
+
+    for coalesce in (False, True):
+        llm = FakeChatModel(**llm_kwargs)
+        with fake_models(embeddings, llm):
+            chatbot = ChatBot(vector_db_path= index_path, coalesce_first_turn= coalesce)
+
+        def send(item: tuple[str, str]) -> float:
+            question, thread_id = item
+            start = perf_counter()
+            chatbot.run(question, thread_id= thread_id)
+            return perf_counter() - start
+
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers= clients, thread_name_prefix= 'client') as pool:
+            timings = list(pool.map(send, items))
+
+        results['on' if coalesce else 'off'] = {
+            'llm_calls': llm.calls,
+            'wall_seconds': perf_counter() - start,
+            'latency': latency_stats(timings)
+        }
+
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def serve(chatbot: ChatBot) -> Iterator[str]:
+    """Serves `api.app` with `chatbot` on a free local port in a background thread, and yields its base URL."""
+    import uvicorn
+    import api
+
+    api.chatbot = chatbot
+    server = uvicorn.Server(uvicorn.Config(api.app, host= '127.0.0.1', port= _free_port(), log_level= 'warning'))
+    thread = threading.Thread(target= server.run, name= 'benchmark-server', daemon= True)
+    thread.start()
+
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError('The API server failed to start.')
+        sleep(0.01)
+
+    try:
+        yield f'http://127.0.0.1:{server.config.port}'
+
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def bench_api(chatbot: ChatBot, *, requests: int = 400, concurrency: int = 32, threads: int = 100) -> dict[str, Any]:
+    """Load test of the `/chat` endpoint: `requests` requests from `concurrency` concurrent clients, spread over `threads` conversation `thread_id`s. The requests of a `thread_id` are sent in order, so most threads get follow-up questions. Rejections of the admission control (429, 503) are counted, not retried.
+
+    Args:
+        chatbot (ChatBot): The chatbot to serve, with fake models.
+        requests (int, optional): Total number of requests. Defaults to 400.
+        concurrency (int, optional): Number of concurrent clients. Defaults to 32.
+        threads (int, optional): Number of distinct `thread_id`s. Defaults to 100.
+
+    Returns:
+        dict[str, Any]: "throughput" (successful requests per second), "wall_seconds", "status" counts, and latency stats of the successful requests under "latency".
+    """
+    # the i-th request of a thread asks the i-th question of its conversation
+    items = []
+    for index in range(requests):
+        thread, turn = index % threads, index // threads
+        conversation = [QUESTIONS[thread % len(QUESTIONS)], *FOLLOW_UPS]
+        items.append((f'bench-load-{thread}', conversation[turn % len(conversation)]))
+
+    with serve(chatbot) as url, httpx.Client(base_url= url, timeout= 120.0, limits= httpx.Limits(max_connections= concurrency)) as client:
+        def send(item: tuple[str, str]) -> tuple[int, float]:
+            thread_id, question = item
+            start = perf_counter()
+
+            try:
+                response = client.post('/chat', json= {'question': question, 'thread_id': thread_id})
+                return response.status_code, perf_counter() - start
+
+            except httpx.HTTPError:
+                return 0, perf_counter() - start
+
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers= concurrency, thread_name_prefix= 'client') as pool:
+            results = list(pool.map(send, items))
+        wall = perf_counter() - start
+
+    succeeded = [elapsed for status, elapsed in results if status == 200]
+    return {
+        'throughput': len(succeeded) / wall,
+        'wall_seconds': wall,
+        'status': {str(status): count for status, count in sorted(Counter(status for status, _ in results).items())},
+        'latency': latency_stats(succeeded)
+    }
@@ -1,9 +1,11 @@
-from .base_agent import BaseAgent, ResearchState
+from .base_agent import BaseAgent, ResearchState, SectionState
 from .searcher import SearcherAgent
 from .extractor import ExtractorAgent
 from .writer import WriterAgent
 from .critic import CriticAgent
+from .report import Report, ReportSection, RENDERERS
 from .assembler import AssemblerAgent
 from .orchestration import ResearchAssistant
+from .batch import run_batch, save_summary
 
-__all__ = [BaseAgent, ResearchState, SearcherAgent, ExtractorAgent, WriterAgent, CriticAgent, AssemblerAgent, ResearchAssistant]
\ No newline at end of file
+__all__ = [BaseAgent, ResearchState, SectionState, SearcherAgent, ExtractorAgent, WriterAgent, CriticAgent, Report, ReportSection, RENDERERS, AssemblerAgent, ResearchAssistant, run_batch, save_summary]
\ No newline at end of file
@@ -1,80 +1,71 @@
 import os
+from time import perf_counter
 from datetime import datetime
-from markdown_pdf import MarkdownPdf, Section
+from functools import lru_cache, partial
+from concurrent.futures import ProcessPoolExecutor
 
-from agents import ResearchState
+from agents import ResearchState, Report, ReportSection, RENDERERS
+from config import REPORT_FORMATS
 from utils import get_logger
 
 
-class AssemblerAgent:
-    def __init__(self, **convertor_kwargs):
-        """Integrates all validated sections into a unified document. Produces the final **PDF report** with a Title page, abstract, table of contents, Main body, conclusion, references, appendix, and consistent styling.
-        """
-        self.logger = get_logger(self.__class__.__name__)
-        self.pdf = MarkdownPdf(**convertor_kwargs)
-        self.css = 'body {text-align: justify}'
-
-        self.logger.info('AssemblerAgent Initialised.')
-
-    # --------------------------------------------------------
-    # most of functions are self-explanatory, so no docstrings
-    # --------------------------------------------------------
-    
-    def set_meta_data(self, state: ResearchState) -> None:
-        self.pdf.meta['creationDate'] = datetime.now().strftime('%Y-%m-%d')
-        self.pdf.meta['producer'] = 'AI Research Assistant'
-        self.pdf.meta['title'] = f'A Research Report on {state.get('topic', 'Untitled')}'
-        self.pdf.meta['author'] = 'Harshit Kumawat'
-        self.logger.info('Successfully generated meta data for the pdf.')
+REPORT_CSS = 'body {text-align: justify}'
+TITLE_PAGE_TEMPLATE = (
+    '# {title}'
+    '\n\n'
+    '**Author:** {author} (Created using Agentic AI Pipeline)<br>'
+    '**Disclamer:** This report is auto-generated by an AI-powered research assistant. Human verification is recommended for critical use.<br>'
+    '**Date of Creation:** {creationDate}<br>'
+    '<hr>'
+)
 
 
-    def add_title_page(self) -> None:
-        self.pdf.add_section(Section(
-            f'# {self.pdf.meta['title']}'
-            '\n\n'
-            f'**Author:** {self.pdf.meta['author']} (Created using Agentic AI Pipeline)<br>'
-            '**Disclamer:** This report is auto-generated by an AI-powered research assistant. Human verification is recommended for critical use.<br>'
-            f'**Date of Creation:** {self.pdf.meta['creationDate']}<br>'
-            '<hr>'
-        ))
-        self.logger.info('Created the title page.')
+@lru_cache(maxsize= 1)
+def load_methodology() -> str:
+    """Reads `utils/methodology.txt` once per process."""
+    with open(os.path.join('utils', 'methodology.txt')) as f:
+        return f.read()
 
-    
-    def add_abstract(self, abstract: str) -> None:
-        self.pdf.add_section(
-            Section(text= f'## Abstract\n\n{abstract}', toc= False),
-            self.css
-        )
-        self.logger.info('Added Abstract.')
 
+class AssemblerAgent:
+    def __init__(
+            self,
+            *,
+            formats: tuple[str, ...] = REPORT_FORMATS,
+            **convertor_kwargs
+        ):
+        """Integrates all validated sections into a unified document. Produces the final **report** with a Title page, abstract, table of contents, Main body, conclusion, references, appendix, and consistent styling.
 
-    def add_methodology(self) -> None:
-        path = os.path.join('utils', 'methodology.txt')
-        with open(path) as f:
-            methodology = f.read()
+        The state is turned into a format independent `Report` once, then written in every requested format by the `RENDERERS`: PDF, standalone Markdown, HTML, and JSON. The static parts (CSS, title page template, methodology) are loaded once, and every PDF is rendered in its own `RenderContext`, so one assembler can render any number of reports, also concurrently.
 
-        self.pdf.add_section(
-            Section(methodology),
-            self.css
-        )
-        self.logger.info('Added Methodology.')
+        Args:
+            formats (tuple[str, ...], optional): Output formats, keys of `RENDERERS`. Defaults to `config.REPORT_FORMATS`.
+            convertor_kwargs: Keyword arguments for `MarkdownPdf`.
 
+        Raises:
+            ValueError: If a format has no renderer.
+        """
+        self.logger = get_logger(self.__class__.__name__)
+        self.formats = self._check_formats(formats)
+        self.convertor_kwargs = convertor_kwargs
+        self.css = REPORT_CSS
+        self.methodology = load_methodology()
 
-    def add_main_body(self, report_parts: list[str]) -> None:
-        main_body = '\n\n'.join(report_parts)
-        self.pdf.add_section(
-            Section(main_body),
-            self.css
-        )
-        self.logger.info('Added main body.')
+        self.logger.info('AssemblerAgent Initialised.')
 
+    # --------------------------------------------------------
+    # most of functions are self-explanatory, so no docstrings
+    # --------------------------------------------------------
 
-    def add_conclusion(self, conclusion: str) -> None:
-        self.pdf.add_section(
-            Section(f'## Conclusion\n\n{conclusion}'),
-            self.css
-        )
-        self.logger.info('Added conclusion.')
+    def meta_data(self, state: ResearchState) -> dict[str, str]:
+        meta = {
+            'creationDate': datetime.now().strftime('%Y-%m-%d'),
+            'producer': 'AI Research Assistant',
+            'title': f'A Research Report on {state.get('topic', 'Untitled')}',
+            'author': 'Harshit Kumawat'
+        }
+        self.logger.info('Successfully generated meta data for the pdf.')
+        return meta
 
 
     @staticmethod
@@ -101,16 +92,16 @@ class AssemblerAgent:
 
         if len(formatted) == 1:
             return formatted[0]
-        
+
         elif len(formatted) == 2:
             return f'{formatted[0]} and {formatted[1]}'
-        
+
         else:
             # e.g. -> C. H. Song, H. J. Han, and Y. Avrithis,
             return ', '.join(formatted[:-1]) + f', and {formatted[-1]}'
-        
 
-    def add_references(self, sources: list[dict]) -> None:
+
+    def references(self, sources: list[dict]) -> str:
         references = []
         self.logger.info('Creating IEEE / Vancouver styled references...')
 
@@ -126,14 +117,13 @@ class AssemblerAgent:
                 f"Available: [{source['url']}]({source['url']})"
             )
             references.append(reference)
-            self.logger.info(f'Created reference for source ID: {source['id']}')
+            self.logger.info('Created reference for source ID: %s', source['id'])
 
-        self.pdf.add_section(Section(f'## References\n\n{"\n\n".join(references)}'))
-        self.logger.info('Added references.')
+        return f'## References\n\n{"\n\n".join(references)}'
 
 
-    def add_appendix_a(self, topics: dict) -> None:
-        """Adds the knowledge base that was extracted earlier."""
+    def appendix_a(self, topics: dict) -> str:
+        """Creates the knowledge base that was extracted earlier."""
 
         appendix = []
         self.logger.info('Creating Appendix A: Key points of Report...')
@@ -142,31 +132,30 @@ class AssemblerAgent:
             # adding every summary point of topic as valid markdown bullet points
             heading = f'{index}. **{topic['title']}:**\n\t- '
             summary = '\n\t- '.join(b for b in topic['summary_points'])
-            self.logger.info(f'Extracted main summary of topic {topic['title']}.')
+            self.logger.info('Extracted main summary of topic %s.', topic['title'])
 
             subtopics = []
             for index, subtopic in enumerate(topic.get('subtopics', []), start= 1):
                 # adding every subtopic's summary points into the topic's summary points
                 bullets = '\n\t- '.join(b for b in subtopic['summary_points'])
                 subtopics.append('\n\t- ' + bullets)
-                self.logger.info(f'Extracted summary of subtopic {index}.')
+                self.logger.info('Extracted summary of subtopic %d.', index)
 
             subtopic_bullets = '\n'.join(subtopics)
 
             # combining all points (topic + summary points)
             appendix.append(heading + summary + subtopic_bullets)
-            self.logger.info(f'Combined heading, summary and subtopic summary.')
+            self.logger.info('Combined heading, summary and subtopic summary.')
 
-        self.pdf.add_section(Section(f'## Appendix A: Key points of Report\n\n{"\n".join(appendix)}'))
-        self.logger.info('Added Apendix A.')
-        
+        return f'## Appendix A: Key points of Report\n\n{"\n".join(appendix)}'
 
-    def add_appendix_b(self, news_list: list[dict]) -> None:
-        """Adds the Recent News."""
+
+    def appendix_b(self, news_list: list[dict]) -> str:
+        """Creates the Recent News."""
         appendix = []
         self.logger.info('Creating Appendix B: Recent News...')
 
-        # News template: 
+        # News template:
         # Title
         #   - Publisher - Published on [date]
         #   - For more details click here.
@@ -177,25 +166,104 @@ class AssemblerAgent:
             url = f'\n\t- [For more details click here.]({news['url']})'
 
             appendix.append(title + publisher + url)
-            self.logger.info(f'Extracted news: {news['title']}')
+            self.logger.info('Extracted news: %s', news['title'])
+
+        return f'## Appendix B: Recent News\n\n{"\n".join(appendix)}'
 
 
-        self.pdf.add_section(Section(f'## Appendix B: Recent News\n\n{"\n".join(appendix)}'))
-        self.logger.info('Added Apendix B.')
+    def build_report(self, state: ResearchState) -> Report:
+        """
+        Builds the report model from the state, with the markdown of every section in order: title page, abstract, methodology, main body, conclusion, references, Appendix A (structured knowledge summary) and Appendix B (recent news).
+
+        Args:
+            state (ResearchState): The complete research state, see `create_report()`.
+
+        Returns:
+            Report: The report, ready for any renderer.
+        """
+        meta = self.meta_data(state)
+        knowledge = state.get('knowledge')
+
+        def section(name: str, text: str, *, toc: bool = True, css: str | None = None) -> ReportSection:
+            return {'name': name, 'text': text, 'toc': toc, 'css': css}
+
+        return {
+            'topic': state.get('topic', 'Untitled'),
+            'meta': meta,
+            'sections': [
+                section('title_page', TITLE_PAGE_TEMPLATE.format(**meta)),
+                section('abstract', f'## Abstract\n\n{knowledge['abstract']}', toc= False, css= self.css),
+                section('methodology', self.methodology, css= self.css),
+                section('main_body', '\n\n'.join(state.get('report_parts', [])), css= self.css),
+                section('conclusion', f'## Conclusion\n\n{knowledge['conclusion']}', css= self.css),
+                section('references', self.references(knowledge['sources'])),
+                section('appendix_a', self.appendix_a(knowledge['topics'])),
+                section('appendix_b', self.appendix_b(state.get('news', [])))
+            ],
+            'knowledge': knowledge,
+            'news': state.get('news', [])
+        }
+
+
+    @staticmethod
+    def _check_formats(formats: tuple[str, ...]) -> tuple[str, ...]:
+        unknown = [fmt for fmt in formats if fmt not in RENDERERS]
 
+        if unknown:
+            raise ValueError(f'Unknown report formats: {unknown}, expected any of {list(RENDERERS)}.')
 
-    def save(self, file_name: str) -> None:
-        os.makedirs('results', exist_ok= True)
-        path = os.path.join('results', file_name)
-        self.pdf.save(path)
-        self.logger.info(f'Saved the final report at: {path}')
+        return tuple(formats)
 
 
-    def create_final_pdf(self, state: ResearchState) -> None:
+    @staticmethod
+    def report_path(topic: str, fmt: str) -> str:
+        return os.path.join('results', f'{topic}.{fmt}')
+
+
+    def _renderer(self, fmt: str):
+        renderer = RENDERERS[fmt]
+        return partial(renderer, convertor_kwargs= self.convertor_kwargs) if fmt == 'pdf' else renderer
+
+
+    def _log_timings(self, path: str, timings: dict[str, float]) -> None:
+        details = ', '.join(f'{name}: {seconds:.2f}s' for name, seconds in timings.items())
+        self.logger.info(f'Saved the final report at: {path} in {sum(timings.values()):.2f}s ({details})')
+
+
+    def _render_format(self, report: Report, fmt: str) -> str:
+        path = self.report_path(report['topic'], fmt)
+        self._log_timings(path, self._renderer(fmt)(report, path))
+        return path
+
+
+    def render(self, report: Report, formats: tuple[str, ...] | None = None) -> dict[str, str]:
+        """
+        Writes the report in every format. The cheap formats (Markdown, HTML, JSON) take milliseconds and are written first, the PDF last.
+
+        Args:
+            report (Report): Report from `build_report()`.
+            formats (tuple[str, ...] | None, optional): Output formats, None means `self.formats`. Defaults to None.
+
+        Raises:
+            ValueError: If a format has no renderer.
+
+        Returns:
+            dict[str, str]: Path of the report per format.
         """
-        Generates the final structured research report as a PDF.
+        formats = self._check_formats(self.formats if formats is None else formats)
+        paths = {}
+
+        for fmt in sorted(formats, key= lambda fmt: fmt == 'pdf'):
+            paths[fmt] = self._render_format(report, fmt)
+
+        return paths
 
-        This method assembles all components of the research pipeline (produced by Searcher, Extractor, Writer, and Critic agents) into a professionally formatted PDF document. It sequentially builds the report with title page, abstract, methodology, main body, conclusion, references, and appendices.
+
+    def create_report(self, state: ResearchState) -> None:
+        """
+        Generates the final structured research report, in every format of `self.formats`.
+
+        This method assembles all components of the research pipeline (produced by Searcher, Extractor, Writer, and Critic agents) into a professionally formatted document. It sequentially builds the report with title page, abstract, methodology, main body, conclusion, references, and appendices.
 
         Args:
             state (ResearchState): The complete research state containing:
@@ -209,28 +277,51 @@ class AssemblerAgent:
                 - news (list[dict]): Recent news items about the topic for Appendix B.
 
         ## Workflow:
-            1. Set document metadata (title, author, date, etc.).
-            2. Add the title page.
-            3. Insert abstract.
-            4. Insert methodology section.
-            5. Compile the main body using generated report parts.
-            6. Add conclusion.
-            7. Format and append references in citation style.
-            8. Add Appendix A (structured knowledge summary).
-            9. Add Appendix B (recent news with metadata).
-            10. Save the completed PDF.
+            1. Create document metadata (title, author, date, etc.).
+            2. Build the report model with the markdown of every section (see `build_report()`).
+            3. Write the cheap formats, then the PDF in a fresh `RenderContext` (see `render()`).
+            4. Log the time taken by every format and PDF section.
 
         ## Output:
-            Saves the final PDF to disk with the filename: "topic.pdf".
+            Saves the report to disk with the filename: "topic.<format>", e.g. "topic.pdf".
+        """
+        self.render(self.build_report(state))
+
+
+    def render_many(
+            self,
+            states: list[ResearchState],
+            *,
+            workers: int | None = None,
+            formats: tuple[str, ...] | None = None
+        ) -> list[dict[str, str]]:
         """
-        self.set_meta_data(state)
-        self.add_title_page()
-        self.add_abstract(state.get('knowledge')['abstract'])
-        self.add_methodology()
-        self.add_main_body(state.get('report_parts', []))
-        self.add_conclusion(state.get('knowledge')['conclusion'])
-        self.add_references(state.get('knowledge')['sources'])
-        self.add_appendix_a(state.get('knowledge')['topics'])
-        self.add_appendix_b(state.get('news', []))
-
-        self.save(f"{state.get('topic', 'Untitled')}.pdf")
+        Renders the reports of many research states. The report models and the cheap formats are built in this process, the PDFs (the slow, CPU bound part) are laid out in parallel in a process pool.
+
+        Args:
+            states (list[ResearchState]): Complete research states, see `create_report()`.
+            workers (int | None, optional): Number of worker processes, None means one per CPU. Defaults to None.
+            formats (tuple[str, ...] | None, optional): Output formats, None means `self.formats`. Defaults to None.
+
+        Returns:
+            list[dict[str, str]]: Path of the report per format, in the order of `states`.
+        """
+        formats = self._check_formats(self.formats if formats is None else formats)
+        reports = [self.build_report(state) for state in states]
+        results = [self.render(report, tuple(fmt for fmt in formats if fmt != 'pdf')) for report in reports]
+
+        if 'pdf' not in formats or not reports:
+            return results
+
+        paths = [self.report_path(report['topic'], 'pdf') for report in reports]
+
+        start = perf_counter()
+        with ProcessPoolExecutor(max_workers= workers) as pool:
+            timings = list(pool.map(self._renderer('pdf'), reports, paths))
+
+        for result, path, timing in zip(results, paths, timings):
+            self._log_timings(path, timing)
+            result['pdf'] = path
+
+        self.logger.info(f'Rendered {len(reports)} PDF reports in {perf_counter() - start:.2f}s.')
+        return results
@@ -1,10 +1,13 @@
+import operator
 from typing import Any
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, Annotated
 
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 
 from config import DEFAULT_MODEL, SMALL_MODEL
+from utils import get_http_client, get_http_async_client, llm_slot, allm_slot, get_llm_cache, response_cache_key, span, annotate
 
 
 class ResearchState(TypedDict):
@@ -17,6 +20,16 @@ class ResearchState(TypedDict):
     report_parts: list[str]
     criticism: dict[int, str]
     is_criticized: bool
+    sections: Annotated[list[dict[str, Any]], operator.add]
+    updated_at: str
+
+
+class SectionState(TypedDict):
+    """State of a single section sub-pipeline, one is sent per knowledge topic."""
+    index: int
+    topic: dict[str, Any]
+    knowledge: dict[str, Any]
+
 
 class BaseAgent:
     def __init__(
@@ -26,15 +39,17 @@ class BaseAgent:
             temperature: float,
             *, 
             use_small_model: bool = False,
+            cache_responses: bool = False,
             **llm_kwargs
         ) -> None:
-        """Base class for creating agents. Initializes basic attributes, selects small or default model, and creates an object of `langchain_openai.ChatOpenAI` based on the given LLM arguments.
+        """Base class for creating agents. Initializes basic attributes, selects small or default model, and creates an object of `langchain_openai.ChatOpenAI` based on the given LLM arguments. Every agent reuses the shared connection pools from `utils.get_http_client()` and, for async calls, `utils.get_http_async_client()`.
 
         Args:
             name (str): Name of the agent.
             instructions (ChatPromptTemplate): Prompt for the LLM.
             temperature (float): Temperature for the LLM.
             use_small_model (bool, optional): If True then the agent will use smaller model from the `config/settings.py`. Defaults to False.
+            cache_responses (bool, optional): If True then the responses of the agent are repeatable enough to be replayed from the LLM response cache, when it is enabled (see `utils.set_llm_cache`). Defaults to False.
             llm_kwargs: Any other keyword arguments for the LLM.
         """
         # basic attributes
@@ -42,15 +57,102 @@ class BaseAgent:
         self.instructions = instructions
         self.temperature = temperature
         self.model = SMALL_MODEL if use_small_model else DEFAULT_MODEL
+        self.cache_responses = cache_responses
 
         # core components
         self.llm = ChatOpenAI(
             model= self.model,
             temperature= self.temperature,
+            http_client= get_http_client(),
+            http_async_client= get_http_async_client(),
             **llm_kwargs
         )
 
 
+    def _cached_response(self, messages: list[BaseMessage]) -> tuple[str | None, str | None]:
+        """Looks the messages up in the LLM response cache.
+
+        Args:
+            messages (list[BaseMessage]): Formatted prompt messages.
+
+        Returns:
+            tuple[str | None, str | None]: The cache key (None if the agent doesn't cache or the cache is disabled) and the cached response (None on a miss).
+        """
+        cache = get_llm_cache() if self.cache_responses else None
+
+        if cache is None:
+            return None, None
+
+        key = response_cache_key(self.model, self.temperature, messages)
+        return key, cache.get(key)
+
+
+    def _cache_response(self, key: str | None, response: str) -> None:
+        """Stores a response under the key returned by `self._cached_response()`, a no-op if the key is None."""
+        cache = get_llm_cache()
+
+        if key is not None and cache is not None:
+            cache.put(key, response, model= self.model)
+
+
+    def _record_usage(self, usage_metadata: dict | None, usage: dict[str, int] | None) -> None:
+        """Records the prompt and completion tokens of a call on the current trace span, and adds the total tokens to `usage['tokens']` if `usage` is provided."""
+        usage_metadata = usage_metadata or {}
+        annotate(
+            prompt_tokens= usage_metadata.get('input_tokens', 0),
+            completion_tokens= usage_metadata.get('output_tokens', 0)
+        )
+
+        if usage is not None:
+            usage['tokens'] = usage.get('tokens', 0) + usage_metadata.get('total_tokens', 0)
+
+
+    def _invoke(self, messages: list[BaseMessage], usage: dict[str, int] | None = None) -> str:
+        """Invokes `self.llm` within the global LLM budget (see `utils.set_llm_concurrency`) and returns the stripped content of the response. Cached responses are returned without calling the LLM. Every call is recorded as an "llm" span of the current trace (see `utils.tracing`).
+
+        Args:
+            messages (list[BaseMessage]): Formatted prompt messages.
+            usage (dict[str, int] | None, optional): If provided, the total tokens of the call are added to `usage['tokens']`. Defaults to None.
+
+        Returns:
+            str: Content of the response.
+        """
+        with span('llm', self.name, model= self.model):
+            key, cached = self._cached_response(messages)
+
+            if cached is not None:
+                annotate(cache_hit= True)
+                return cached
+
+            with llm_slot():
+                response = self.llm.invoke(messages)
+
+            self._record_usage(response.usage_metadata, usage)
+
+        content = response.content.strip()
+        self._cache_response(key, content)
+        return content
+
+
+    async def _ainvoke(self, messages: list[BaseMessage], usage: dict[str, int] | None = None) -> str:
+        """Async version of `self._invoke()`, using `self.llm.ainvoke`. Cache lookups are local SQLite reads, so they are done inline."""
+        with span('llm', self.name, model= self.model):
+            key, cached = self._cached_response(messages)
+
+            if cached is not None:
+                annotate(cache_hit= True)
+                return cached
+
+            async with allm_slot():
+                response = await self.llm.ainvoke(messages)
+
+            self._record_usage(response.usage_metadata, usage)
+
+        content = response.content.strip()
+        self._cache_response(key, content)
+        return content
+
+
     def run(self, state: ResearchState) -> ResearchState:
         """Every child class should implement this function. It is used as graph node later.
 
@@ -64,3 +166,18 @@ class BaseAgent:
             ResearchState: Child classes should return `ResearchState`.
         """
         raise NotImplementedError('Subclasses must implement run()')
+
+
+    async def arun(self, state: ResearchState) -> ResearchState:
+        """Async version of `run()`, every child class should implement this function. It is used as the async graph node, e.g. by `graph.ainvoke`.
+
+        Args:
+            state (ResearchState): State for the graph.
+
+        Raises:
+            NotImplementedError: Every child class must implement `arun()` function.
+
+        Returns:
+            ResearchState: Child classes should return `ResearchState`.
+        """
+        raise NotImplementedError('Subclasses must implement arun()')
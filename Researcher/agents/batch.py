@@ -0,0 +1,76 @@
+import os
+import json
+from datetime import datetime
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+from agents import ResearchAssistant
+from utils import get_logger, set_llm_concurrency
+
+
+def run_batch(
+        topics: list[str],
+        *,
+        workers: int = 4,
+        llm_concurrency: int | None = 8,
+        refresh: bool = False,
+        **assistant_kwargs
+    ) -> list[dict]:
+    """
+    Researches many topics concurrently, e.g. for nightly report generation.
+
+    Every topic gets its own `ResearchAssistant` run on a shared worker pool. All the runs share one global budget of in-flight LLM calls, one HTTP connection pool, and the in-memory tool cache, so a fetch shared by several topics is only made once. A failing topic doesn't stop the others.
+
+    Args:
+        topics (list[str]): Topics to research, duplicates are researched once.
+        workers (int, optional): Number of topics researched at the same time. Defaults to 4.
+        llm_concurrency (int | None, optional): Global budget of in-flight LLM calls, None means unlimited. Defaults to 8.
+        refresh (bool, optional): If True, previously researched topics are refreshed instead of researched from scratch. Defaults to False.
+        assistant_kwargs: Keyword arguments for every `ResearchAssistant`.
+
+    Returns:
+        list[dict]: Summary per topic, in the given order, containing "topic", "status" ('success' or 'failed'), "elapsed" seconds and "error".
+    """
+    logger = get_logger('batch')
+    topics = list(dict.fromkeys(topic.strip() for topic in topics if topic.strip()))
+    set_llm_concurrency(llm_concurrency)
+
+    def research(topic: str) -> dict:
+        start = perf_counter()
+
+        try:
+            # an assistant per topic keeps the runs independent
+            assistant = ResearchAssistant(**assistant_kwargs)
+            state = assistant.refresh(topic) if refresh else assistant.run(topic)
+
+            if state is None:
+                raise RuntimeError('Research failed, check the logs for details.')
+
+            return {'topic': topic, 'status': 'success', 'elapsed': perf_counter() - start, 'error': None}
+
+        except Exception as e:
+            logger.exception(f'Batch research failed for topic "{topic}": {e}')
+            return {'topic': topic, 'status': 'failed', 'elapsed': perf_counter() - start, 'error': str(e)}
+
+    logger.info(f'Starting batch research on {len(topics)} topics with {workers} workers...')
+    start = perf_counter()
+
+    with ThreadPoolExecutor(max_workers= workers, thread_name_prefix= 'research') as pool:
+        summary = list(pool.map(research, topics))
+
+    failed = sum(item['status'] == 'failed' for item in summary)
+    minutes, seconds = divmod(perf_counter() - start, 60)
+    logger.info(f'Batch research finished: {len(summary) - failed} succeeded, {failed} failed, total time taken: {int(minutes)}m {seconds:.2f}s')
+
+    return summary
+
+
+def save_summary(summary: list[dict]) -> str:
+    """Saves the summary of a batch run at `results/batch_<timestamp>.json` and returns its path."""
+    os.makedirs('results', exist_ok= True)
+    path = os.path.join('results', datetime.now().strftime('batch_%Y-%m-%d_%H-%M-%S.json'))
+
+    with open(path, 'w', encoding= 'utf-8') as f:
+        json.dump(summary, f, indent= 2, ensure_ascii= False)
+
+    return path
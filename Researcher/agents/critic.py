@@ -48,53 +48,34 @@ class CriticAgent(BaseAgent):
         super().__init__(
             name= 'critic',
             instructions= prompt,
-            temperature= 0.2
+            temperature= 0.2,
+            cache_responses= True
         )
         self.logger.info('CriticAgent initialized.')
 
 
-    def run(self, state):
-        """Reviews the Writer's output against the knowledge base. Detects hallucinations, unsupported claims, or factual drift. Provides corrective feedback or validates correctness.
+    def criticize(self, knowledge: dict, part: str, *, usage: dict[str, int] | None = None) -> str:
+        """Reviews a single report part against the knowledge base.
 
         Args:
-            state (ResearchState): Current state of the graph.
-
-        Raises:
-            ValueError: If no value for `report_parts` is provided.
+            knowledge (dict): The knowledge base extracted by the `ExtractorAgent`.
+            part (str): Report part written by the `WriterAgent`.
+            usage (dict[str, int] | None, optional): Token usage accumulator, see `BaseAgent._invoke()`. Defaults to None.
 
         Returns:
-            ResearchState: Updated state with `criticism` and `is_criticized`
+            str: "PASS" if the part is valid, otherwise the criticism.
         """
-        self.logger.info('CriticAgent started.')
-        report_parts = state.get('report_parts', None)
-
-        if report_parts is None:
-            self.logger.error('No value for report_parts is provided.')
-            raise ValueError('No value for report_parts is provided.')
-        
-        criticism = {}
-
-        # criticizing each part one-by-one
-        for index, part in enumerate(report_parts):
-            self.logger.info(f'Criticizing part: {index + 1}')
-
-            try:
-                prompt = self.instructions.format_messages(
-                    input_json= state.get('knowledge'), 
-                    writer_output= part
-                )
-                response = self.llm.invoke(prompt).content.strip()
-                criticism[index] = response
-
-                # status printing in log
-                self.logger.info(f'Successfully criticized part {index + 1}, Status: {response if response == 'PASS' else 'FAIL'}')
+        prompt = self.instructions.format_messages(
+            input_json= knowledge, 
+            writer_output= part
+        )
+        return self._invoke(prompt, usage)
 
-            except Exception as e:
-                self.logger.exception(f'Error while criticising part {index + 1}: {e}')
-                return
 
-        self.logger.info('CriticAgent finished.')
-        return {
-            'criticism': criticism,
-            'is_criticized': True
-        }
+    async def acriticize(self, knowledge: dict, part: str, *, usage: dict[str, int] | None = None) -> str:
+        """Async version of `self.criticize()`."""
+        prompt = self.instructions.format_messages(
+            input_json= knowledge, 
+            writer_output= part
+        )
+        return await self._ainvoke(prompt, usage)
@@ -1,8 +1,10 @@
-import json
+import inspect
+from typing import Any, AsyncIterator, Callable, Iterator
 from langchain_core.prompts import ChatPromptTemplate
 
-from agents import BaseAgent
-from utils import get_logger
+from agents import BaseAgent, ResearchState
+from config import DEDUP_DOCUMENTS, DEDUP_MAX_DISTANCE, PROMPT_DOCS_MAX_CHARS
+from utils import get_logger, span, annotate, llm_slot, allm_slot, deduplicate_documents, select_passages, TopicStreamParser, parse_json, validate_knowledge
 
 
 class ExtractorAgent(BaseAgent):
@@ -77,11 +79,215 @@ class ExtractorAgent(BaseAgent):
         super().__init__(
             name= 'extractor',
             instructions= prompt,
-            temperature= 0.0
+            temperature= 0.0,
+            cache_responses= True,
+            # token usage of the streamed response, for the run traces
+            stream_usage= True
         )
         self.logger.info('ExtractorAgent initialized.')
 
 
+    def combine_docs(self, state: ResearchState) -> str:
+        """Combines the Wikipedia and arXiv documents, removing near-duplicate passages across them (see `utils.deduplicate_documents`), then keeps only the passages most relevant to the topic within `config.PROMPT_DOCS_MAX_CHARS` (see `utils.select_passages`).
+
+        Args:
+            state (ResearchState): Current state of the graph.
+
+        Returns:
+            str: The combined documents.
+        """
+        docs = state.get('wikipedia_docs', '') + state.get('arxiv_docs', '')
+        self.logger.info('Combined the Wikipedia and arXiv documents.')
+
+        if DEDUP_DOCUMENTS:
+            docs, stats = deduplicate_documents(docs, max_distance= DEDUP_MAX_DISTANCE)
+            saved = stats['bytes_before'] - stats['bytes_after']
+            self.logger.info(
+                f'Deduplicated documents: removed {stats['removed']}/{stats['passages']} passages, '
+                f'{saved} bytes ({saved / max(1, stats['bytes_before']):.1%} of the prompt documents).'
+            )
+
+        docs, stats = select_passages(docs, state.get('topic', ''), PROMPT_DOCS_MAX_CHARS)
+        self.logger.info(
+            f'Selected {stats['selected']}/{stats['passages']} passages by relevance, '
+            f'{stats['chars_before']} -> {stats['chars_after']} characters.'
+        )
+        return docs
+
+
+    def _parse_knowledge(self, topic: str, response: str, streamed_topics: list[dict]) -> dict[str, Any]:
+        """Parses the full response, repairing it locally if it is fenced or truncated, and validates it against the knowledge schema.
+
+        Args:
+            topic (str): Topic of the report.
+            response (str): The full LLM response.
+            streamed_topics (list[dict]): Topics parsed while streaming.
+
+        Raises:
+            ValueError: If the response can't be parsed and no topic was streamed.
+
+        Returns:
+            dict[str, Any]: The knowledge base.
+        """
+        self.logger.info('LLM response received.')
+
+        try:
+            knowledge = parse_json(response)
+
+        # `json.JSONDecodeError` is a `ValueError` too, which is raised for valid JSON that isn't an object
+        except ValueError as e:
+            self.logger.error(f'Failed to parse LLM output as a JSON object, even after repairing: {e}')
+            self.logger.debug(f'Raw LLM output:\n{response}')
+
+            if not streamed_topics:
+                raise ValueError(f'Could not extract knowledge for topic "{topic}".') from e
+
+            # salvaging the topics that were completely streamed
+            knowledge = {'topic': topic, 'topics': streamed_topics}
+
+        # keeping the topics already handed to `on_topic`, so downstream indices stay consistent
+        if len(streamed_topics) > len(knowledge.get('topics') or []):
+            knowledge['topics'] = streamed_topics
+
+        for error in validate_knowledge(knowledge):
+            self.logger.warning(f'Knowledge schema violation: {error}')
+
+        # defaults for the fields required by the AssemblerAgent
+        knowledge.setdefault('topic', topic)
+        for key in ('sources', 'topics'):
+            knowledge.setdefault(key, [])
+
+        for key in ('abstract', 'conclusion'):
+            knowledge.setdefault(key, '')
+
+        return knowledge
+
+
+    def _cache_knowledge(self, key: str | None, response: str) -> None:
+        """Stores the extraction response in the LLM response cache, unless it is malformed (a salvaged response is not worth replaying)."""
+        if key is None:
+            return
+
+        try:
+            parse_json(response)
+
+        except ValueError:
+            return
+
+        self._cache_response(key, response)
+
+
+    def extract(
+            self, 
+            topic: str, 
+            docs: str, 
+            *, 
+            on_topic: Callable[[int, dict, dict], None] | None = None
+        ) -> dict[str, Any]:
+        """Streams the knowledge base from the LLM. Topics are parsed incrementally as the response arrives and passed to `on_topic` as soon as each one is complete, so downstream work can start before extraction finishes. The full response is then parsed, repaired locally if it is fenced or truncated, and validated against the knowledge schema. A response from the LLM response cache is replayed through the same path.
+
+        Args:
+            topic (str): Topic of the report.
+            docs (str): Combined documents.
+            on_topic (Callable[[int, dict, dict], None] | None, optional): Called with the index and the object of every completed topic, and the other root level values parsed so far ("sources" precedes "topics" in the schema, so it is usually complete). Defaults to None.
+
+        Raises:
+            ValueError: If the response can't be parsed and no topic was streamed.
+
+        Returns:
+            dict[str, Any]: The knowledge base.
+        """
+        messages = self.instructions.format_messages(topic= topic, docs= docs)
+        key, cached = self._cached_response(messages)
+        parser = TopicStreamParser()
+        streamed_topics = []
+        stream_usage = {}
+
+        def chunks() -> Iterator[str]:
+            if cached is not None:
+                self.logger.info('Replaying the knowledge base from the LLM response cache.')
+                yield cached
+                return
+
+            with llm_slot():
+                for chunk in self.llm.stream(messages):
+                    stream_usage.update(chunk.usage_metadata or {})
+                    yield chunk.content
+
+        with span('llm', self.name, model= self.model):
+            for chunk in chunks():
+                for completed in parser.feed(chunk):
+                    self.logger.info(f'Extracted topic [{len(streamed_topics) + 1}]: {completed.get('title', 'Untitled')}')
+
+                    if on_topic is not None:
+                        on_topic(len(streamed_topics), completed, parser.values)
+
+                    streamed_topics.append(completed)
+
+            if cached is not None:
+                annotate(cache_hit= True)
+            else:
+                self._record_usage(stream_usage, None)
+
+        knowledge = self._parse_knowledge(topic, parser.buffer.strip(), streamed_topics)
+
+        if cached is None:
+            self._cache_knowledge(key, parser.buffer.strip())
+
+        return knowledge
+
+
+    async def aextract(
+            self, 
+            topic: str, 
+            docs: str, 
+            *, 
+            on_topic: Callable[[int, dict, dict], Any] | None = None
+        ) -> dict[str, Any]:
+        """Async version of `self.extract()`, using `self.llm.astream`. `on_topic` may be a plain function or a coroutine function."""
+        messages = self.instructions.format_messages(topic= topic, docs= docs)
+        key, cached = self._cached_response(messages)
+        parser = TopicStreamParser()
+        streamed_topics = []
+        stream_usage = {}
+
+        async def chunks() -> AsyncIterator[str]:
+            if cached is not None:
+                self.logger.info('Replaying the knowledge base from the LLM response cache.')
+                yield cached
+                return
+
+            async with allm_slot():
+                async for chunk in self.llm.astream(messages):
+                    stream_usage.update(chunk.usage_metadata or {})
+                    yield chunk.content
+
+        with span('llm', self.name, model= self.model):
+            async for chunk in chunks():
+                for completed in parser.feed(chunk):
+                    self.logger.info(f'Extracted topic [{len(streamed_topics) + 1}]: {completed.get('title', 'Untitled')}')
+
+                    if on_topic is not None:
+                        result = on_topic(len(streamed_topics), completed, parser.values)
+
+                        if inspect.isawaitable(result):
+                            await result
+
+                    streamed_topics.append(completed)
+
+            if cached is not None:
+                annotate(cache_hit= True)
+            else:
+                self._record_usage(stream_usage, None)
+
+        knowledge = self._parse_knowledge(topic, parser.buffer.strip(), streamed_topics)
+
+        if cached is None:
+            self._cache_knowledge(key, parser.buffer.strip())
+
+        return knowledge
+
+
     def run(self, state):
         """Processes the raw sources and converts them into a structured **knowledge base (JSON format)**.
 
@@ -94,22 +300,31 @@ class ExtractorAgent(BaseAgent):
         topic = state.get('topic')
         self.logger.info(f'Starting extraction for topic: "{topic}"')
 
-        docs = state.get('wikipedia_docs', '') + state.get('arxiv_docs', '')
-        self.logger.info('Combined the Wikipedia and arXiv documents.')
+        docs = self.combine_docs(state)
 
-        try:
-            self.logger.info('Extracting...')
-            response = self.llm.invoke(
-                self.instructions.format_messages(topic= topic, docs= docs)
-            ).content.strip()
-            self.logger.info('LLM response received.')
-
-            # parsing json
-            knowledge = json.loads(response)
-            self.logger.info(f'Successfully parsed knowledge JSON for topic "{topic}"')
-
-        except json.JSONDecodeError as e:
-            self.logger.error(f'Failed to parse LLM output as JSON: {e}')
-            self.logger.debug(f'Raw LLM output:\n{response}')
+        self.logger.info('Extracting...')
+        knowledge = self.extract(topic, docs)
+        self.logger.info(f'Successfully parsed knowledge JSON for topic "{topic}"')
+
+        return {'knowledge': knowledge}
+
+
+    async def arun(self, state):
+        """Async version of `run()`.
+
+        Args:
+            state (ResearchState): Current state of the graph.
+
+        Returns:
+            ResearchState: Updated state with `knowledge`.
+        """
+        topic = state.get('topic')
+        self.logger.info(f'Starting extraction for topic: "{topic}"')
+
+        docs = self.combine_docs(state)
+
+        self.logger.info('Extracting...')
+        knowledge = await self.aextract(topic, docs)
+        self.logger.info(f'Successfully parsed knowledge JSON for topic "{topic}"')
 
         return {'knowledge': knowledge}
@@ -1,19 +1,46 @@
+import re
+import asyncio
+from datetime import datetime
 from time import perf_counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph
+from langgraph.types import Send
 
 from agents import (
     ResearchState, 
+    SectionState,
     SearcherAgent, 
     ExtractorAgent, 
     WriterAgent, 
     CriticAgent, 
     AssemblerAgent
 )
-from utils import get_logger, save_state, sanitize_filename
+from config import MAX_REWRITE_ITERATIONS, SECTION_TOKEN_BUDGET, REPORT_FORMATS
+from tools import arxiv_tool, google_news_tool
+from utils import (
+    get_logger,
+    save_state,
+    load_state,
+    get_archive,
+    Tracer,
+    tracing,
+    traced,
+    propagate,
+    save_trace
+)
 
 
 class ResearchAssistant:
-    def __init__(self):
+    def __init__(
+            self, 
+            *, 
+            max_concurrency: int | None = None,
+            max_iterations: int = MAX_REWRITE_ITERATIONS,
+            token_budget: int | None = SECTION_TOKEN_BUDGET,
+            streaming: bool = False,
+            formats: tuple[str, ...] = REPORT_FORMATS
+        ):
         """
         Orchestrates the end-to-end research pipeline using multiple agents.
 
@@ -22,55 +49,81 @@ class ResearchAssistant:
             - ExtractorAgent: Extracts and structures knowledge from the collected documents.
             - WriterAgent: Expands extracted knowledge into report sections.
             - CriticAgent: Reviews report sections and provides feedback for rewriting if needed.
-            - AssemblerAgent: Assembles all validated parts into a final PDF report.
+            - AssemblerAgent: Assembles all validated parts into the final report (PDF, Markdown, HTML and/or JSON).
 
         Initializes the ResearchAssistant by:
             - Creating agent instances.
-            - Defining a StateGraph workflow with nodes and conditional edges.
+            - Defining a StateGraph workflow with nodes and a fan-out/fan-in over the knowledge topics.
             - Setting entry, finish points, and conditional routing logic.
             - Compiling the graph into an executable pipeline.
 
+        ## Graph:
+            searcher -> extractor -> section (one per topic, in parallel) -> merge -> assembler
+
+        Every "section" is an independent write -> critique -> rewrite loop for a single topic, sent with LangGraph `Send`. A topic never waits for the other topics between its own steps, e.g. a topic that passes review is finished while others are still being rewritten. The sections are reduced back into `report_parts` by the "merge" node.
+
+        ## Streaming Graph (`streaming=True`):
+            searcher -> extract_and_write -> merge -> assembler
+
+        Extraction and writing overlap like the stages of a CPU pipeline: every topic is handed to a section worker as soon as the extractor has streamed it, so sections are written and criticized while the remaining topics are still being extracted. The end-to-end time approaches that of the slowest stage, rather than the sum of all stages.
+
         The pipeline ensures research reports are accurate, complete, and properly formatted.
+
+        Args:
+            max_concurrency (int | None, optional): Maximum number of graph nodes (i.e. sections) executing at the same time. None means LangGraph's default. Defaults to None.
+            max_iterations (int, optional): Maximum number of rewrites per section. Defaults to `config.MAX_REWRITE_ITERATIONS`.
+            token_budget (int | None, optional): Maximum tokens a section may use before it stops being rewritten, None means no budget. Defaults to `config.SECTION_TOKEN_BUDGET`.
+            streaming (bool, optional): If True, builds the streaming graph where writing starts on the first extracted topics. Defaults to False.
+            formats (tuple[str, ...], optional): Output formats of the report, see `AssemblerAgent`. Defaults to `config.REPORT_FORMATS`.
         """
         self.logger = get_logger(self.__class__.__name__)
+        self.max_concurrency = max_concurrency
+        self.max_iterations = max_iterations
+        self.token_budget = token_budget
+        self.streaming = streaming
 
         # initializing agents
         searcher = SearcherAgent()
-        extractor = ExtractorAgent()
-        writer = WriterAgent()
-        critic = CriticAgent()
-        assembler = AssemblerAgent()
+        self.extractor = extractor = ExtractorAgent()
+        self.writer = WriterAgent()
+        self.critic = CriticAgent()
+        self.assembler = assembler = AssemblerAgent(formats= formats)
 
         # building graph
         builder = StateGraph(ResearchState)
 
-        # adding nodes
-        builder.add_node(searcher.name, searcher.run)
-        builder.add_node(extractor.name, extractor.run)
-        builder.add_node(writer.name, writer.run)
-        builder.add_node(critic.name, critic.run)
-        builder.add_node('assembler', assembler.create_final_pdf)
+        # adding nodes, with both sync and async implementations, so the graph works with `invoke` and `ainvoke`
+        # every node records a span in the trace of the run (see `utils.tracing`)
+        def node(name: str, func, afunc= None):
+            if afunc is None:
+                return traced('node', name)(func)
+
+            return RunnableLambda(traced('node', name)(func), afunc= traced('node', name)(afunc))
 
-        # adding edges and coditional edges
+        builder.add_node(searcher.name, node(searcher.name, searcher.run, searcher.arun))
+        builder.add_node('merge', node('merge', self._merge_sections))
+        builder.add_node('assembler', node('assembler', assembler.create_report))
         builder.set_entry_point(searcher.name)
-        builder.add_edge(searcher.name, extractor.name)
-        builder.add_edge(extractor.name, writer.name)
-        builder.add_conditional_edges(
-            writer.name,
-            self._criticize_con,
-            {
-                True: 'assembler',
-                False: critic.name
-            }
-        )
-        builder.add_conditional_edges(
-            critic.name,
-            self._pass_fail,
-            {
-                'pass': 'assembler',
-                'fail': writer.name
-            }
-        )
+
+        if streaming:
+            builder.add_node('extract_and_write', node('extract_and_write', self._extract_and_write, self._aextract_and_write))
+            builder.add_edge(searcher.name, 'extract_and_write')
+            builder.add_edge('extract_and_write', 'merge')
+
+        else:
+            builder.add_node(extractor.name, node(extractor.name, extractor.run, extractor.arun))
+            builder.add_node('section', node('section', self._write_section, self._awrite_section))
+
+            # adding edges and coditional edges
+            builder.add_edge(searcher.name, extractor.name)
+            builder.add_conditional_edges(
+                extractor.name,
+                self._fan_out_topics,
+                ['section', 'merge']
+            )
+            builder.add_edge('section', 'merge')
+
+        builder.add_edge('merge', 'assembler')
         builder.set_finish_point('assembler')
 
         # compiling grahp
@@ -78,50 +131,260 @@ class ResearchAssistant:
         self.logger.info('Graph compilation successfull, ResearchAssistant Initialized.')
 
 
-    def _criticize_con(self, state: ResearchState) -> bool:
+    def _fan_out_topics(self, state: ResearchState) -> list[Send] | str:
         """
-        Determines whether the workflow should proceed to the CriticAgent or directly to the AssemblerAgent.
+        Sends every topic of the knowledge base to its own "section" sub-pipeline.
 
         Args:
             state (ResearchState): Current state of the graph.
 
         Returns:
-            bool: 
-                - True -> WriterAgent successfully applied criticism and the report can proceed to assembly.
-                - False -> Report expansion finished but requires criticism.
+            list[Send] | str: One `Send` per topic, or 'merge' if there are no topics.
         """
-        is_criticized = state.get('is_criticized', False)
+        knowledge = state.get('knowledge') or {}
+        topics = knowledge.get('topics', [])
 
-        if is_criticized:
-            self.logger.info('Based on the criticism, rewriting was successfull. Next Node: AssemblerAgent.')
+        if not topics:
+            self.logger.warning('No topics found in the knowledge base. Next Node: merge.')
+            return 'merge'
 
-        else:
-            self.logger.info('Expanding was successfull. Next Node: CriticAgent')
+        self.logger.info(f'Sending {len(topics)} topics to the section sub-pipelines.')
+        return [
+            Send('section', {'index': index, 'topic': topic, 'knowledge': knowledge})
+            for index, topic in enumerate(topics)
+        ]
 
-        return is_criticized
 
+    def _review_outcome(self, index: int, criticism: str, iterations: int, usage: dict[str, int]) -> str | None:
+        """
+        Decides what happens to a section after a review, shared by `self._write_section()` and `self._awrite_section()`. The section is rewritten until it passes, reaches `self.max_iterations` rewrites, or has used up `self.token_budget` tokens. Every rewrite is reviewed, so the last criticism is always that of the returned text.
+
+        Args:
+            index (int): Index of the topic.
+            criticism (str): Criticism of the current text, "PASS" if it passed.
+            iterations (int): Number of rewrites so far.
+            usage (dict[str, int]): Token usage of the section so far.
 
-    def _pass_fail(self, state: ResearchState) -> str:
+        Returns:
+            str | None: The final status, 'passed', 'token_budget' or 'max_iterations', or None if the section is rewritten.
         """
-        Evaluates the outcome of the CriticAgent and decides whether to send the report back for rewriting or proceed to final assembly.
+        if criticism == 'PASS':
+            self.logger.info(f'Topic [{index + 1}] passed the critic after {iterations} rewrites.')
+            return 'passed'
+
+        if self.token_budget is not None and usage['tokens'] >= self.token_budget:
+            self.logger.warning(f'Topic [{index + 1}] used its token budget ({usage['tokens']} tokens), keeping the current text.')
+            return 'token_budget'
+
+        # `max_iterations= 0` means no rewrite at all
+        if iterations >= self.max_iterations:
+            self.logger.info(f'Topic [{index + 1}] reached the max of {self.max_iterations} rewrites.')
+            return 'max_iterations'
+
+        self.logger.info(f'Topic [{index + 1}] failed the critic, rewriting.')
+        return None
+
+
+    @staticmethod
+    def _section_update(index: int, text: str, criticism: str, iterations: int, usage: dict[str, int], status: str) -> ResearchState:
+        return {
+            'sections': [{
+                'index': index, 
+                'text': text, 
+                'criticism': criticism,
+                'iterations': iterations,
+                'tokens': usage['tokens'],
+                'status': status
+            }]
+        }
+
+
+    def _write_section(self, state: SectionState) -> ResearchState:
+        """
+        Write -> critique -> rewrite sub-pipeline for a single topic. Runs in parallel with the sub-pipelines of the other topics.
+
+        Only this section is re-critiqued after a rewrite, and the loop stops as decided by `self._review_outcome()`: as soon as the section passes, reaches `self.max_iterations` rewrites, or has used up `self.token_budget` tokens.
+
+        Args:
+            state (SectionState): Index, topic and the full knowledge base.
+
+        Returns:
+            ResearchState: Update with a single entry for `sections`, containing:
+                - index (int): Index of the topic.
+                - text (str): The final written section.
+                - criticism (str): The criticism of the final section, "PASS" if it passed.
+                - iterations (int): Number of rewrites.
+                - tokens (int): Total tokens used by the section.
+                - status (str): 'passed', 'max_iterations', 'token_budget' or 'error'.
+        """
+        index = state['index']
+        topic = state['topic']
+        title = topic.get('title', f'Untitled-{index}')
+
+        usage = {'tokens': 0}
+        text, criticism, iterations, status = '', '', 0, 'error'
+
+        try:
+            self.logger.info(f'Expanding topic [{index + 1}]: {title}')
+            text = self.writer.write_topic(topic, usage= usage)
+
+            while True:
+                self.logger.info(f'Criticizing topic [{index + 1}] (iteration {iterations}): {title}')
+                criticism = self.critic.criticize(state['knowledge'], text, usage= usage)
+
+                outcome = self._review_outcome(index, criticism, iterations, usage)
+
+                if outcome is not None:
+                    status = outcome
+                    break
+
+                text = self.writer.write_topic(topic, criticism= criticism, prev_response= text, usage= usage)
+                iterations += 1
+
+            self.logger.info(f'Section [{index + 1}] finished ({status}, {usage['tokens']} tokens): {title}')
+
+        except Exception as e:
+            self.logger.exception(f'Error while writing section [{index + 1}] {title}: {e}')
+
+        return self._section_update(index, text, criticism, iterations, usage, status)
+
+
+    async def _awrite_section(self, state: SectionState) -> ResearchState:
+        """Async version of `self._write_section()`, with the same loop and budget."""
+        index = state['index']
+        topic = state['topic']
+        title = topic.get('title', f'Untitled-{index}')
+
+        usage = {'tokens': 0}
+        text, criticism, iterations, status = '', '', 0, 'error'
+
+        try:
+            self.logger.info(f'Expanding topic [{index + 1}]: {title}')
+            text = await self.writer.awrite_topic(topic, usage= usage)
+
+            while True:
+                self.logger.info(f'Criticizing topic [{index + 1}] (iteration {iterations}): {title}')
+                criticism = await self.critic.acriticize(state['knowledge'], text, usage= usage)
+
+                outcome = self._review_outcome(index, criticism, iterations, usage)
+
+                if outcome is not None:
+                    status = outcome
+                    break
+
+                text = await self.writer.awrite_topic(topic, criticism= criticism, prev_response= text, usage= usage)
+                iterations += 1
+
+            self.logger.info(f'Section [{index + 1}] finished ({status}, {usage['tokens']} tokens): {title}')
+
+        except Exception as e:
+            self.logger.exception(f'Error while writing section [{index + 1}] {title}: {e}')
+
+        return self._section_update(index, text, criticism, iterations, usage, status)
+
+
+    def _extract_and_write(self, state: ResearchState) -> ResearchState:
+        """
+        Streaming replacement for the "extractor" and "section" nodes. Every topic streamed by `ExtractorAgent.extract()` is immediately submitted to a pool of section workers, each running the same write -> critique -> rewrite loop as `self._write_section()`.
+
+        The full knowledge base doesn't exist yet when a streamed topic is criticized, so its critic only sees the topic itself and the sources, which are streamed before the topics. This is also the only part of the knowledge base its section is written from.
 
         Args:
             state (ResearchState): Current state of the graph.
 
         Returns:
-            str:
-                - 'fail' -> One or more report parts failed review, reroute to WriterAgent for rewriting.
-                - 'pass' -> All report parts passed review, proceed to AssemblerAgent.
-        """
-        for criticism in state.get('criticism').values():
-            if criticism != 'PASS':
-                self.logger.info('One or more report parts failed critic. Next Node: WriterAgent.')
-                return 'fail'
-        
-        self.logger.info('All the report parts passed the critic, skipping rewriting. Next Node: AssemblerAgent.')
-        return 'pass'
+            ResearchState: Updated state with `knowledge` and `sections`.
+        """
+        topic = state.get('topic')
+        docs = self.extractor.combine_docs(state)
+        futures: list[Future] = []
+
+        with ThreadPoolExecutor(max_workers= self.max_concurrency or 4, thread_name_prefix= 'section') as pool:
+            def submit(index: int, topic_object: dict, knowledge: dict) -> None:
+                self.logger.info(f'Topic [{index + 1}] streamed, starting its section worker.')
+                futures.append(pool.submit(
+                    # keeping the trace of the run in the worker threads
+                    propagate(self._write_section), 
+                    {'index': index, 'topic': topic_object, 'knowledge': knowledge}
+                ))
+
+            self.logger.info(f'Starting streaming extraction for topic: "{topic}"')
+            knowledge = self.extractor.extract(
+                topic, 
+                docs, 
+                on_topic= lambda index, topic_object, values: submit(index, topic_object, {'topic': topic, 'sources': values.get('sources', []), 'topics': [topic_object]})
+            )
+            self.logger.info(f'Extraction finished, {len(futures)} sections already started.')
+
+            # topics that could only be recovered from the full response
+            for index, topic_object in enumerate(knowledge['topics'][len(futures):], start= len(futures)):
+                submit(index, topic_object, knowledge)
+
+            sections = [section for future in futures for section in future.result()['sections']]
+
+        return {'knowledge': knowledge, 'sections': sections}
+
+
+    async def _aextract_and_write(self, state: ResearchState) -> ResearchState:
+        """Async version of `self._extract_and_write()`, every streamed topic starts a section task on the event loop instead of a worker thread."""
+        topic = state.get('topic')
+        docs = self.extractor.combine_docs(state)
+        tasks: list[asyncio.Task] = []
+
+        def submit(index: int, topic_object: dict, knowledge: dict) -> None:
+            self.logger.info(f'Topic [{index + 1}] streamed, starting its section task.')
+            tasks.append(asyncio.create_task(
+                self._awrite_section({'index': index, 'topic': topic_object, 'knowledge': knowledge})
+            ))
+
+        self.logger.info(f'Starting streaming extraction for topic: "{topic}"')
+        knowledge = await self.extractor.aextract(
+            topic, 
+            docs, 
+            on_topic= lambda index, topic_object, values: submit(index, topic_object, {'topic': topic, 'sources': values.get('sources', []), 'topics': [topic_object]})
+        )
+        self.logger.info(f'Extraction finished, {len(tasks)} sections already started.')
+
+        # topics that could only be recovered from the full response
+        for index, topic_object in enumerate(knowledge['topics'][len(tasks):], start= len(tasks)):
+            submit(index, topic_object, knowledge)
+
+        sections = [section for result in await asyncio.gather(*tasks) for section in result['sections']]
+        return {'knowledge': knowledge, 'sections': sections}
+
+
+    def _merge_sections(self, state: ResearchState) -> ResearchState:
+        """
+        Reduces the sections written in parallel back into the ordered `report_parts`.
+
+        Args:
+            state (ResearchState): Current state of the graph.
+
+        Returns:
+            ResearchState: Updated state with `report_parts`, `criticism` and `is_criticized`.
+        """
+        sections = sorted(state.get('sections', []), key= lambda section: section['index'])
+        total_tokens = sum(section.get('tokens', 0) for section in sections)
+        self.logger.info(f'Merged {len(sections)} sections ({total_tokens} tokens). Next Node: AssemblerAgent.')
+
+        return {
+            'report_parts': [section['text'] for section in sections],
+            'criticism': {section['index']: section['criticism'] for section in sections},
+            'is_criticized': True
+        }
     
 
+    def _save_state(self, state: ResearchState, topic: str, tracer: Tracer | None = None) -> str:
+        """Saves a complete state and indexes it in the research archive (see `utils.get_archive`), and the trace of the run next to it. Returns the directory of the stored state."""
+        path = save_state(state, topic= topic)
+        get_archive().add(state)
+
+        if tracer is not None:
+            save_trace(tracer, path)
+
+        return path
+
+
     def run(self, user_input: str) -> ResearchState:
         """
         Executes the full research pipeline for a given topic.
@@ -139,27 +402,247 @@ class ResearchAssistant:
             ResearchState: Final state containing the complete research report and metadata.
         """
         self.logger.info(f'Starting research on topic "{user_input}"...')
-        try:
-            # invoking graph and starting performance counter
+        with tracing(user_input) as tracer:
+            try:
+                # invoking graph and starting performance counter
+                start = perf_counter()
+                state = {'topic': user_input}
+                state = self.graph.invoke(state, config= {'max_concurrency': self.max_concurrency})
+                state['updated_at'] = datetime.now().isoformat(timespec= 'seconds')
+                end = perf_counter()
+
+                # calculating minutes and seconds
+                elapsed = end - start
+                minutes, seconds = divmod(elapsed, 60)
+
+                # saving the final state and the trace of the run
+                path = self._save_state(state, user_input, tracer)
+
+                self.logger.info(f'Total time taken: {int(minutes)}m {seconds:.2f}s')
+                self.logger.info(f'Saved final state of the program at {path}')
+
+                return state
+            
+            except Exception as e:
+                self.logger.exception(f'Error while researching topic {user_input}: {e}')
+
+                path = save_state(self.graph.get_state(), topic= user_input)
+                save_trace(tracer, path)
+                self.logger.info(f'Saved current state of the program at {path}')
+
+
+    async def arun(self, user_input: str) -> ResearchState:
+        """
+        Async version of `self.run()`, using `graph.ainvoke`. The pipeline doesn't block the event loop, so it can be embedded in an asyncio service, and many topics can be researched concurrently on one thread, e.g. with `asyncio.gather`.
+
+        Args:
+            user_input (str): The research topic to investigate.
+
+        Returns:
+            ResearchState: Final state containing the complete research report and metadata.
+        """
+        self.logger.info(f'Starting research on topic "{user_input}"...')
+        start = perf_counter()
+        state = {'topic': user_input}
+
+        # the tracer lives in the context of this task, so concurrent runs get separate traces
+        with tracing(user_input) as tracer:
+            try:
+                state = await self.graph.ainvoke(state, config= {'max_concurrency': self.max_concurrency})
+                state['updated_at'] = datetime.now().isoformat(timespec= 'seconds')
+
+            except Exception as e:
+                self.logger.exception(f'Error while researching topic {user_input}: {e}')
+                raise
+
+        minutes, seconds = divmod(perf_counter() - start, 60)
+
+        # saving the final state, off the event loop
+        path = await asyncio.to_thread(self._save_state, state, user_input, tracer)
+
+        self.logger.info(f'Total time taken: {int(minutes)}m {seconds:.2f}s')
+        self.logger.info(f'Saved final state of the program at {path}')
+        return state
+
+
+    @staticmethod
+    def _last_run_date(state: ResearchState) -> str:
+        """Date (YYYY-MM-DD) of the run that produced `state`. `load_state` fills in "updated_at" for states that were saved without it."""
+        return state['updated_at'][:10]
+
+
+    @staticmethod
+    def _normalize_title(title: str) -> str:
+        return re.sub(r'[^a-z0-9]+', ' ', title.lower()).strip()
+
+
+    def _merge_knowledge(self, knowledge: dict, new_knowledge: dict) -> list[int]:
+        """
+        Merges a knowledge base extracted from new documents into the previous one, in place. New sources get fresh ids (references are remapped), topics/subtopics with the same title are merged, and the rest are appended.
+
+        Args:
+            knowledge (dict): Previous knowledge base, updated in place.
+            new_knowledge (dict): Knowledge base extracted from the new documents only.
+
+        Returns:
+            list[int]: Indices of the topics in `knowledge['topics']` that were changed or added.
+        """
+        sources = knowledge.setdefault('sources', [])
+        topics = knowledge.setdefault('topics', [])
+        next_id = max((source['id'] for source in sources), default= 0) + 1
+
+        # remapping ids of the new sources after the previous ones
+        id_map = {}
+        for source in new_knowledge.get('sources', []):
+            id_map[source['id']] = next_id
+            sources.append({**source, 'id': next_id})
+            next_id += 1
+
+        def remap(node: dict) -> dict:
+            return {**node, 'references': [id_map.get(ref, ref) for ref in node.get('references', [])]}
+
+        def merge_node(old: dict, new: dict) -> None:
+            old['summary_points'] = list(dict.fromkeys(old.get('summary_points', []) + new.get('summary_points', [])))
+            old['references'] = list(dict.fromkeys(old.get('references', []) + new.get('references', [])))
+
+        titles = {self._normalize_title(topic.get('title', '')): index for index, topic in enumerate(topics)}
+        affected = []
+
+        for new_topic in new_knowledge.get('topics', []):
+            new_topic = remap(new_topic)
+            index = titles.get(self._normalize_title(new_topic.get('title', '')))
+
+            if index is None:
+                index = len(topics)
+                topic = {**new_topic, 'id': f't{index + 1}', 'subtopics': []}
+                topics.append(topic)
+                titles[self._normalize_title(topic['title'])] = index
+
+            else:
+                topic = topics[index]
+                merge_node(topic, new_topic)
+
+            subtopics = topic.setdefault('subtopics', [])
+            sub_titles = {self._normalize_title(sub.get('title', '')): sub for sub in subtopics}
+
+            for new_subtopic in new_topic.get('subtopics', []):
+                new_subtopic = remap(new_subtopic)
+                subtopic = sub_titles.get(self._normalize_title(new_subtopic.get('title', '')))
+
+                if subtopic is None:
+                    subtopics.append({**new_subtopic, 'id': f'{topic['id']}.{len(subtopics) + 1}'})
+
+                else:
+                    merge_node(subtopic, new_subtopic)
+
+            if index not in affected:
+                affected.append(index)
+
+        return affected
+
+
+    def refresh(self, user_input: str, *, news_window_days: int | None = None) -> ResearchState:
+        """
+        Incrementally refreshes a previously researched topic instead of starting from scratch.
+
+        ## Steps:
+            1. Loads the previous state through `load_state`, falls back to `self.run()` if there is none or it has no knowledge.
+            2. Fetches only the arXiv papers published since the last run, skipping already known sources.
+            3. Fetches the news within the delta window and prepends the unseen ones.
+            4. Extracts knowledge from the new papers only and merges it into the stored `knowledge`.
+            5. Rewrites (and criticizes) only the affected topics, the other report parts are kept.
+            6. Re-assembles the report and saves the state.
+
+        A failed arXiv search is logged as an error and the previous report parts are kept, without moving the last run date forward, so the next refresh searches the same window again.
+
+        Wikipedia articles are not re-fetched, they rarely change in ways that matter for a report.
+
+        Args:
+            user_input (str): The research topic to refresh.
+            news_window_days (int | None, optional): Days of news to fetch. None means the days since the last run. Defaults to None.
+
+        Returns:
+            ResearchState: Refreshed state.
+        """
+        previous = load_state(user_input)
+
+        if previous is None:
+            self.logger.info(f'No previous research on topic "{user_input}", starting from scratch.')
+            return self.run(user_input)
+
+        # e.g. a run that failed before the extraction was saved
+        if not previous.get('knowledge'):
+            self.logger.info(f'Previous research on topic "{user_input}" has no knowledge to build on, starting from scratch.')
+            return self.run(user_input)
+
+        with tracing(user_input) as tracer:
             start = perf_counter()
-            state = {'topic': user_input}
-            state = self.graph.invoke(state)
-            end = perf_counter()
+            state = dict(previous)
+            knowledge = state['knowledge']
+            last_run = self._last_run_date(previous)
+            self.logger.info(f'Refreshing topic "{user_input}", last run on {last_run}.')
 
-            # calculating minutes and seconds
-            elapsed = end - start
-            minutes, seconds = divmod(elapsed, 60)
+            # delta of the news
+            if news_window_days is None:
+                news_window_days = max(1, (datetime.now() - datetime.fromisoformat(last_run)).days)
 
-            # saving the final state
-            save_state(state, topic= user_input)
+            known_urls = {news.get('url') for news in previous.get('news', [])}
+            fresh_news = [news for news in google_news_tool(user_input, period= f'{news_window_days}d') if news.get('url') not in known_urls]
+            state['news'] = (fresh_news + previous.get('news', []))[:20]
+            self.logger.info(f'Found {len(fresh_news)} new news in the last {news_window_days} days.')
 
-            self.logger.info(f'Total time taken: {int(minutes)}m {seconds:.2f}s')
-            self.logger.info(f'Saved final state of the program at .data/{sanitize_filename(user_input)}.json')
+            # delta of the arXiv papers
+            arxiv_failed = False
+            new_docs = arxiv_tool(
+                user_input, 
+                since= last_run, 
+                exclude_titles= [source.get('title', '') for source in knowledge.get('sources', [])]
+            )
 
-            return state
-        
-        except Exception as e:
-            self.logger.exception(f'Error while researching topic {user_input}: {e}')
+            if new_docs.startswith('error:'):
+                # the last run date is kept, so the next refresh searches the same window again
+                self.logger.error(f'{new_docs.removeprefix('error: ')}, keeping the previous report parts, the papers since {last_run} are searched again on the next refresh.')
+                arxiv_failed = True
+
+            elif not new_docs.startswith('Index:'):
+                self.logger.info('No new arXiv papers since the last run, keeping the previous report parts.')
+
+            else:
+                self.logger.info('New arXiv papers found, extracting knowledge from them only...')
+                # same deduplication and passage selection within the prompt budget as a full run
+                docs = self.extractor.combine_docs({'topic': user_input, 'arxiv_docs': new_docs})
+                new_knowledge = self.extractor.extract(user_input, docs)
+                affected = self._merge_knowledge(knowledge, new_knowledge)
+                state['arxiv_docs'] = previous.get('arxiv_docs', '') + new_docs
+                self.logger.info(f'{len(affected)} topics affected by the new papers: {[index + 1 for index in affected]}')
+
+                report_parts = list(previous.get('report_parts', []))
+                report_parts += [''] * (len(knowledge['topics']) - len(report_parts))
+
+                # JSON turns the integer keys into strings
+                criticism = {int(index): critique for index, critique in (previous.get('criticism') or {}).items()}
+
+                with ThreadPoolExecutor(max_workers= self.max_concurrency or 4, thread_name_prefix= 'section') as pool:
+                    futures = [
+                        pool.submit(propagate(self._write_section), {'index': index, 'topic': knowledge['topics'][index], 'knowledge': knowledge})
+                        for index in affected
+                    ]
+                    sections = [section for future in futures for section in future.result()['sections']]
+
+                for section in sections:
+                    report_parts[section['index']] = section['text']
+                    criticism[section['index']] = section['criticism']
+
+                state['report_parts'] = report_parts
+                state['criticism'] = criticism
+                state['sections'] = sections
+
+            if not arxiv_failed:
+                state['updated_at'] = datetime.now().isoformat(timespec= 'seconds')
+
+            self.assembler.create_report(state)
+            self._save_state(state, user_input, tracer)
 
-            save_state(self.graph.get_state(), topic= user_input)
-            self.logger.info(f'Saved current state of the program at .data/{sanitize_filename(user_input)}.json')
+        minutes, seconds = divmod(perf_counter() - start, 60)
+        self.logger.info(f'Total time taken for refreshing: {int(minutes)}m {seconds:.2f}s')
+        return state
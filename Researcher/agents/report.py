@@ -0,0 +1,130 @@
+import os
+import html
+import json
+from time import perf_counter
+from typing import Any, Callable
+from typing_extensions import TypedDict
+from markdown_it import MarkdownIt
+from markdown_pdf import MarkdownPdf, Section
+
+
+class ReportSection(TypedDict):
+    name: str
+    text: str
+    toc: bool
+    css: str | None
+
+
+class Report(TypedDict):
+    """Format independent report model, built once from the `ResearchState` by `AssemblerAgent.build_report()` and rendered by the `RENDERERS`. It is plain data, so it can be sent to worker processes and dumped as JSON."""
+    topic: str
+    meta: dict[str, str]
+    sections: list[ReportSection]
+    knowledge: dict[str, Any]
+    news: list[dict]
+
+
+class RenderContext:
+    def __init__(self, meta: dict[str, str], **convertor_kwargs):
+        """
+        Per-report rendering state: a fresh `MarkdownPdf` and the time taken by every section. A context renders exactly one report, so nothing leaks from one report into the next.
+
+        Args:
+            meta (dict[str, str]): PDF metadata, e.g. "title" and "author".
+            convertor_kwargs: Keyword arguments for `MarkdownPdf`.
+        """
+        self.pdf = MarkdownPdf(**convertor_kwargs)
+        # `MarkdownPdf.meta` is a class attribute shared by every instance, so each report gets its own copy
+        self.pdf.meta = {**MarkdownPdf.meta, **meta}
+        self.timings: dict[str, float] = {}
+
+
+    def add_section(self, name: str, text: str, *, toc: bool = True, css: str | None = None) -> None:
+        """Lays out a markdown section into the document and records its time under `name`."""
+        start = perf_counter()
+        self.pdf.add_section(Section(text, toc= toc), css)
+        self.timings[name] = perf_counter() - start
+
+
+    def save(self, path: str) -> None:
+        start = perf_counter()
+        self.pdf.save(path)
+        self.timings['save'] = perf_counter() - start
+
+
+def _write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok= True)
+
+    with open(path, 'w', encoding= 'utf-8') as f:
+        f.write(content)
+
+
+def render_pdf(report: Report, path: str, convertor_kwargs: dict | None = None) -> dict[str, float]:
+    """
+    Renders the report as a PDF, the slowest format. It is a module level function taking plain data, so reports can be rendered in a process pool (see `AssemblerAgent.render_many()`).
+
+    Args:
+        report (Report): The report.
+        path (str): Path of the PDF.
+        convertor_kwargs (dict | None, optional): Keyword arguments for `MarkdownPdf`. Defaults to None.
+
+    Returns:
+        dict[str, float]: Seconds taken by every section and by saving the PDF.
+    """
+    context = RenderContext(report['meta'], **(convertor_kwargs or {}))
+
+    for section in report['sections']:
+        context.add_section(section['name'], section['text'], toc= section['toc'], css= section['css'])
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok= True)
+    context.save(path)
+    return context.timings
+
+
+def render_markdown(report: Report, path: str) -> dict[str, float]:
+    """Renders the report as a standalone Markdown file."""
+    start = perf_counter()
+    _write(path, '\n\n'.join(section['text'] for section in report['sections']) + '\n')
+    return {'markdown': perf_counter() - start}
+
+
+def render_html(report: Report, path: str) -> dict[str, float]:
+    """Renders the report as a standalone HTML page, with a `<section>` per report section."""
+    start = perf_counter()
+    markdown = MarkdownIt('commonmark').enable('table')
+    css = '\n'.join(dict.fromkeys(section['css'] for section in report['sections'] if section['css']))
+
+    body = '\n'.join(
+        f'<section id="{section['name']}">\n{markdown.render(section['text'])}</section>'
+        for section in report['sections']
+    )
+    page = (
+        '<!DOCTYPE html>\n'
+        '<html lang="en">\n'
+        '<head>\n'
+        '<meta charset="utf-8">\n'
+        f'<meta name="author" content="{html.escape(report['meta'].get('author') or '')}">\n'
+        f'<title>{html.escape(report['meta'].get('title') or report['topic'])}</title>\n'
+        f'<style>{css}</style>\n'
+        '</head>\n'
+        f'<body>\n{body}\n</body>\n'
+        '</html>\n'
+    )
+    _write(path, page)
+    return {'html': perf_counter() - start}
+
+
+def render_json(report: Report, path: str) -> dict[str, float]:
+    """Dumps the report model itself, e.g. for web consumers that render it on their own."""
+    start = perf_counter()
+    _write(path, json.dumps(report, indent= 2, ensure_ascii= False))
+    return {'json': perf_counter() - start}
+
+
+# output format (also the file extension) -> renderer(report, path)
+RENDERERS: dict[str, Callable[..., dict[str, float]]] = {
+    'pdf': render_pdf,
+    'md': render_markdown,
+    'html': render_html,
+    'json': render_json
+}
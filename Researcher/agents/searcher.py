@@ -1,3 +1,4 @@
+import asyncio
 from langchain_core.prompts import ChatPromptTemplate
 
 from tools import wiki_tool, arxiv_tool, google_news_tool
@@ -34,7 +35,8 @@ class SearcherAgent(BaseAgent):
             name= 'searcher',
             instructions= prompt, 
             temperature= 0.0,
-            use_small_model= True
+            use_small_model= True,
+            cache_responses= True
         )
         self.logger.info('SearcherAgent initialized.')
 
@@ -48,14 +50,24 @@ class SearcherAgent(BaseAgent):
         Returns:
             str: Decided source: Wikipedia -> "wiki", arXiv -> "arxiv", Both -> "both"
         """
-        source = self.llm.invoke(
+        source = self._invoke(
             self.instructions.format_messages(topic= topic)
-        ).content.strip().lower()
+        ).lower()
         
         self.logger.info(f'Decided source: {source}')
         return source
 
 
+    async def __adecide_source(self, topic: str) -> str:
+        """Async version of `self.__decide_source()`."""
+        source = (await self._ainvoke(
+            self.instructions.format_messages(topic= topic)
+        )).lower()
+
+        self.logger.info(f'Decided source: {source}')
+        return source
+
+
     def run(self, state):
         """Retrieves relevant Wikipedia articles, arXiv research papers, and recent news using specialized tools.
 
@@ -102,4 +114,47 @@ class SearcherAgent(BaseAgent):
 
         self.logger.info('Successfully loaded the documents.')
         return state
-                
\ No newline at end of file
+
+
+    async def arun(self, state):
+        """Async version of `run()`. The tools are blocking, so they run in worker threads, concurrently with each other.
+
+        Args:
+            state (ResearchState): Current state of the graph.
+
+        Raises:
+            ValueError: If state doesn't contain the value for `topic`.
+
+        Returns:
+            ResearchState: Updated state with `source`, `wikipedia_docs`, `arxiv_docs` and `news`
+        """
+        self.logger.info('SearcherAgent started.')
+
+        topic = state.get('topic', None)
+        if topic is None:
+            self.logger.error('No value for "topic" was provided.')
+            raise ValueError('No value for "topic" was provided.')
+
+        try:
+            source = await self.__adecide_source(topic)
+            state['source'] = source
+
+            # retrieving data based on the decided source, along with the relevant news
+            wiki, arxiv, news = await asyncio.gather(
+                asyncio.to_thread(wiki_tool, topic) if source in ('wiki', 'both') else asyncio.sleep(0, ''),
+                asyncio.to_thread(arxiv_tool, topic) if source in ('arxiv', 'both') else asyncio.sleep(0, ''),
+                asyncio.to_thread(google_news_tool, topic)
+            )
+
+            if source in ('wiki', 'arxiv', 'both'):
+                state['wikipedia_docs'] = wiki
+                state['arxiv_docs'] = arxiv
+
+            state['news'] = news
+            self.logger.info(f'Retrieved recent news on topic: {topic}' if state['news'] != [] else f'No recent news on topic: {topic}')
+
+        except Exception as e:
+            self.logger.exception(f'Error while retrieving documents: {e}')
+
+        self.logger.info('Successfully loaded the documents.')
+        return state
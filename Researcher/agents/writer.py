@@ -1,6 +1,6 @@
 from langchain_core.prompts import ChatPromptTemplate
 
-from agents import BaseAgent, ResearchState
+from agents import BaseAgent
 from utils import get_logger
 
 
@@ -64,109 +64,45 @@ class WriterAgent(BaseAgent):
         self.logger.info('WriterAgent initialized.')
 
 
-    def _expand_topic(self, state: ResearchState) -> list[str]:
-        """Takes `knowledge` from the `state` and explains them one-by-one based on the topic, subtopics, summary points and references.
+    def write_topic(
+            self, 
+            topic: dict, 
+            *, 
+            criticism: str = '', 
+            prev_response: str = '', 
+            usage: dict[str, int] | None = None
+        ) -> str:
+        """Expands a single topic of the knowledge base, or rewrites its previous response if `criticism` is provided.
 
         Args:
-            state (ResearchState): Current state of the graph.
-
-        Raises:
-            ValueError: If no value for `knowledge` was provided in the `state`.
+            topic (dict): Topic from `knowledge['topics']`, including subtopics, summary points and references.
+            criticism (str, optional): Criticism from the `CriticAgent`. Defaults to ''.
+            prev_response (str, optional): Previously written section, rewritten based on `criticism`. Defaults to ''.
+            usage (dict[str, int] | None, optional): Token usage accumulator, see `BaseAgent._invoke()`. Defaults to None.
 
         Returns:
-            list[str]: List of topic-wise explanation.
+            str: The written section in Markdown.
         """
-        knowledge = state.get('knowledge')
-
-        if knowledge is None:
-            self.logger.error('No value for knowledge is provided.')
-            raise ValueError('No value for knowledge is provided.')
-        
-        report_parts = []
-        topics = knowledge.get('topics', [])
-
-        # expanding\explaining topics one-by-one
-        for index, topic in enumerate(topics):
-            title = topic.get('title', f'Untitled-{index}')
-            self.logger.info(f'Expanding topic [{index + 1}]: {title}')
-
-            try:
-                prompt = self.instructions.format_messages(
-                    input_json= topic,
-                    criticism= '',
-                    prev_response= ''
-                )
-                text = self.llm.invoke(prompt).content.strip()
-                report_parts.append(text)
-
-                self.logger.info(f'Successfully expanded topic [{index + 1}]: {title}')
-
-            except Exception as e:
-                self.logger.exception(f'Error while expanding topic [{index + 1}] {title}: {e}')
-                report_parts.append('')
-
-        return report_parts
-    
-
-    def _rewrite_topic(self, state: ResearchState) -> ResearchState:
-        """It rewrites the topics if `CriticAgent` has provided any citicism.
-
-        Args:
-            state (ResearchState): Current state of the graph.
-
-        Returns:
-            ResearchState: Updated state with rewritten `report_parts`
-        """
-        criticisms = state.get('criticism', {})
-        topics = state.get('knowledge', {}).get('topics', [])
-
-        for index, critique in criticisms.items():
-            # if critic agent says that the report part passes 
-            if critique == 'PASS':
-                self.logger.info(f'Topic [{index + 1}] passed without changes.')
-                continue
-
-            title = topics[index].get('title', f'Untitled-{index}')
-            self.logger.info(f'Rewriting topic [{index + 1}]: {title}')
-
-            # if critic agent provided any criticism
-            try:
-                prompt = self.instructions.format_messages(
-                    input_json= topics[index],
-                    criticism= critique,
-                    prev_response= state['report_parts'][index]
-                )
-                text = self.llm.invoke(prompt).content.strip()
-
-                # replacing the previous response with new reponse
-                state['report_parts'][index] = text
-                self.logger.info(f'Successfully rewrote topic [{index + 1}]: {title}')
-
-            except Exception as e:
-                self.logger.exception(f'Error while rewriting topic [{index + 1}] {title}: {e}')
-
-        return state
-        
-
-    def run(self, state):
-        """Expands the structured knowledge into detailed, human-readable sections. Produces coherent paragraphs while maintaining alignment with the knowledge base.
-
-        Args:
-            state (ResearchState): Current state of the graph.
-
-        Returns:
-            ResearchState: Updated state with `report_parts`.
-        """
-        self.logger.info('WriterAgent started.')
-        
-        # for rewritting
-        if state.get('is_criticized', False):
-            updated_state = self._rewrite_topic(state)
-            self.logger.info('WriterAgent finished rewritting.')
-            return updated_state
-
-        # for expanding
-        report_parts = self._expand_topic(state)        
-
-        self.logger.info('WriterAgent finished expanding.')
-        return {'report_parts': report_parts}
+        prompt = self.instructions.format_messages(
+            input_json= topic,
+            criticism= criticism,
+            prev_response= prev_response
+        )
+        return self._invoke(prompt, usage)
+
+
+    async def awrite_topic(
+            self, 
+            topic: dict, 
+            *, 
+            criticism: str = '', 
+            prev_response: str = '', 
+            usage: dict[str, int] | None = None
+        ) -> str:
+        """Async version of `self.write_topic()`."""
+        prompt = self.instructions.format_messages(
+            input_json= topic,
+            criticism= criticism,
+            prev_response= prev_response
+        )
+        return await self._ainvoke(prompt, usage)
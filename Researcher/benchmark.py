@@ -0,0 +1,562 @@
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+from math import ceil
+from datetime import datetime
+from time import perf_counter
+from contextlib import contextmanager, ExitStack
+from typing import Any, AsyncIterator, Callable, Iterator
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+
+import agents.base_agent
+import agents.searcher
+import agents.orchestration
+from agents import ResearchAssistant, RENDERERS, run_batch
+from agents.assembler import load_methodology
+from utils import get_logger, set_llm_concurrency, state_dir, load_state, load_trace, traced
+from utils.caching import DATA_DIR, MANIFEST_NAME
+from utils.clients import _limits, _LoopLocalTransport
+from config import HTTP_TIMEOUT
+from mock_openai import MockOpenAIServer
+import utils.archive
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, the peak RSS is then not reported
+    resource = None
+
+
+# simulated latencies in seconds, before `--latency-scale`, roughly those of the real services
+FIRST_TOKEN_LATENCY = 1.0
+SECONDS_PER_TOKEN = 0.01
+TOOL_LATENCY = {'wiki': 1.0, 'arxiv': 2.0, 'news': 1.0}
+# TCP + TLS setup of a new connection to the API
+HANDSHAKE_LATENCY = 0.15
+
+# HTTP clients of the LLM calls with `--mock-server`, see `mock_server_llm()`
+HTTP_CLIENTS = ('fresh', 'shared', 'shared-h2')
+
+
+def _tokens(text: str) -> int:
+    # ~4 characters per token, close enough for English prose
+    return max(1, len(text) // 4)
+
+
+class FixtureReplay:
+    def __init__(self, fixtures: dict[str, dict]) -> None:
+        """
+        Answers the prompts of every agent from recorded states, so a benchmark run is deterministic: the searcher gets the recorded source, the extractor the recorded knowledge, the writer the recorded report part of the topic, and the critic the recorded criticism. A criticized part is accepted once it was rewritten, so the rewrite loop runs exactly as often as it did in the recorded run.
+
+        Args:
+            fixtures (dict[str, dict]): Recorded states by topic, see `load_fixtures()`.
+        """
+        self.fixtures = fixtures
+        # "'title': <repr of the title>" as it appears in the writer prompt -> report part
+        self.parts: dict[str, str] = {}
+        # report part -> criticism, for the parts that didn't pass review
+        self.criticism: dict[str, str] = {}
+
+        for state in fixtures.values():
+            criticism = {int(index): critique for index, critique in (state.get('criticism') or {}).items()}
+
+            for index, (topic, part) in enumerate(zip(state['knowledge']['topics'], state['report_parts'])):
+                self.parts[f"'title': {topic['title']!r}"] = part.strip()
+
+                if criticism.get(index, 'PASS').strip() != 'PASS':
+                    self.criticism[part.strip()] = criticism[index]
+
+
+    def fixture(self, topic: str) -> dict:
+        """Recorded state of a topic, benchmark copies of a topic ("Calculus #2") share the state of the original."""
+        return self.fixtures[re.sub(r' #\d+$', '', topic)]
+
+
+    def __call__(self, messages: list[BaseMessage]) -> str:
+        system, human = messages[0].content, messages[-1].content
+
+        if 'Router for data retrieval' in system:
+            return self.fixture(human.removeprefix('TOPIC: '))['source']
+
+        if 'knowledge extractor' in system:
+            topic = human.removeprefix('TOPIC: ').split('\n\nDOCUMENTS: ', 1)[0]
+            return json.dumps(self.fixture(topic)['knowledge'], ensure_ascii= False)
+
+        if 'research writer' in system:
+            # the topic title comes before the titles of its subtopics
+            matches = [(human.find(key), part) for key, part in self.parts.items() if key in human]
+            part = min(matches)[1] if matches else '## Untitled\n\nNo recorded section for this topic.'
+            criticism = human.split('\n\nCRITICISM: ', 1)[1].split('\n\nPREVIOUS RESPONSE: ', 1)[0]
+
+            return part + '\n\n_Revised after review._' if criticism.strip() else part
+
+        if 'fact-checker' in system:
+            return self.criticism.get(human.split('\n\nWRITER OUTPUT: ', 1)[1].strip(), 'PASS')
+
+        raise ValueError(f'No recorded response for the prompt: {system[:80]!r}')
+
+
+class FakeChatModel(BaseChatModel):
+    """Drop-in replacement of `ChatOpenAI` answering from a `FixtureReplay`, with simulated latency (time to first token, then time per token) and token usage. It accepts the keyword arguments the agents pass to `ChatOpenAI`."""
+    responder: Callable[[list[BaseMessage]], str]
+    model: str = 'fake'
+    temperature: float = 0.0
+    stream_usage: bool = False
+    http_client: Any = None
+    http_async_client: Any = None
+    first_token_latency: float = FIRST_TOKEN_LATENCY
+    seconds_per_token: float = SECONDS_PER_TOKEN
+    chunk_chars: int = 64
+
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-chat'
+
+
+    def _usage(self, messages: list[BaseMessage], text: str) -> dict[str, int]:
+        prompt_tokens = sum(_tokens(message.content) for message in messages)
+        return {'input_tokens': prompt_tokens, 'output_tokens': _tokens(text), 'total_tokens': prompt_tokens + _tokens(text)}
+
+
+    def _latency(self, text: str) -> float:
+        return self.first_token_latency + _tokens(text) * self.seconds_per_token
+
+
+    def _chunks(self, text: str) -> list[str]:
+        return [text[start:start + self.chunk_chars] for start in range(0, len(text), self.chunk_chars)]
+
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager= None, **kwargs) -> ChatResult:
+        text = self.responder(messages)
+        time.sleep(self._latency(text))
+
+        message = AIMessage(content= text, usage_metadata= self._usage(messages, text))
+        return ChatResult(generations= [ChatGeneration(message= message)])
+
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager= None, **kwargs) -> ChatResult:
+        text = self.responder(messages)
+        await asyncio.sleep(self._latency(text))
+
+        message = AIMessage(content= text, usage_metadata= self._usage(messages, text))
+        return ChatResult(generations= [ChatGeneration(message= message)])
+
+
+    def _stream(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager= None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        text = self.responder(messages)
+        time.sleep(self.first_token_latency)
+
+        for chunk in self._chunks(text):
+            time.sleep(_tokens(chunk) * self.seconds_per_token)
+            yield ChatGenerationChunk(message= AIMessageChunk(content= chunk))
+
+        # like OpenAI with `stream_usage`, the usage comes with a last empty chunk
+        if self.stream_usage:
+            yield ChatGenerationChunk(message= AIMessageChunk(content= '', usage_metadata= self._usage(messages, text)))
+
+
+    async def _astream(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager= None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        text = self.responder(messages)
+        await asyncio.sleep(self.first_token_latency)
+
+        for chunk in self._chunks(text):
+            await asyncio.sleep(_tokens(chunk) * self.seconds_per_token)
+            yield ChatGenerationChunk(message= AIMessageChunk(content= chunk))
+
+        if self.stream_usage:
+            yield ChatGenerationChunk(message= AIMessageChunk(content= '', usage_metadata= self._usage(messages, text)))
+
+
+def load_fixtures() -> dict[str, dict]:
+    """Loads every complete state stored in `data/` (compressed or legacy JSON), by topic."""
+    names = set()
+
+    for entry in os.listdir(DATA_DIR):
+        if os.path.isfile(os.path.join(DATA_DIR, entry, MANIFEST_NAME)):
+            names.add(entry)
+
+        elif entry.endswith('.json'):
+            names.add(entry.removesuffix('.json'))
+
+    fixtures = {}
+    for name in sorted(names):
+        state = load_state(name)
+
+        if state and state.get('knowledge') and state.get('report_parts'):
+            fixtures[state['topic']] = state
+
+    return fixtures
+
+
+@contextmanager
+def mock_server_llm(server: MockOpenAIServer, clients: str) -> Iterator[Callable[..., ChatOpenAI]]:
+    """
+    Factory of real `ChatOpenAI`s sending the LLM calls of the agents to `server`, to measure the HTTP clients. With `clients`:
+        - "fresh": every agent gets its own connection pools, like separate `ChatOpenAI`s each with their own clients.
+        - "shared": the shared pools of `utils.get_http_client()` and `utils.get_http_async_client()`, as the agents use them.
+        - "shared-h2": the shared pools speaking HTTP/2, as they do with the API when `h2` is installed. The API negotiates HTTP/2 over TLS, the mock server has no TLS, so it is used with prior knowledge.
+
+    Args:
+        server (MockOpenAIServer): The running mock server.
+        clients (str): One of `HTTP_CLIENTS`.
+
+    Yields:
+        Callable[..., ChatOpenAI]: Replacement of `ChatOpenAI` for `BaseAgent`, taking the same keyword arguments.
+    """
+    opened: list[httpx.Client] = []
+
+    def pools(**transport_kwargs) -> dict[str, Any]:
+        client = httpx.Client(timeout= HTTP_TIMEOUT, limits= _limits(), **transport_kwargs)
+        opened.append(client)
+        return {
+            'http_client': client,
+            'http_async_client': httpx.AsyncClient(transport= _LoopLocalTransport(limits= _limits(), **transport_kwargs), timeout= HTTP_TIMEOUT)
+        }
+
+    shared_h2 = pools(http1= False, http2= True) if clients == 'shared-h2' else {}
+
+    def llm(**kwargs) -> ChatOpenAI:
+        if clients == 'fresh':
+            kwargs.update(pools())
+
+        elif clients == 'shared-h2':
+            kwargs.update(shared_h2)
+
+        return ChatOpenAI(base_url= server.url, api_key= 'mock', max_retries= 0, **kwargs)
+
+    try:
+        yield llm
+
+    finally:
+        for client in opened:
+            client.close()
+
+
+@contextmanager
+def offline(replay: FixtureReplay, latency_scale: float, llm: Callable[..., BaseChatModel] | None = None) -> Iterator[str]:
+    """
+    Runs the pipeline without network: every agent gets a `FakeChatModel`, and the Wikipedia, arXiv and Google News tools return the recorded documents after a simulated latency. The runs happen in a scratch working directory, so the recorded states in `data/` and the reports in `results/` are never overwritten.
+
+    Args:
+        replay (FixtureReplay): Responses and documents to replay.
+        latency_scale (float): Factor applied to every simulated latency, 0 disables them.
+        llm (Callable[..., BaseChatModel] | None, optional): Replacement of `ChatOpenAI` for the agents, e.g. from `mock_server_llm()`. None means a `FakeChatModel` replaying `replay`. Defaults to None.
+
+    Yields:
+        str: The scratch directory, the current working directory within the `with` block.
+    """
+    def fake_llm(**kwargs) -> FakeChatModel:
+        return FakeChatModel(
+            responder= replay,
+            first_token_latency= FIRST_TOKEN_LATENCY * latency_scale,
+            seconds_per_token= SECONDS_PER_TOKEN * latency_scale,
+            **kwargs
+        )
+
+    def tool(kind: str, field: str) -> Callable:
+        @traced('tool', f'fake_{kind}_tool')
+        def fake_tool(topic: str, *args, **kwargs):
+            time.sleep(TOOL_LATENCY[kind] * latency_scale)
+            return replay.fixture(topic).get(field) or ('' if field.endswith('docs') else [])
+
+        return fake_tool
+
+    patches = [
+        (agents.base_agent, 'ChatOpenAI', llm or fake_llm),
+        (agents.searcher, 'wiki_tool', tool('wiki', 'wikipedia_docs')),
+        (agents.searcher, 'arxiv_tool', tool('arxiv', 'arxiv_docs')),
+        (agents.searcher, 'google_news_tool', tool('news', 'news')),
+        (agents.orchestration, 'arxiv_tool', tool('arxiv', 'arxiv_docs')),
+        (agents.orchestration, 'google_news_tool', tool('news', 'news'))
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+
+    # the methodology is read relative to the repository, before leaving it
+    load_methodology()
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix= 'benchmark_') as workspace:
+        for module, name, value in patches:
+            setattr(module, name, value)
+        os.chdir(workspace)
+
+        try:
+            yield workspace
+
+        finally:
+            os.chdir(cwd)
+            for module, name, value in originals:
+                setattr(module, name, value)
+
+            # the archive of the scratch directory must not outlive it
+            if utils.archive._archive is not None:
+                utils.archive._archive.close()
+                utils.archive._archive = None
+
+
+async def _run_async(topics: list[str], *, workers: int, llm_concurrency: int | None, **assistant_kwargs) -> list[dict]:
+    """Async counterpart of `run_batch()`, researching the topics with `ResearchAssistant.arun()` on one event loop."""
+    set_llm_concurrency(llm_concurrency)
+    semaphore = asyncio.Semaphore(workers)
+
+    async def research(topic: str) -> dict:
+        async with semaphore:
+            start = perf_counter()
+
+            try:
+                await ResearchAssistant(**assistant_kwargs).arun(topic)
+                return {'topic': topic, 'status': 'success', 'elapsed': perf_counter() - start, 'error': None}
+
+            except Exception as e:
+                return {'topic': topic, 'status': 'failed', 'elapsed': perf_counter() - start, 'error': str(e)}
+
+    return await asyncio.gather(*(research(topic) for topic in topics))
+
+
+def _percentile(values: list[float], q: float) -> float:
+    # nearest rank
+    ordered = sorted(values)
+    return ordered[max(0, ceil(q * len(ordered)) - 1)]
+
+
+def _stats(values: list[float]) -> dict[str, float]:
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': _percentile(values, 0.5),
+        'p95': _percentile(values, 0.95),
+        'max': max(values)
+    }
+
+
+def _stage_stats(topics: list[str]) -> dict[str, dict[str, float]]:
+    """Latency of every graph node, LLM call (by agent) and tool call, over the traces of the researched topics."""
+    durations: dict[str, list[float]] = {}
+
+    for topic in topics:
+        trace = load_trace(state_dir(topic))
+
+        for record in (trace or {}).get('spans', []):
+            if record['end'] is not None:
+                durations.setdefault(f'{record['kind']}:{record['name']}', []).append(record['end'] - record['start'])
+
+    return {stage: _stats(values) for stage, values in sorted(durations.items())}
+
+
+def run_benchmark(
+        fixtures: dict[str, dict],
+        *,
+        topics: int | None = None,
+        workers: int = 4,
+        llm_concurrency: int | None = 8,
+        latency_scale: float = 0.05,
+        use_async: bool = False,
+        http_clients: str | None = None,
+        **assistant_kwargs
+    ) -> dict[str, Any]:
+    """
+    Researches the recorded topics end to end through the full graph, offline (see `offline()`), and measures the pipeline itself: per-topic and per-stage latency, throughput, and peak memory.
+
+    Args:
+        fixtures (dict[str, dict]): Recorded states by topic, see `load_fixtures()`.
+        topics (int | None, optional): Number of topics to research, the recorded topics are repeated as "<topic> #2", ... if more are requested. None means every recorded topic once. Defaults to None.
+        workers (int, optional): Topics researched at the same time. Defaults to 4.
+        llm_concurrency (int | None, optional): Global budget of in-flight LLM calls, None means unlimited. Defaults to 8.
+        latency_scale (float, optional): Factor applied to the simulated LLM and tool latencies. Defaults to 0.05.
+        use_async (bool, optional): If True, the topics are researched with `ResearchAssistant.arun()` on an event loop, else with `run_batch()`. Defaults to False.
+        http_clients (str | None, optional): If given, the LLM calls are sent as HTTP requests to a local `MockOpenAIServer` replaying the same responses, with these clients (see `mock_server_llm()`), and the connections opened are reported. None means in-process fake LLMs. Defaults to None.
+        assistant_kwargs: Keyword arguments for every `ResearchAssistant`.
+
+    Returns:
+        dict[str, Any]: The results, containing "config", "wall_seconds", "throughput_per_minute", "topic_latency", "stages", "memory" and "failed", and "http" with `http_clients`.
+    """
+    names = list(fixtures)
+    count = topics or len(names)
+    selected = [names[i % len(names)] + (f' #{i // len(names) + 1}' if i >= len(names) else '') for i in range(count)]
+
+    replay = FixtureReplay(fixtures)
+    server = None
+
+    with ExitStack() as stack:
+        llm = None
+
+        if http_clients is not None:
+            server = stack.enter_context(MockOpenAIServer(
+                replay,
+                first_token_latency= FIRST_TOKEN_LATENCY * latency_scale,
+                seconds_per_token= SECONDS_PER_TOKEN * latency_scale,
+                handshake_latency= HANDSHAKE_LATENCY * latency_scale
+            ))
+            llm = stack.enter_context(mock_server_llm(server, http_clients))
+
+        stack.enter_context(offline(replay, latency_scale, llm))
+        tracemalloc.start()
+        start = perf_counter()
+
+        if use_async:
+            summary = asyncio.run(_run_async(selected, workers= workers, llm_concurrency= llm_concurrency, **assistant_kwargs))
+        else:
+            summary = run_batch(selected, workers= workers, llm_concurrency= llm_concurrency, **assistant_kwargs)
+
+        wall = perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        succeeded = [item for item in summary if item['status'] == 'success']
+        stages = _stage_stats([item['topic'] for item in succeeded])
+
+    memory = {'python_peak_mb': peak / 2**20}
+    if resource is not None:
+        # kilobytes on Linux, bytes on macOS
+        memory['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10)
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec= 'seconds'),
+        'config': {
+            'topics': count,
+            'workers': workers,
+            'llm_concurrency': llm_concurrency,
+            'latency_scale': latency_scale,
+            'async': use_async,
+            'http_clients': http_clients,
+            **{key: list(value) if isinstance(value, tuple) else value for key, value in assistant_kwargs.items()}
+        },
+        'wall_seconds': wall,
+        'throughput_per_minute': len(succeeded) / wall * 60,
+        'topic_latency': _stats([item['elapsed'] for item in succeeded]) if succeeded else {},
+        'stages': stages,
+        'memory': memory,
+        'failed': [item for item in summary if item['status'] == 'failed']
+    }
+
+    if server is not None:
+        stats = server.stats()
+        results['http'] = {**stats, 'connections_per_topic': stats['connections'] / count}
+
+    return results
+
+
+def format_results(results: dict[str, Any]) -> str:
+    lines = [
+        f'{results['config']['topics']} topics, {results['config']['workers']} workers, '
+        f'{'async' if results['config']['async'] else 'sync'}, latency scale {results['config']['latency_scale']}',
+        f'Wall time: {results['wall_seconds']:.2f}s, throughput: {results['throughput_per_minute']:.2f} topics/min, failed: {len(results['failed'])}',
+        'Peak memory: ' + ', '.join(f'{key} {value:.1f}' for key, value in results['memory'].items()),
+        *([f'HTTP ({results['config']['http_clients']} clients): {results['http']['connections']} connections for {results['http']['requests']} requests, {results['http']['connections_per_topic']:.2f} connections per topic'] if 'http' in results else []),
+        '',
+        f'{'stage':<30} {'count':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}'
+    ]
+
+    rows = ([('topic', results['topic_latency'])] if results['topic_latency'] else []) + list(results['stages'].items())
+    for stage, stats in rows:
+        lines.append(f'{stage:<30} {stats['count']:>6} {stats['mean']:>8.3f} {stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['max']:>8.3f}')
+
+    return '\n'.join(lines)
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """
+    Compares the results with a baseline from an earlier run on the same settings.
+
+    Args:
+        results (dict[str, Any]): Results of `run_benchmark()`.
+        baseline (dict[str, Any]): Saved results of an earlier run.
+        tolerance (float): Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list[str]: Descriptions of the regressions, empty if there are none.
+    """
+    regressions = []
+
+    def check(name: str, current: float, previous: float, higher_is_better: bool = False) -> None:
+        if not previous:
+            return
+
+        change = (previous - current if higher_is_better else current - previous) / previous
+        if change > tolerance:
+            regressions.append(f'{name}: {previous:.3f} -> {current:.3f} ({change:+.0%} worse)')
+
+    check('wall_seconds', results['wall_seconds'], baseline['wall_seconds'])
+    check('throughput_per_minute', results['throughput_per_minute'], baseline['throughput_per_minute'], higher_is_better= True)
+    check('topic p95', results['topic_latency'].get('p95', 0), baseline['topic_latency'].get('p95', 0))
+    check('python_peak_mb', results['memory']['python_peak_mb'], baseline['memory']['python_peak_mb'])
+
+    if 'http' in results and 'http' in baseline:
+        check('connections', results['http']['connections'], baseline['http']['connections'])
+
+    for stage, stats in results['stages'].items():
+        if stage.startswith('node:') and stage in baseline['stages']:
+            check(f'{stage} mean', stats['mean'], baseline['stages'][stage]['mean'])
+
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description= 'Offline benchmark of the research pipeline, replaying the states recorded in data/.')
+    parser.add_argument('--topics', type= int, help= 'Number of topics, the recorded topics are repeated if needed. Defaults to every recorded topic once.')
+    parser.add_argument('--workers', type= int, default= 4, help= 'Topics researched at the same time. Defaults to 4.')
+    parser.add_argument('--llm-concurrency', type= int, default= 8, help= 'Global budget of in-flight LLM calls. Defaults to 8.')
+    parser.add_argument('--latency-scale', type= float, default= 0.05, help= 'Factor applied to the simulated LLM and tool latencies, 0 measures the pipeline overhead only. Defaults to 0.05.')
+    parser.add_argument('--async', dest= 'use_async', action= 'store_true', help= 'Research with `ResearchAssistant.arun()` on an event loop instead of worker threads.')
+    parser.add_argument('--streaming', action= 'store_true', help= 'Use the streaming graph, writing sections while the knowledge is extracted.')
+    parser.add_argument('--mock-server', choices= HTTP_CLIENTS, help= 'Send the LLM calls to a local mock OpenAI server with these HTTP clients, and report the connections opened: "fresh" pools per agent, the "shared" pools, or the shared pools over HTTP/2 ("shared-h2"). Defaults to in-process fake LLMs.')
+    parser.add_argument('--formats', nargs= '+', choices= list(RENDERERS), default= ['pdf'], help= 'Output formats of the reports. Defaults to pdf.')
+    parser.add_argument('--output', help= 'Path of the JSON results. Defaults to results/benchmark_<timestamp>.json.')
+    parser.add_argument('--baseline', help= 'JSON results of an earlier run, exit with 1 if this run is slower by more than the tolerance.')
+    parser.add_argument('--tolerance', type= float, default= 0.2, help= 'Allowed relative slowdown against the baseline. Defaults to 0.2.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    logger = get_logger('benchmark')
+    args = parse_args()
+
+    # nothing is sent anywhere, LangSmith would only slow the runs down
+    os.environ['LANGSMITH_TRACING'] = 'false'
+
+    fixtures = load_fixtures()
+    if not fixtures:
+        logger.error(f'No recorded states found in {DATA_DIR}/. Exiting...')
+        sys.exit(1)
+
+    logger.info(f'Benchmarking with {len(fixtures)} recorded topics...')
+    results = run_benchmark(
+        fixtures,
+        topics= args.topics,
+        workers= args.workers,
+        llm_concurrency= args.llm_concurrency,
+        latency_scale= args.latency_scale,
+        use_async= args.use_async,
+        http_clients= args.mock_server,
+        streaming= args.streaming,
+        formats= tuple(args.formats)
+    )
+
+    output = args.output or os.path.join('results', datetime.now().strftime('benchmark_%Y-%m-%d_%H-%M-%S.json'))
+    os.makedirs(os.path.dirname(output) or '.', exist_ok= True)
+    with open(output, 'w', encoding= 'utf-8') as f:
+        json.dump(results, f, indent= 2, ensure_ascii= False)
+
+    print(format_results(results))
+    logger.info(f'Saved the benchmark results at: {output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding= 'utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+        for regression in regressions:
+            logger.error(f'Regression: {regression}')
+
+        sys.exit(1 if regressions else 0)
@@ -1,3 +1,55 @@
-from .settings import DEFAULT_MODEL, SMALL_MODEL, DOC_CONTENT_MAX_CHARS
+from .settings import (
+    DEFAULT_MODEL, 
+    SMALL_MODEL, 
+    DOC_CONTENT_MAX_CHARS,
+    PROMPT_DOCS_MAX_CHARS,
+    ARXIV_REFRESH_CANDIDATES,
+    TOOL_CACHE_TTL,
+    DEDUP_DOCUMENTS,
+    DEDUP_MAX_DISTANCE,
+    MAX_REWRITE_ITERATIONS,
+    SECTION_TOKEN_BUDGET,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_TIMEOUT,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_MB,
+    REPORT_FORMATS,
+    ARCHIVE_PATH,
+    ARCHIVE_MATCH_THRESHOLD,
+    LOG_LEVEL,
+    LOG_QUEUE,
+    LOG_JSON,
+    MODEL_PRICES
+)
 
-__all__ = [DEFAULT_MODEL, SMALL_MODEL, DOC_CONTENT_MAX_CHARS]
+__all__ = [
+    DEFAULT_MODEL, 
+    SMALL_MODEL, 
+    DOC_CONTENT_MAX_CHARS, 
+    PROMPT_DOCS_MAX_CHARS,
+    ARXIV_REFRESH_CANDIDATES,
+    TOOL_CACHE_TTL,
+    DEDUP_DOCUMENTS,
+    DEDUP_MAX_DISTANCE,
+    MAX_REWRITE_ITERATIONS,
+    SECTION_TOKEN_BUDGET,
+    HTTP_MAX_CONNECTIONS, 
+    HTTP_MAX_KEEPALIVE_CONNECTIONS, 
+    HTTP_KEEPALIVE_EXPIRY, 
+    HTTP_TIMEOUT,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_MB,
+    REPORT_FORMATS,
+    ARCHIVE_PATH,
+    ARCHIVE_MATCH_THRESHOLD,
+    LOG_LEVEL,
+    LOG_QUEUE,
+    LOG_JSON,
+    MODEL_PRICES
+]
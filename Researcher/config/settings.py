@@ -1,3 +1,50 @@
 DEFAULT_MODEL = 'gpt-5-mini'
 SMALL_MODEL = 'gpt-4o-mini'
-DOC_CONTENT_MAX_CHARS = 12_000
\ No newline at end of file
+# documents are fetched up to this length, then only the passages most relevant to the topic are kept within the global prompt budget
+DOC_CONTENT_MAX_CHARS = 50_000
+PROMPT_DOCS_MAX_CHARS = 36_000
+
+# incremental refresh: newest arXiv papers (by submission date) checked for ones submitted since the last run
+ARXIV_REFRESH_CANDIDATES = 50
+
+# in-memory cache of the Wikipedia, arXiv and Google News results within a process, in seconds
+TOOL_CACHE_TTL = 60 * 60
+
+# near-duplicate passage removal before extraction, max SimHash distance in bits
+DEDUP_DOCUMENTS = True
+DEDUP_MAX_DISTANCE = 10
+
+# per-section review loop, None means no token budget
+MAX_REWRITE_ITERATIONS = 2
+SECTION_TOKEN_BUDGET = None
+
+# shared HTTP connection pool for the LLM clients
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY = 60.0
+HTTP_TIMEOUT = 120.0
+
+# opt-in cross-run cache of the deterministic agent calls (searcher, extractor, critic), least recently used responses are evicted
+LLM_CACHE_ENABLED = False
+LLM_CACHE_PATH = 'data/llm_cache.sqlite'
+LLM_CACHE_MAX_ENTRIES = 5_000
+LLM_CACHE_MAX_MB = 256
+
+
+# output formats of the final report, any of 'pdf', 'md', 'html', 'json'
+REPORT_FORMATS = ('pdf',)
+
+# index of the researched topics, a topic at least this similar to a previous one can reuse its report
+ARCHIVE_PATH = 'data/archive.sqlite'
+ARCHIVE_MATCH_THRESHOLD = 0.8
+
+# logging: level name, single background writer thread, JSON lines in the log file
+LOG_LEVEL = 'INFO'
+LOG_QUEUE = True
+LOG_JSON = False
+
+# USD per 1M (prompt, completion) tokens, for the cost breakdown of the run traces
+MODEL_PRICES = {
+    'gpt-5-mini': (0.25, 2.00),
+    'gpt-4o-mini': (0.15, 0.60)
+}
\ No newline at end of file
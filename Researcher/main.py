@@ -1,13 +1,32 @@
 import os
+import sys
 import getpass
+import argparse
 from dotenv import load_dotenv
-from agents import ResearchAssistant
-from utils import get_logger
+from agents import ResearchAssistant, AssemblerAgent, RENDERERS, run_batch, save_summary
+from config import REPORT_FORMATS
+from utils import get_logger, set_llm_cache, migrate_states, get_archive, state_dir, load_trace, format_waterfall, format_costs
 
 
-if __name__ == '__main__':
-    logger = get_logger('main')
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description= 'Agentic AI Research Assistant.')
+    parser.add_argument('--topic', help= 'Topic of research, skips the interactive prompt.')
+    parser.add_argument('--topics-file', help= 'File with one topic per line, researched concurrently in batch mode.')
+    parser.add_argument('--workers', type= int, default= 4, help= 'Topics researched at the same time in batch mode. Defaults to 4.')
+    parser.add_argument('--llm-concurrency', type= int, default= 8, help= 'Global budget of in-flight LLM calls in batch mode. Defaults to 8.')
+    parser.add_argument('--refresh', action= 'store_true', help= 'Refresh previously researched topics instead of starting from scratch.')
+    parser.add_argument('--non-interactive', action= 'store_true', help= 'Never prompt, exit if a required key is missing. Implied by --topics-file.')
+    parser.add_argument('--formats', nargs= '+', choices= list(RENDERERS), default= list(REPORT_FORMATS), help= 'Output formats of the report. Defaults to `config.REPORT_FORMATS`.')
+    parser.add_argument('--llm-cache', action= 'store_true', help= 'Replay repeatable LLM calls (searcher, extractor, critic) from the local response cache, e.g. when rerunning after a crash.')
+    parser.add_argument('--reuse', action= 'store_true', help= 'Reuse the report of a previously researched topic that is similar enough, instead of researching again.')
+    parser.add_argument('--search', nargs= '?', const= '', metavar= 'QUERY', help= 'Search the previously researched topics (all of them, most recent first, without a query), then exit.')
+    parser.add_argument('--trace', metavar= 'TOPIC', help= 'Show the waterfall and the cost breakdown of the last run of a topic, then exit.')
+    parser.add_argument('--migrate-states', action= 'store_true', help= 'Convert the states saved as plain JSON in data/ into the compressed state store, then exit.')
+    parser.add_argument('--no-tracing', action= 'store_true', help= 'Disable LangSmith tracing, its keys are not required then.')
+    return parser.parse_args()
 
+
+def print_guidelines() -> None:
     print('\n======================* Research Assistant *======================\n')
     print('Guidelines:')
     print('1. Enter a broad research topic (e.g., "Quantum Computing").')
@@ -15,7 +34,7 @@ if __name__ == '__main__':
     print('   - Search academic papers, Wikipedia, and recent news')
     print('   - Extract structured knowledge')
     print('   - Write, critique, and assemble a full research report')
-    print('3. Outputs include logs, saved JSON state, and a final PDF report.')
+    print('3. Outputs include logs, saved JSON state, and a final PDF report (--formats adds Markdown, HTML, JSON).')
     print('4. Notes:')
     print('   - The process may take several minutes depending on topic complexity.')
     print('   - Requires valid OpenAI + LangSmith credentials.')
@@ -23,30 +42,108 @@ if __name__ == '__main__':
     print('   - You can cancel anytime with Ctrl+C.\n')
     print('=================================================================\n')
 
+
+if __name__ == '__main__':
+    logger = get_logger('main')
+    args = parse_args()
+
+    if args.migrate_states:
+        for path in migrate_states():
+            logger.info(f'Migrated state to: {path}')
+        sys.exit(0)
+
+    if args.search is not None:
+        entries = get_archive().search(args.search) if args.search else get_archive().recent()
+
+        for entry in entries:
+            print(f'{entry['updated_at'][:10]}  {entry['topic']}  ({len(entry['sources'])} sources)')
+
+        sys.exit(0)
+
+    if args.trace:
+        trace = load_trace(state_dir(args.trace))
+        if trace is None:
+            logger.error(f'No trace found for topic "{args.trace}". Exiting...')
+            sys.exit(1)
+
+        print(format_waterfall(trace))
+        print()
+        print(format_costs(trace))
+        sys.exit(0)
+
+    interactive = not (args.non_interactive or args.topics_file)
+
+    if interactive:
+        print_guidelines()
+
     # loading .env
     if load_dotenv():
         logger.info('.env loaded successfully.')
     else:
         logger.warning('.env not found. You will be prompted for missing keys.')
 
-    # setting these variables
-    os.environ['LANGSMITH_TRACING'] = 'true'
-    os.environ['LANGSMITH_ENDPOINT'] = 'https://api.smith.langchain.com'
+    required_vars = ['OPENAI_API_KEY']
+
+    if args.no_tracing:
+        os.environ['LANGSMITH_TRACING'] = 'false'
+
+    else:
+        # setting these variables
+        os.environ['LANGSMITH_TRACING'] = 'true'
+        os.environ['LANGSMITH_ENDPOINT'] = 'https://api.smith.langchain.com'
+        required_vars += ['LANGSMITH_API_KEY', 'LANGSMITH_PROJECT']
 
     # checking if these exist, if not ask user
-    required_vars = ['OPENAI_API_KEY', 'LANGSMITH_API_KEY', 'LANGSMITH_PROJECT']
     for var in required_vars:
         if not os.environ.get(var):
+            if not interactive:
+                logger.error(f'"{var}" not found. Set it in the environment or .env when running non-interactively. Exiting...')
+                sys.exit(1)
+
             logger.warning(f'"{var}" not found. Requesting input...')
             os.environ[var] = getpass.getpass(f'Enter your {var} (input hidden): ')
 
     logger.info('All required environment variables available. Proceeding...')
 
+    if args.llm_cache:
+        set_llm_cache(True)
+        logger.info('LLM response cache enabled.')
+
+    # batch flow
+    if args.topics_file:
+        with open(args.topics_file, encoding= 'utf-8') as f:
+            topics = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+        summary = run_batch(
+            topics,
+            workers= args.workers,
+            llm_concurrency= args.llm_concurrency,
+            refresh= args.refresh,
+            formats= tuple(args.formats)
+        )
+        path = save_summary(summary)
+        logger.info(f'Saved the batch summary at: {path}')
+
+        for item in summary:
+            logger.info(f'{item['status'].upper():<8} {item['elapsed']:>8.2f}s  {item['topic']}' + (f'  ({item['error']})' if item['error'] else ''))
+
+        sys.exit(1 if any(item['status'] == 'failed' for item in summary) else 0)
+
     # main flow
-    assistant = ResearchAssistant()
-    topic = input('\nEnter the topic of research: ').strip()
+    topic = args.topic or (input('\nEnter the topic of research: ').strip() if interactive else '')
     if not topic:
         logger.error('No topic provided. Exiting...')
         exit(1)
 
-    result = assistant.run(topic)
+    match = get_archive().match(topic) if args.reuse and not args.refresh else None
+    if match:
+        reports = [path for path in (AssemblerAgent.report_path(match['topic'], fmt) for fmt in RENDERERS) if os.path.exists(path)]
+
+        if reports:
+            logger.info(f'"{topic}" was already researched as "{match['topic']}" on {match['updated_at'][:10]} (similarity {match['similarity']:.2f}).')
+            for path in reports:
+                logger.info(f'Reusing the report at: {path}')
+            sys.exit(0)
+
+    assistant = ResearchAssistant(formats= tuple(args.formats))
+    result = assistant.refresh(topic) if args.refresh else assistant.run(topic)
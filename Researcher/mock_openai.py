@@ -0,0 +1,302 @@
+import json
+import time
+import base64
+import asyncio
+import threading
+from array import array
+from collections import Counter
+from typing import AsyncIterator, Callable
+
+import h2.config
+import h2.connection
+import h2.events
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage, convert_to_messages
+
+
+# the same module is in Researcher/ and NeuroHarshit/benchmark/, Researcher/tests/test_clients.py keeps both identical
+
+
+def _tokens(text: str) -> int:
+    # ~4 characters per token, close enough for English prose
+    return max(1, len(text) // 4)
+
+
+class MockOpenAIServer:
+    def __init__(
+            self,
+            responder: Callable[[list[BaseMessage]], str],
+            *,
+            embeddings: Embeddings | None = None,
+            first_token_latency: float = 0.0,
+            seconds_per_token: float = 0.0,
+            handshake_latency: float = 0.0,
+            chunk_chars: int = 64
+        ) -> None:
+        """
+        Local OpenAI-compatible server for benchmarking the HTTP clients, serving `/v1/chat/completions` (with streaming) and `/v1/embeddings` on a free port of 127.0.0.1, from a background thread. It speaks HTTP/1.1 with keep-alive and HTTP/2 with prior knowledge (h2c), and counts the TCP connections it accepted, so connection reuse and multiplexing can be measured.
+
+        There is no TLS, so `handshake_latency` is waited once per new connection before its first request is read, standing in for the TCP + TLS handshakes a real connection to the API pays.
+
+        Args:
+            responder (Callable[[list[BaseMessage]], str]): Response to the messages of a chat completion request.
+            embeddings (Embeddings | None, optional): Embedding model serving the embedding requests, None answers them with 404. Defaults to None.
+            first_token_latency (float, optional): Seconds before the first token of a response. Defaults to 0.0.
+            seconds_per_token (float, optional): Seconds per output token. Defaults to 0.0.
+            handshake_latency (float, optional): Seconds of setup per new connection. Defaults to 0.0.
+            chunk_chars (int, optional): Characters per streamed chunk. Defaults to 64.
+        """
+        self.responder = responder
+        self.embeddings = embeddings
+        self.first_token_latency = first_token_latency
+        self.seconds_per_token = seconds_per_token
+        self.handshake_latency = handshake_latency
+        self.chunk_chars = chunk_chars
+
+        self.connections = 0
+        self.requests: Counter[str] = Counter()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.Server | None = None
+        self._thread: threading.Thread | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self.url = ''
+
+
+    def __enter__(self) -> 'MockOpenAIServer':
+        started = threading.Event()
+
+        def serve() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, '127.0.0.1', 0))
+            self.url = f'http://127.0.0.1:{self._server.sockets[0].getsockname()[1]}/v1'
+            started.set()
+
+            try:
+                self._loop.run_forever()
+
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target= serve, name= 'mock-openai', daemon= True)
+        self._thread.start()
+        started.wait()
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        async def stop() -> None:
+            self._server.close()
+            # open keep-alive connections would keep `wait_closed()` waiting
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._loop.stop()
+
+        asyncio.run_coroutine_threadsafe(stop(), self._loop)
+        self._thread.join()
+
+
+    def stats(self) -> dict[str, int]:
+        """TCP "connections" accepted and "requests" served, in total and by protocol."""
+        return {'connections': self.connections, 'requests': sum(self.requests.values()), **{f'requests_{protocol}': count for protocol, count in self.requests.items()}}
+
+
+    # ------------* Endpoints *------------
+    async def _respond(self, path: str, body: bytes) -> tuple[int, str, AsyncIterator[bytes]]:
+        """Status, content type and body chunks of the response to a POST request."""
+        try:
+            request = json.loads(body or b'{}')
+
+        except ValueError:
+            return 400, 'application/json', self._once({'error': {'message': 'Invalid JSON body.'}})
+
+        if path.endswith('/chat/completions'):
+            return 200, 'text/event-stream' if request.get('stream') else 'application/json', self._chat(request)
+
+        if path.endswith('/embeddings') and self.embeddings is not None:
+            return 200, 'application/json', self._embed(request)
+
+        return 404, 'application/json', self._once({'error': {'message': f'Unknown endpoint: {path}'}})
+
+
+    @staticmethod
+    async def _once(payload: dict) -> AsyncIterator[bytes]:
+        yield json.dumps(payload).encode('utf-8')
+
+
+    async def _chat(self, request: dict) -> AsyncIterator[bytes]:
+        messages = request.get('messages', [])
+        text = self.responder(convert_to_messages([{'role': message['role'], 'content': message.get('content') or ''} for message in messages]))
+        prompt_tokens = sum(_tokens(message.get('content') or '') for message in messages)
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': _tokens(text), 'total_tokens': prompt_tokens + _tokens(text)}
+        base = {'id': 'chatcmpl-mock', 'created': int(time.time()), 'model': request.get('model', 'mock')}
+
+        await asyncio.sleep(self.first_token_latency)
+
+        if not request.get('stream'):
+            await asyncio.sleep(_tokens(text) * self.seconds_per_token)
+            choice = {'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}
+            yield json.dumps({**base, 'object': 'chat.completion', 'choices': [choice], 'usage': usage}).encode('utf-8')
+            return
+
+        def event(choices: list[dict], **extra) -> bytes:
+            return f'data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': choices, **extra})}\n\n'.encode('utf-8')
+
+        for start in range(0, len(text), self.chunk_chars):
+            chunk = text[start:start + self.chunk_chars]
+            await asyncio.sleep(_tokens(chunk) * self.seconds_per_token)
+            yield event([{'index': 0, 'delta': {'role': 'assistant', 'content': chunk}, 'finish_reason': None}])
+
+        yield event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+
+        if (request.get('stream_options') or {}).get('include_usage'):
+            yield event([], usage= usage)
+
+        yield b'data: [DONE]\n\n'
+
+
+    async def _embed(self, request: dict) -> AsyncIterator[bytes]:
+        texts = request.get('input', [])
+        texts = [texts] if isinstance(texts, str) else texts
+
+        # the embedding model may block, like a request to a real one
+        vectors = await asyncio.to_thread(self.embeddings.embed_documents, texts)
+
+        # the `openai` SDK asks for base64 by default, little endian float32
+        if request.get('encoding_format') == 'base64':
+            vectors = [base64.b64encode(array('f', vector).tobytes()).decode('ascii') for vector in vectors]
+
+        tokens = sum(_tokens(text) for text in texts)
+        yield json.dumps({
+            'object': 'list',
+            'data': [{'object': 'embedding', 'index': index, 'embedding': vector} for index, vector in enumerate(vectors)],
+            'model': request.get('model', 'mock'),
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+        }).encode('utf-8')
+
+
+    # ------------* Protocols *------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        await asyncio.sleep(self.handshake_latency)
+
+        try:
+            preface = await reader.read(65536)
+
+            if preface.startswith(b'PRI * HTTP/2.0'):
+                await self._serve_http2(preface, reader, writer)
+
+            elif preface:
+                await self._serve_http1(preface, reader, writer)
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+    async def _serve_http1(self, data: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves the requests of a keep-alive HTTP/1.1 connection one after the other, responses are sent chunked."""
+        buffer = bytearray(data)
+
+        while True:
+            while b'\r\n\r\n' not in buffer:
+                data = await reader.read(65536)
+                if not data:
+                    return
+                buffer += data
+
+            head, _, rest = bytes(buffer).partition(b'\r\n\r\n')
+            request_line, *header_lines = head.decode('latin-1').split('\r\n')
+            headers = {name.strip().lower(): value.strip() for name, value in (line.split(':', 1) for line in header_lines)}
+            length = int(headers.get('content-length', 0))
+
+            while len(rest) < length:
+                data = await reader.read(65536)
+                if not data:
+                    return
+                rest += data
+
+            body, buffer = rest[:length], bytearray(rest[length:])
+            self.requests['http1'] += 1
+
+            status, content_type, chunks = await self._respond(request_line.split(' ')[1], body)
+            writer.write(f'HTTP/1.1 {status} OK\r\ncontent-type: {content_type}\r\ntransfer-encoding: chunked\r\n\r\n'.encode('latin-1'))
+
+            async for chunk in chunks:
+                writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                await writer.drain()
+
+            writer.write(b'0\r\n\r\n')
+            await writer.drain()
+
+            if headers.get('connection', '').lower() == 'close':
+                return
+
+
+    async def _serve_http2(self, data: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves the streams of an HTTP/2 connection concurrently, as they are multiplexed by the client."""
+        connection = h2.connection.H2Connection(config= h2.config.H2Configuration(client_side= False, header_encoding= 'utf-8'))
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+
+        requests: dict[int, tuple[dict, bytearray]] = {}
+        window = asyncio.Condition()
+        tasks: set[asyncio.Task] = set()
+
+        async def send(stream_id: int, data: bytes) -> None:
+            while data:
+                async with window:
+                    await window.wait_for(lambda: connection.local_flow_control_window(stream_id) > 0)
+                    size = min(len(data), connection.local_flow_control_window(stream_id), connection.max_outbound_frame_size)
+                    connection.send_data(stream_id, data[:size])
+                    writer.write(connection.data_to_send())
+                    data = data[size:]
+
+            await writer.drain()
+
+        async def respond(stream_id: int, headers: dict, body: bytes) -> None:
+            self.requests['http2'] += 1
+            status, content_type, chunks = await self._respond(headers.get(':path', ''), body)
+            connection.send_headers(stream_id, [(':status', str(status)), ('content-type', content_type)])
+
+            async for chunk in chunks:
+                await send(stream_id, chunk)
+
+            connection.end_stream(stream_id)
+            writer.write(connection.data_to_send())
+            await writer.drain()
+
+        while data:
+            for event in connection.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    requests[event.stream_id] = (dict(event.headers), bytearray())
+
+                elif isinstance(event, h2.events.DataReceived):
+                    requests[event.stream_id][1].extend(event.data)
+                    connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+
+                elif isinstance(event, h2.events.StreamEnded):
+                    headers, body = requests.pop(event.stream_id)
+                    task = asyncio.create_task(respond(event.stream_id, headers, bytes(body)))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+                elif isinstance(event, (h2.events.WindowUpdated, h2.events.RemoteSettingsChanged)):
+                    async with window:
+                        window.notify_all()
+
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    data = b''
+
+            writer.write(connection.data_to_send())
+            await writer.drain()
+
+            if data:
+                data = await reader.read(65536)
+
+        for task in tasks:
+            task.cancel()
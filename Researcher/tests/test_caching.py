@@ -0,0 +1,94 @@
+import os
+import json
+
+import pytest
+
+import utils.caching
+from utils.caching import load_state, migrate_states, save_state, state_dir
+
+
+STATE = {
+    'topic': 'Quantum Computing',
+    'updated_at': '2025-01-01T00:00:00',
+    'wikipedia_docs': 'Index: 1\nTitle: Quantum computing\nContent: ' + 'A qubit. ' * 1_000,
+    'arxiv_docs': 'Index: 1\nTitle: A paper\nContent: ' + 'Surface codes. ' * 1_000,
+    'news': [{'title': 'News', 'url': 'https://example.com'}],
+    'knowledge': {'topic': 'Quantum Computing', 'sources': [], 'topics': [{'id': 't1', 'title': 'Qubits'}]},
+    'report_parts': ['First part.'],
+    'criticism': {'0': 'PASS'},
+    'sections': [{'index': 0, 'text': 'First part.'}]
+}
+
+
+@pytest.fixture(autouse= True)
+def data_dir(tmp_path, monkeypatch):
+    # `DATA_DIR` is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(utils.caching.DATA_DIR)
+
+
+@pytest.fixture(params= ['zstd', 'gzip'])
+def codec(request, monkeypatch):
+    if request.param == 'zstd':
+        pytest.importorskip('zstandard')
+
+    monkeypatch.setattr(utils.caching, '_zstd_available', lambda: request.param == 'zstd')
+    return request.param
+
+
+def test_save_and_load_round_trip(codec):
+    directory = save_state(STATE, STATE['topic'])
+
+    assert directory == state_dir(STATE['topic'])
+    assert load_state(STATE['topic']) == STATE
+    assert load_state('Unknown topic') is None
+
+    extension = '.json.zst' if codec == 'zstd' else '.json.gz'
+    blobs = [name for name in os.listdir(directory) if name != utils.caching.MANIFEST_NAME]
+    assert len(blobs) == len(utils.caching.BLOB_FIELDS)
+    assert all(name.endswith(extension) for name in blobs)
+    # the raw documents are stored compressed
+    assert sum(os.path.getsize(os.path.join(directory, name)) for name in blobs) < len(json.dumps(STATE)) / 10
+
+
+def test_load_only_the_requested_fields(codec):
+    save_state(STATE, STATE['topic'])
+    state = load_state(STATE['topic'], fields= ['knowledge'])
+
+    assert state == {'topic': STATE['topic'], 'updated_at': STATE['updated_at'], 'knowledge': STATE['knowledge']}
+
+
+def test_save_replaces_the_previous_blobs(codec):
+    directory = save_state(STATE, STATE['topic'])
+    save_state({**STATE, 'report_parts': ['Rewritten part.']}, STATE['topic'])
+
+    assert load_state(STATE['topic'])['report_parts'] == ['Rewritten part.']
+    assert len(os.listdir(directory)) == len(utils.caching.BLOB_FIELDS) + 1
+
+
+def test_updated_at_defaults_to_the_save_time():
+    state = {key: value for key, value in STATE.items() if key != 'updated_at'}
+    save_state(state, STATE['topic'])
+
+    assert load_state(STATE['topic'])['updated_at'][:4].isdigit()
+
+
+def test_migrate_legacy_states(codec):
+    legacy = os.path.join(utils.caching.DATA_DIR, 'quantumcomputing.json')
+    with open(legacy, 'w', encoding= 'utf-8') as f:
+        json.dump(STATE, f)
+
+    # legacy states are read until they are migrated
+    assert load_state(STATE['topic']) == STATE
+
+    # not saved states, skipped with a warning
+    with open(os.path.join(utils.caching.DATA_DIR, 'Not A Topic.json'), 'w', encoding= 'utf-8') as f:
+        json.dump(STATE, f)
+
+    with open(os.path.join(utils.caching.DATA_DIR, 'list.json'), 'w', encoding= 'utf-8') as f:
+        json.dump([1, 2], f)
+
+    assert migrate_states() == [state_dir(STATE['topic'])]
+    assert not os.path.exists(legacy)
+    assert load_state(STATE['topic']) == STATE
+    assert sorted(os.listdir(utils.caching.DATA_DIR)) == ['Not A Topic.json', 'list.json', 'quantumcomputing']
@@ -0,0 +1,76 @@
+import os
+import ast
+import json
+import asyncio
+
+import pytest
+
+from mock_openai import MockOpenAIServer
+from utils.clients import get_http_client, get_http_async_client
+
+
+RESEARCHER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NEUROHARSHIT_DIR = os.path.join(os.path.dirname(RESEARCHER_DIR), 'NeuroHarshit')
+needs_neuroharshit = pytest.mark.skipif(not os.path.isdir(NEUROHARSHIT_DIR), reason= 'NeuroHarshit is not next to Researcher')
+
+COMPLETION = {'model': 'mock', 'messages': [{'role': 'user', 'content': 'Hello there'}]}
+
+
+def _definitions(path: str) -> dict[str, str]:
+    with open(path, encoding= 'utf-8') as f:
+        tree = ast.parse(f.read())
+
+    return {node.name: ast.dump(node) for node in tree.body if isinstance(node, (ast.FunctionDef, ast.ClassDef))}
+
+
+@needs_neuroharshit
+def test_http_helpers_match_neuroharshit():
+    researcher = _definitions(os.path.join(RESEARCHER_DIR, 'utils', 'clients.py'))
+    neuroharshit = _definitions(os.path.join(NEUROHARSHIT_DIR, 'Agent', 'chatbot.py'))
+
+    for name in ('_http2_available', '_LoopLocalTransport'):
+        assert researcher[name] == neuroharshit[name], f'{name} differs between the packages'
+
+
+@needs_neuroharshit
+def test_mock_server_matches_neuroharshit():
+    with open(os.path.join(RESEARCHER_DIR, 'mock_openai.py'), encoding= 'utf-8') as f:
+        researcher = f.read()
+
+    with open(os.path.join(NEUROHARSHIT_DIR, 'benchmark', 'mock_openai.py'), encoding= 'utf-8') as f:
+        assert f.read() == researcher
+
+
+def test_shared_client_reuses_connection():
+    with MockOpenAIServer(lambda messages: 'General Kenobi') as server:
+        for _ in range(5):
+            response = get_http_client().post(f'{server.url}/chat/completions', json= COMPLETION)
+            assert response.json()['choices'][0]['message']['content'] == 'General Kenobi'
+
+        assert server.stats()['connections'] == 1
+        assert server.stats()['requests'] == 5
+
+
+def test_async_client_survives_event_loops():
+    async def ask() -> str:
+        response = await get_http_async_client().post(f'{server.url}/chat/completions', json= COMPLETION)
+        return response.json()['choices'][0]['message']['content']
+
+    with MockOpenAIServer(lambda messages: messages[-1].content[::-1]) as server:
+        # the pooled connection of the first loop is unusable in the second one
+        assert asyncio.run(ask()) == 'ereht olleH'
+        assert asyncio.run(ask()) == 'ereht olleH'
+        assert server.stats()['connections'] == 2
+
+
+def test_mock_server_streams_with_usage():
+    request = {**COMPLETION, 'stream': True, 'stream_options': {'include_usage': True}}
+
+    with MockOpenAIServer(lambda messages: 'x' * 150, chunk_chars= 64) as server:
+        with get_http_client().stream('POST', f'{server.url}/chat/completions', json= request) as response:
+            events = [line.removeprefix('data: ') for line in response.iter_lines() if line.startswith('data: ')]
+
+    chunks = [json.loads(event) for event in events[:-1]]
+    assert events[-1] == '[DONE]'
+    assert ''.join(choice['delta'].get('content', '') for chunk in chunks for choice in chunk['choices']) == 'x' * 150
+    assert chunks[-1]['usage']['completion_tokens'] == 37
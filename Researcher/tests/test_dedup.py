@@ -0,0 +1,60 @@
+import random
+
+from utils.dedup import deduplicate_documents, join_documents, simhash, split_documents, split_passages
+
+
+def _passage(seed: int, words: int = 60) -> str:
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(['quantum', 'error', 'qubit', 'gate', 'noise', 'circuit', 'surface', 'code', 'decoder', 'lattice', 'logical', 'physical', 'threshold', 'fidelity', 'measurement', 'syndrome']) + str(rng.randint(0, 99)) for _ in range(words)) + '.'
+
+
+def _document(index: int, title: str, passages: list[str]) -> str:
+    # same format as the outputs of `wiki_tool` and `arxiv_tool`
+    return f'Index: {index}\nTitle: {title}\nContent: ' + '\n'.join(passages) + '\n\n---\n'
+
+
+def test_simhash_distance():
+    text = _passage(1)
+    edited = text.replace(text.split()[10], 'changed', 1)
+
+    assert (simhash(text) ^ simhash(edited)).bit_count() <= 10
+    assert (simhash(text) ^ simhash(_passage(2))).bit_count() > 10
+
+
+def test_split_passages_merges_lines_into_sentences():
+    content = 'A line of a PDF that\nwraps before the end of the sentence.\nShort.'
+
+    assert split_passages(content, min_chars= 20) == ['A line of a PDF that\nwraps before the end of the sentence.', 'Short.']
+    assert '\n'.join(split_passages(content, min_chars= 20)) == content
+
+
+def test_split_and_join_documents_round_trip():
+    docs = '\n'.join([_document(1, 'A', [_passage(1)]), _document(2, 'B', [_passage(2)])])
+
+    assert join_documents(split_documents(docs)) == docs
+
+
+def test_deduplicate_documents_drops_repeated_passages():
+    shared, edited = _passage(1), _passage(1).replace('.', ' extra.')
+    docs = '\n'.join([
+        _document(1, 'Wikipedia article', [shared, _passage(2), 'Short heading.']),
+        _document(2, 'Paper', [_passage(3), edited, 'Short heading.'])
+    ])
+
+    deduplicated, stats = deduplicate_documents(docs)
+
+    # the near-duplicate of the second document is dropped, short passages are kept
+    assert stats['removed'] == 1
+    assert shared in deduplicated and edited not in deduplicated
+    assert deduplicated.count('Short heading.') == 2
+    assert 'Title: Paper' in deduplicated
+    assert stats['bytes_after'] == len(deduplicated.encode()) < stats['bytes_before']
+
+
+def test_deduplicate_documents_keeps_unique_documents_unchanged():
+    docs = '\n'.join([_document(1, 'A', [_passage(1)]), _document(2, 'B', [_passage(2)])])
+
+    deduplicated, stats = deduplicate_documents(docs)
+
+    assert deduplicated == docs
+    assert stats['removed'] == 0 and stats['bytes_after'] == stats['bytes_before']
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from utils.json_stream import TopicStreamParser, parse_json, repair_json, strip_fences, validate_knowledge
+
+
+def _topic(index: int) -> dict:
+    return {
+        'id': f't{index}',
+        'title': f'Topic {index} {{with braces}} and "quotes"',
+        'summary_points': [f'Point {index}.'],
+        'references': [1],
+        'subtopics': [{'id': f't{index}.1', 'title': 'Sub', 'summary_points': ['Sub point.'], 'references': ['1']}]
+    }
+
+
+KNOWLEDGE = {
+    'topic': 'Quantum computing',
+    'sources': [{'id': 1, 'title': 'A paper', 'source': 'arXiv', 'url': 'https://arxiv.org/abs/1', 'authors': ['Ada']}],
+    'topics': [_topic(1), _topic(2), _topic(3)],
+    'abstract': 'An abstract.',
+    'conclusion': 'A conclusion.'
+}
+RESPONSE = f'```json\n{json.dumps(KNOWLEDGE, indent= 2)}\n```\nHope this helps!'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, len(RESPONSE)])
+def test_stream_parser_emits_topics_as_they_complete(chunk_size):
+    parser = TopicStreamParser()
+    emitted = []
+
+    for start in range(0, len(RESPONSE), chunk_size):
+        emitted += parser.feed(RESPONSE[start:start + chunk_size])
+
+    assert emitted == KNOWLEDGE['topics']
+    assert parser.values['sources'] == KNOWLEDGE['sources']
+
+
+def test_stream_parser_emits_a_topic_before_the_response_ends():
+    parser = TopicStreamParser()
+    text = json.dumps(KNOWLEDGE)
+    first_end = text.index(json.dumps(KNOWLEDGE['topics'][0])) + len(json.dumps(KNOWLEDGE['topics'][0]))
+
+    assert parser.feed(text[:first_end]) == [KNOWLEDGE['topics'][0]]
+    assert parser.feed(text[first_end:]) == KNOWLEDGE['topics'][1:]
+
+
+def test_strip_fences_drops_the_text_around_the_object():
+    assert json.loads(strip_fences(RESPONSE)) == KNOWLEDGE
+
+
+@pytest.mark.parametrize('truncated, expected', [
+    ('{"a": "unterminated', {'a': 'unterminated'}),
+    ('{"a": [1, 2', {'a': [1, 2]}),
+    ('{"a": 1, "b"', {'a': 1}),
+    ('{"a": 1, "b":', {'a': 1}),
+    ('{"a": {"b": [1, {"c": 2}],', {'a': {'b': [1, {'c': 2}]}}),
+    ('{"a": "escaped \\', {'a': 'escaped '})
+])
+def test_repair_json_closes_truncated_output(truncated, expected):
+    assert json.loads(repair_json(truncated)) == expected
+
+
+def test_parse_json_keeps_the_complete_topics_of_a_truncated_response():
+    text = json.dumps(KNOWLEDGE)
+    truncated = text[:text.index(json.dumps(KNOWLEDGE['topics'][2])) + 20]
+
+    assert parse_json(truncated)['topics'][:2] == KNOWLEDGE['topics'][:2]
+
+
+def test_parse_json_rejects_non_objects():
+    with pytest.raises(ValueError):
+        parse_json('[1, 2]')
+
+
+def test_validate_knowledge():
+    knowledge = json.loads(json.dumps(KNOWLEDGE))
+
+    assert validate_knowledge(knowledge) == []
+    # string references are coerced in place
+    assert knowledge['topics'][0]['subtopics'][0]['references'] == [1]
+
+    knowledge['topics'][1]['references'] = [7]
+    del knowledge['abstract']
+    errors = validate_knowledge(knowledge)
+
+    assert any('"abstract"' in error for error in errors)
+    assert any('unknown sources: [7]' in error for error in errors)
+
+
+def test_validate_knowledge_rejects_non_objects():
+    assert validate_knowledge([1, 2]) == ['Knowledge base is not an object, but list.']
@@ -0,0 +1,86 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+import utils.llm_cache
+from utils.llm_cache import ResponseCache, get_llm_cache, response_cache_key, set_llm_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # a clock that always moves forward, so the access order never ties
+    clock = itertools.count()
+    monkeypatch.setattr(utils.llm_cache, 'time', SimpleNamespace(time= lambda: next(clock)))
+
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_entries= 3, max_bytes= 1_000)
+    yield cache
+    cache.close()
+
+
+def test_response_cache_key():
+    messages = [SystemMessage(content= 'You are a critic.'), HumanMessage(content= 'Review this.')]
+    key = response_cache_key('gpt-5-mini', 0.0, messages)
+
+    assert key == response_cache_key('gpt-5-mini', 0.0, list(messages))
+    assert key != response_cache_key('gpt-5-mini', 0.7, messages)
+    assert key != response_cache_key('gpt-4o-mini', 0.0, messages)
+    assert key != response_cache_key('gpt-5-mini', 0.0, messages[:1])
+
+
+def test_get_and_put(cache):
+    assert cache.get('a') is None
+
+    cache.put('a', 'response', model= 'gpt-5-mini')
+
+    assert cache.get('a') == 'response'
+    assert cache.stats() == {'entries': 1, 'bytes': len('response'), 'hits': 1, 'misses': 1}
+
+
+def test_evicts_least_recently_used_over_max_entries(cache):
+    for key in 'abc':
+        cache.put(key, key)
+
+    # reading "a" makes "b" the least recently used
+    cache.get('a')
+    cache.put('d', 'd')
+
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in 'acd'] == ['a', 'c', 'd']
+
+
+def test_evicts_least_recently_used_over_max_bytes(cache):
+    cache.put('a', 'x' * 400)
+    cache.put('b', 'x' * 400)
+    cache.put('c', 'x' * 400)
+
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['bytes'] == 800
+
+
+def test_shared_across_connections(cache):
+    cache.put('a', 'response')
+    other = ResponseCache(cache.path)
+
+    try:
+        assert other.get('a') == 'response'
+
+    finally:
+        other.close()
+
+
+def test_set_llm_cache(tmp_path):
+    try:
+        set_llm_cache(True, str(tmp_path / 'cache.sqlite'))
+        cache = get_llm_cache()
+
+        assert cache is get_llm_cache()
+        assert cache.path == str(tmp_path / 'cache.sqlite')
+
+        set_llm_cache(False)
+        assert get_llm_cache() is None
+
+    finally:
+        set_llm_cache(utils.llm_cache.LLM_CACHE_ENABLED, utils.llm_cache.LLM_CACHE_PATH)
@@ -0,0 +1,48 @@
+from utils.selection import bm25_scores, select_passages
+
+
+def _passage(text: str, length: int = 300) -> str:
+    return (text + ' ') * (length // (len(text) + 1)) + 'end.'
+
+
+def _document(index: int, passages: list[str]) -> str:
+    # same format as the outputs of `wiki_tool` and `arxiv_tool`
+    return f'Index: {index}\nTitle: Document {index}\nContent: ' + '\n'.join(passages) + '\n\n---\n'
+
+
+LEADS = [_passage('lead of the first document'), _passage('lead of the second document')]
+RELEVANT = _passage('quantum error correction with surface codes')
+FILLER = [_passage(f'unrelated filler number {index}') for index in range(4)]
+DOCS = '\n'.join([_document(1, [LEADS[0], FILLER[0], RELEVANT, FILLER[1]]), _document(2, [LEADS[1], FILLER[2], FILLER[3]])])
+
+
+def test_bm25_ranks_matching_passages_first():
+    scores = bm25_scores('surface codes', [FILLER[0], RELEVANT, FILLER[1]])
+
+    assert scores[1] > scores[0] == scores[2] == 0
+
+
+def test_select_passages_returns_docs_within_budget_unchanged():
+    selected, stats = select_passages(DOCS, 'surface codes', len(DOCS))
+
+    assert selected == DOCS
+    assert stats['selected'] == stats['passages'] and stats['chars_after'] == stats['chars_before']
+
+
+def test_select_passages_keeps_leads_and_relevant_passages_within_budget():
+    budget = len(LEADS[0]) + len(LEADS[1]) + len(RELEVANT) + 10
+    selected, stats = select_passages(DOCS, 'quantum error correction', budget)
+
+    assert LEADS[0] in selected and LEADS[1] in selected and RELEVANT in selected
+    assert not any(filler in selected for filler in FILLER)
+    # the omitted stretches are marked, the kept passages stay in order
+    assert selected.index(LEADS[0]) < selected.index(RELEVANT) < selected.index(LEADS[1])
+    assert selected.count('[...]') == 3
+    assert stats['chars_after'] == len(selected) < stats['chars_before']
+
+
+def test_select_passages_with_a_tiny_budget_keeps_only_headers():
+    selected, _ = select_passages(DOCS, 'quantum', 10)
+
+    assert not any(passage in selected for passage in [*LEADS, RELEVANT, *FILLER])
+    assert 'Title: Document 1' in selected and 'Title: Document 2' in selected
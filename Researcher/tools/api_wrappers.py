@@ -1,7 +1,14 @@
+from itertools import islice, takewhile
+from types import SimpleNamespace
+from typing import Any, Callable, Iterable
 from langchain_community.utilities import ArxivAPIWrapper, WikipediaAPIWrapper
-from config import DOC_CONTENT_MAX_CHARS
+from config import DOC_CONTENT_MAX_CHARS, ARXIV_REFRESH_CANDIDATES
+from utils import memoize, traced
 
 
+# "No Wikipedia articles found." is not cached either, the article may be created later
+@traced('tool')
+@memoize(cache_if= lambda docs: docs.startswith('Index:'))
 def wiki_tool(topic: str) -> str:
     """Search Wikipedia for the given topic and return the most relevant page content.
 
@@ -35,11 +42,34 @@ def wiki_tool(topic: str) -> str:
         return f"error: Wikipedia search failed: {str(e)}"
 
 
-def arxiv_tool(topic: str) -> str:
+def _recent_search(since: str, excluded: set[str]) -> Callable[..., Any]:
+    """Replacement of `arxiv.Search` for `ArxivAPIWrapper`, which fetches the `config.ARXIV_REFRESH_CANDIDATES` newest papers by submission date and keeps the ones submitted after `since` that are not `excluded`, up to `max_results`. Filtering before `ArxivAPIWrapper.load()` means only the kept papers are downloaded."""
+    import arxiv
+
+    def search(query: str = '', max_results: int = 3, **kwargs) -> Any:
+        newest = arxiv.Search(
+            query,
+            max_results= ARXIV_REFRESH_CANDIDATES,
+            sort_by= arxiv.SortCriterion.SubmittedDate,
+            sort_order= arxiv.SortOrder.Descending,
+            **kwargs
+        ).results()
+        recent = takewhile(lambda result: result.published.date().isoformat() > since, newest)
+        unseen = (result for result in recent if result.title.strip().lower() not in excluded)
+        return SimpleNamespace(results= lambda: list(islice(unseen, max_results)))
+
+    return search
+
+
+@traced('tool')
+@memoize(cache_if= lambda docs: docs.startswith('Index:'))
+def arxiv_tool(topic: str, *, since: str | None = None, exclude_titles: Iterable[str] = ()) -> str:
     """Search Arxiv for academic papers related to the given topic.
 
     Args:
         topic (str): The research subject or keyword to query on Arxiv.
+        since (str | None, optional): ISO date (YYYY-MM-DD), if given only papers submitted after it are returned, searched among the newest papers instead of the most relevant ones. Defaults to None.
+        exclude_titles (Iterable[str], optional): Titles of already known papers to skip, compared case-insensitively. Defaults to ().
 
     Returns:
         str: Top three retrieved research papers, including title, publishing date, authors, source and content. Separated by `---`.
@@ -49,7 +79,15 @@ def arxiv_tool(topic: str) -> str:
             top_k_results= 3,
             doc_content_chars_max= DOC_CONTENT_MAX_CHARS
         )
-        docs = arxiv.load(topic)
+        # the wrapper turns a failed search into no results, let it fail so it is reported as an error instead
+        arxiv.arxiv_exceptions = ()
+        excluded = {title.strip().lower() for title in exclude_titles}
+
+        # only new papers, used for refreshing previous research
+        if since is not None:
+            arxiv.arxiv_search = _recent_search(since, excluded)
+
+        docs = [doc for doc in arxiv.load(topic) if str(doc.metadata.get('Title', '')).strip().lower() not in excluded]
 
         output = []
         for index, doc in enumerate(docs, start = 1):
@@ -1,22 +1,27 @@
 import logging
 from gnews import GNews
 
+from utils import memoize, traced
+
 
 # because gnews is starting its own handler causing double logs printing
 logging.getLogger().handlers.clear()
 
-def google_news_tool(topic: str) -> list[dict]:
-    """Scrapes upto 20 news on the given topic over the span of 1 year.
+@traced('tool')
+@memoize()
+def google_news_tool(topic: str, period: str = '1y') -> list[dict]:
+    """Scrapes upto 20 news on the given topic over the given period, 1 year by default.
 
     Args:
         topic (str): Topic to search.
+        period (str, optional): Time span of the news, in the format of GNews e.g. '7d', '1m'. Defaults to '1y'.
 
     Returns:
         list[dict]: Retrieved news.
     """
     google_news = GNews(
         max_results= 20,
-        period= '1y'
+        period= period
     )
 
     articles = google_news.get_news(topic)
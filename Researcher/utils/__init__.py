@@ -1,4 +1,12 @@
-from .logger import get_logger
-from .caching import sanitize_filename, save_state, load_state
+from .logger import get_logger, stop_logging
+from .tracing import Tracer, tracing, span, annotate, traced, propagate, span_cost, save_trace, load_trace, format_waterfall, format_costs
+from .caching import sanitize_filename, state_dir, save_state, load_state, migrate_states, memoize
+from .concurrency import set_llm_concurrency, llm_slot, allm_slot
+from .clients import get_http_client, get_http_async_client
+from .llm_cache import ResponseCache, response_cache_key, set_llm_cache, get_llm_cache
+from .archive import ResearchArchive, get_archive
+from .dedup import deduplicate_documents
+from .selection import select_passages
+from .json_stream import TopicStreamParser, parse_json, repair_json, validate_knowledge
 
-__all__ = [get_logger, sanitize_filename, save_state, load_state]
\ No newline at end of file
+__all__ = [get_logger, stop_logging, Tracer, tracing, span, annotate, traced, propagate, span_cost, save_trace, load_trace, format_waterfall, format_costs, sanitize_filename, state_dir, save_state, load_state, migrate_states, memoize, set_llm_concurrency, llm_slot, allm_slot, get_http_client, get_http_async_client, ResponseCache, response_cache_key, set_llm_cache, get_llm_cache, ResearchArchive, get_archive, deduplicate_documents, select_passages, TopicStreamParser, parse_json, repair_json, validate_knowledge]
\ No newline at end of file
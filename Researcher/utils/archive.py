@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+from difflib import SequenceMatcher
+
+from config import ARCHIVE_PATH, ARCHIVE_MATCH_THRESHOLD
+from .caching import DATA_DIR, MANIFEST_NAME, load_state, sanitize_filename
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+def _normalize_topic(topic: str) -> str:
+    return ' '.join(_WORD_PATTERN.findall(topic.lower()))
+
+
+def _fts_query(text: str) -> str:
+    """Any of the words of `text`, quoted so FTS5 operators in user input are taken literally."""
+    return ' OR '.join(f'"{word}"' for word in _WORD_PATTERN.findall(text.lower()))
+
+
+class ResearchArchive:
+    def __init__(self, path: str = ARCHIVE_PATH) -> None:
+        """
+        Local index of the researched topics, backed by SQLite with an FTS5 full-text table over the topics, abstracts and source titles. The porter tokenizer matches word variants ("computing" and "computers"), so near-duplicate topics are found without scanning `data/`.
+
+        Args:
+            path (str, optional): Path of the SQLite database, created if missing. Defaults to `config.ARCHIVE_PATH`.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok= True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout= 30, check_same_thread= False, isolation_level= None)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS reports ('
+            'name TEXT PRIMARY KEY, topic TEXT, source TEXT, abstract TEXT, sources TEXT, updated_at TEXT)'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS reports_updated_at ON reports (updated_at)')
+        self._connection.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5('
+            "name UNINDEXED, topic, abstract, sources, tokenize= 'porter unicode61')"
+        )
+
+
+    def add(self, state: dict) -> None:
+        """Indexes a state, replacing the previous entry of its topic."""
+        topic = state.get('topic', '')
+        name = sanitize_filename(topic)
+        knowledge = state.get('knowledge') or {}
+        sources = [source.get('title', '') for source in knowledge.get('sources') or [] if isinstance(source, dict)]
+
+        row = (name, topic, state.get('source', ''), knowledge.get('abstract', ''), json.dumps(sources, ensure_ascii= False), state.get('updated_at', ''))
+
+        with self._lock:
+            self._connection.execute('BEGIN')
+            try:
+                self._connection.execute('INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?)', row)
+                self._connection.execute('DELETE FROM reports_fts WHERE name = ?', (name,))
+                self._connection.execute(
+                    'INSERT INTO reports_fts VALUES (?, ?, ?, ?)',
+                    (name, topic, row[3], ' '.join(sources))
+                )
+                self._connection.execute('COMMIT')
+
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+
+
+    def rebuild(self) -> int:
+        """Indexes every state stored in `data/`, in the compressed store or as legacy JSON. Returns the number of indexed states."""
+        names = set()
+
+        for entry in os.listdir(DATA_DIR):
+            path = os.path.join(DATA_DIR, entry)
+
+            if os.path.isfile(os.path.join(path, MANIFEST_NAME)):
+                names.add(entry)
+
+            elif entry.endswith('.json') and os.path.isfile(path):
+                names.add(entry.removesuffix('.json'))
+
+        for name in sorted(names):
+            # the raw documents and the report parts are not indexed, so their blobs are never read
+            state = load_state(name, fields= ['knowledge'])
+
+            if state is not None:
+                self.add(state)
+
+        return len(names)
+
+
+    def _rows(self, sql: str, params: tuple = ()) -> list[dict]:
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+
+        return [{**dict(row), 'sources': json.loads(row['sources'])} for row in rows]
+
+
+    def get(self, topic: str) -> dict | None:
+        """Exact lookup of a topic, by its sanitized name."""
+        rows = self._rows('SELECT * FROM reports WHERE name = ?', (sanitize_filename(topic),))
+        return rows[0] if rows else None
+
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Full-text search over the topics, abstracts and source titles, best matches first.
+
+        Args:
+            query (str): Words to search for, any of them may match.
+            limit (int, optional): Maximum number of results. Defaults to 10.
+
+        Returns:
+            list[dict]: Matching entries with "name", "topic", "source", "abstract", "sources" and "updated_at".
+        """
+        if not _fts_query(query):
+            return []
+
+        return self._rows(
+            'SELECT reports.* FROM reports_fts JOIN reports USING (name) '
+            'WHERE reports_fts MATCH ? ORDER BY bm25(reports_fts, 0.0, 10.0, 1.0, 1.0) LIMIT ?',
+            (_fts_query(query), limit)
+        )
+
+
+    def find(self, topic: str, limit: int = 5) -> list[dict]:
+        """
+        Finds previously researched topics similar to `topic`. Candidates come from the full-text index on the topic column, and are ranked by the string similarity of the normalized topics.
+
+        Args:
+            topic (str): Topic to look for.
+            limit (int, optional): Maximum number of results. Defaults to 5.
+
+        Returns:
+            list[dict]: Entries with a "similarity" between 0 and 1, most similar first.
+        """
+        if not _fts_query(topic):
+            return []
+
+        candidates = self._rows(
+            'SELECT reports.* FROM reports_fts JOIN reports USING (name) '
+            'WHERE reports_fts MATCH ? LIMIT 50',
+            (f'topic : ({_fts_query(topic)})',)
+        )
+
+        normalized = _normalize_topic(topic)
+        for candidate in candidates:
+            candidate['similarity'] = SequenceMatcher(None, normalized, _normalize_topic(candidate['topic'])).ratio()
+
+        candidates.sort(key= lambda candidate: candidate['similarity'], reverse= True)
+        return candidates[:limit]
+
+
+    def match(self, topic: str, threshold: float = ARCHIVE_MATCH_THRESHOLD) -> dict | None:
+        """Returns the most similar previously researched topic if its similarity is at least `threshold`, e.g. to serve its report instead of researching again."""
+        best = self.find(topic, limit= 1)
+        return best[0] if best and best[0]['similarity'] >= threshold else None
+
+
+    def recent(self, limit: int = 20) -> list[dict]:
+        """Lists the researched topics, most recently updated first."""
+        return self._rows('SELECT * FROM reports ORDER BY updated_at DESC LIMIT ?', (limit,))
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_lock = threading.Lock()
+_archive: ResearchArchive | None = None
+
+
+def get_archive() -> ResearchArchive:
+    """Returns the process-wide `ResearchArchive`, created on the first call. A new archive is filled from the states in `data/`."""
+    global _archive
+
+    with _lock:
+        if _archive is None:
+            is_new = not os.path.exists(ARCHIVE_PATH)
+            _archive = ResearchArchive(ARCHIVE_PATH)
+
+            if is_new:
+                _archive.rebuild()
+
+        return _archive
@@ -1,33 +1,337 @@
+import io
 import os
+import gzip
 import json
+import time
+import uuid
+import tempfile
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from functools import wraps
+from typing import IO, Any, Callable, Iterable
 
+from config import TOOL_CACHE_TTL
+from .logger import get_logger
+from .tracing import annotate
 
-def save_state(state: dict, topic: str) -> None:
-    """Save the langgraph state for a given topic."""
-    filename = os.path.join('data', f'{sanitize_filename(topic)}.json')
 
-    with open(filename, 'w', encoding= 'utf-8') as f:
-        json.dump(
-            state, 
-            f, 
-            indent= 2, 
-            ensure_ascii= False
-        )
+# state store: data/<topic>/manifest.json holds the small fields and points to compressed blobs of the large ones
+DATA_DIR = 'data'
+MANIFEST_NAME = 'manifest.json'
+STATE_FORMAT_VERSION = 1
+BLOB_FIELDS = {
+    'docs': ('wikipedia_docs', 'arxiv_docs', 'news'),
+    'knowledge': ('knowledge',),
+    'report': ('report_parts', 'criticism', 'sections')
+}
 
 
-def load_state(topic: str) -> dict | None:
-    """Load the langgraph state for a given topic if it exists."""
-    filename = os.path.join('data', f'{sanitize_filename(topic)}.json')
+def _zstd_available() -> bool:
+    """zstd needs the optional `zstandard` package, gzip is used otherwise."""
+    try:
+        import zstandard  # noqa: F401
+        return True
 
-    if os.path.exists(filename):
-        with open(filename, 'r', encoding= 'utf-8') as f:
-            state = json.load(f)
+    except ImportError:
+        return False
 
-        return state
-    
-    return None
+
+def _open_blob(path: str, mode: str) -> IO[str]:
+    """Opens a compressed JSON blob as text, the codec is chosen by the extension (`.json.zst` or `.json.gz`)."""
+    if path.endswith('.zst'):
+        import zstandard
+
+        raw = open(path, mode + 'b')
+        stream = zstandard.ZstdCompressor().stream_writer(raw) if mode == 'w' else zstandard.ZstdDecompressor().stream_reader(raw)
+        return io.TextIOWrapper(stream, encoding= 'utf-8')
+
+    return gzip.open(path, mode + 't', encoding= 'utf-8', compresslevel= 6)
+
+
+def _atomic_write(path: str, write: Callable[[str], None]) -> None:
+    """Calls `write` with a temporary path in the same directory, then renames it to `path`, so readers never see a partial file."""
+    directory = os.path.dirname(path) or '.'
+    # keeping the file name as suffix, so the codec chosen by extension is the same
+    fd, tmp_path = tempfile.mkstemp(dir= directory, prefix= '.tmp-', suffix= '-' + os.path.basename(path))
+    os.close(fd)
+
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def state_dir(topic: str) -> str:
+    """Directory of the stored state of a topic."""
+    return os.path.join(DATA_DIR, sanitize_filename(topic))
+
+
+def _legacy_state_path(topic: str) -> str:
+    return os.path.join(DATA_DIR, f'{sanitize_filename(topic)}.json')
+
+
+def save_state(state: dict, topic: str) -> str:
+    """
+    Save the langgraph state for a given topic, compressed, with the large fields (raw documents and news, knowledge, report parts) in separate blobs so they can be loaded lazily (see `load_state()`).
+
+    Every save writes blobs with new names and then atomically replaces the manifest, so a crash mid-save leaves the previous state intact. Blobs of the previous save are removed afterwards.
+
+    Args:
+        state (dict): The state.
+        topic (str): Topic of the state.
+
+    Returns:
+        str: Directory of the stored state.
+    """
+    directory = state_dir(topic)
+    os.makedirs(directory, exist_ok= True)
+
+    generation = uuid.uuid4().hex[:12]
+    extension = '.json.zst' if _zstd_available() else '.json.gz'
+    blobs = {}
+
+    for blob, fields in BLOB_FIELDS.items():
+        values = {field: state[field] for field in fields if field in state}
+
+        if not values:
+            continue
+
+        name = f'{blob}.{generation}{extension}'
+
+        def write(path: str, values: dict = values) -> None:
+            with _open_blob(path, 'w') as f:
+                # json.dump writes chunk by chunk, the encoded state is never held in memory as a whole
+                json.dump(values, f, ensure_ascii= False, separators= (',', ':'))
+
+        _atomic_write(os.path.join(directory, name), write)
+        blobs[blob] = {'file': name, 'fields': list(values)}
+
+    blob_fields = {field for fields in BLOB_FIELDS.values() for field in fields}
+    manifest = {
+        'version': STATE_FORMAT_VERSION,
+        'saved_at': datetime.now().isoformat(timespec= 'seconds'),
+        'fields': {key: value for key, value in state.items() if key not in blob_fields},
+        'blobs': blobs
+    }
+
+    def write_manifest(path: str) -> None:
+        with open(path, 'w', encoding= 'utf-8') as f:
+            json.dump(manifest, f, indent= 2, ensure_ascii= False)
+
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    previous = _read_manifest(manifest_path)
+    _atomic_write(manifest_path, write_manifest)
+
+    # the new manifest is in place, blobs of the previous save can go
+    for blob in (previous or {}).get('blobs', {}).values():
+        if blob['file'] not in {new['file'] for new in blobs.values()}:
+            try:
+                os.remove(os.path.join(directory, blob['file']))
+
+            except FileNotFoundError:
+                pass
+
+    return directory
+
+
+def _read_manifest(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r', encoding= 'utf-8') as f:
+        return json.load(f)
+
+
+def load_state(topic: str, fields: Iterable[str] | None = None) -> dict | None:
+    """
+    Load the langgraph state for a given topic if it exists. Only the blobs holding the requested `fields` are read and decompressed, e.g. `load_state(topic, fields= ['knowledge'])` skips the raw documents.
+
+    States saved before the compressed store (`data/<topic>.json`) are still read, their "updated_at" defaults to the modification time of the file. States of the store default it to their save time.
+
+    Args:
+        topic (str): Topic of the state.
+        fields (Iterable[str] | None, optional): Fields to load, None means all of them. Small fields are always loaded. Defaults to None.
+
+    Returns:
+        dict | None: The state, or None if there is none.
+    """
+    manifest = _read_manifest(os.path.join(state_dir(topic), MANIFEST_NAME))
+
+    if manifest is None:
+        return _load_legacy_state(topic)
+
+    wanted = set(fields) if fields is not None else None
+    state = dict(manifest['fields'])
+
+    for blob in manifest['blobs'].values():
+        if wanted is not None and not wanted & set(blob['fields']):
+            continue
+
+        with _open_blob(os.path.join(state_dir(topic), blob['file']), 'r') as f:
+            values = json.load(f)
+
+        state.update(values if wanted is None else {key: value for key, value in values.items() if key in wanted})
+
+    state.setdefault('updated_at', manifest['saved_at'])
+    return state
+
+
+def _load_legacy_state(topic: str) -> dict | None:
+    filename = _legacy_state_path(topic)
+
+    if not os.path.exists(filename):
+        return None
+
+    with open(filename, 'r', encoding= 'utf-8') as f:
+        state = json.load(f)
+
+    # other JSON files may share the data directory
+    if not isinstance(state, dict):
+        return None
+
+    state.setdefault('updated_at', datetime.fromtimestamp(os.path.getmtime(filename)).isoformat(timespec= 'seconds'))
+    return state
+
+
+def migrate_states(remove_legacy: bool = True) -> list[str]:
+    """
+    Converts the states saved as plain JSON (`data/<topic>.json`) into the compressed store. Each state is read back and compared before its JSON file is removed. JSON files that are not saved states are skipped with a warning.
+
+    Args:
+        remove_legacy (bool, optional): If True, the JSON files are removed after a successful conversion. Defaults to True.
+
+    Returns:
+        list[str]: Directories of the converted states.
+    """
+    logger = get_logger('caching')
+    converted = []
+
+    for filename in sorted(os.listdir(DATA_DIR)):
+        path = os.path.join(DATA_DIR, filename)
+
+        if not filename.endswith('.json') or not os.path.isfile(path):
+            continue
+
+        # the file name is the sanitized topic, saving under it keeps the same directory name
+        name = filename.removesuffix('.json')
+
+        # `load_state()` never looks for a file that isn't named after a sanitized topic, so it is not a saved state
+        if sanitize_filename(name) != name:
+            logger.warning(f'Skipped "{path}", its name is not a sanitized topic.')
+            continue
+
+        try:
+            state = _load_legacy_state(name)
+
+        except ValueError as e:
+            logger.warning(f'Skipped "{path}", it is not valid JSON: {e}')
+            continue
+
+        if state is None:
+            logger.warning(f'Skipped "{path}", it does not hold a saved state.')
+            continue
+
+        save_state(state, name)
+
+        if load_state(name) != state:
+            raise RuntimeError(f'Migrated state of "{path}" does not match the original, it was kept.')
+
+        if remove_legacy:
+            os.remove(path)
+
+        converted.append(state_dir(name))
+
+    return converted
 
 
 def sanitize_filename(name: str) -> str:
     """Make sure topic names are safe for filenames."""
     return ''.join(c if c.isalnum() or c in ('-', '_') else '' for c in name).lower()
+
+
+
+def _is_result(result: Any) -> bool:
+    """Whether a tool result is worth caching: empty results (e.g. `[]` from a failed news scrape) and `"error: ..."` strings (the tools' convention for failures) are not."""
+    if isinstance(result, str):
+        return bool(result.strip()) and not result.startswith('error:')
+
+    return bool(result)
+
+
+def memoize(maxsize: int = 128, ttl: float | None = TOOL_CACHE_TTL, cache_if: Callable[[Any], bool] = _is_result) -> Callable:
+    """
+    Thread-safe in-memory cache for tool calls, keyed by the arguments. Concurrent calls with the same arguments wait for the first one instead of fetching again, so runs sharing a process (e.g. batch research) dedupe their tool fetches. Unlike `functools.lru_cache`, unhashable arguments (lists) are supported.
+
+    Results expire after `ttl` seconds, so a long-lived process (the API service, repeated refreshes) fetches news and papers again instead of serving them stale. Failed and empty results are not cached at all, so a transient failure is retried by the next call instead of being replayed until it expires.
+
+    Args:
+        maxsize (int, optional): Maximum number of cached results, least recently used are dropped. Defaults to 128.
+        ttl (float | None, optional): Seconds a result is served from the cache, None keeps it for the lifetime of the process. Defaults to TOOL_CACHE_TTL.
+        cache_if (Callable[[Any], bool], optional): Whether a result is cached. Defaults to skipping the empty and `"error: ..."` results.
+    """
+    def decorator(func: Callable) -> Callable:
+        # key -> (expiry on the monotonic clock, result)
+        cache: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # per key lock and number of calls using it, only kept while calls with the key are in flight
+        key_locks: dict[str, list] = {}
+        lock = threading.Lock()
+
+        def cached(key: str) -> tuple[bool, Any]:
+            with lock:
+                if key in cache:
+                    expires, result = cache[key]
+
+                    if time.monotonic() < expires:
+                        cache.move_to_end(key)
+                        return True, result
+
+                    del cache[key]
+
+            return False, None
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = repr((args, sorted(kwargs.items())))
+
+            hit, result = cached(key)
+            if hit:
+                annotate(cache_hit= True)
+                return result
+
+            with lock:
+                entry = key_locks.setdefault(key, [threading.Lock(), 0])
+                entry[1] += 1
+
+            try:
+                with entry[0]:
+                    # a concurrent call may have fetched it while this one waited
+                    hit, result = cached(key)
+                    if hit:
+                        annotate(cache_hit= True)
+                        return result
+
+                    result = func(*args, **kwargs)
+
+                    if cache_if(result):
+                        with lock:
+                            cache[key] = (float('inf') if ttl is None else time.monotonic() + ttl, result)
+                            while len(cache) > maxsize:
+                                cache.popitem(last= False)
+
+                return result
+
+            finally:
+                with lock:
+                    entry[1] -= 1
+                    if not entry[1]:
+                        del key_locks[key]
+
+        wrapper.cache_clear = lambda: cache.clear()
+        return wrapper
+
+    return decorator
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import httpx
+
+from config import HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY, HTTP_TIMEOUT
+from .tracing import record_request
+
+
+_lock = threading.Lock()
+_http_client: httpx.Client | None = None
+_http_async_client: httpx.AsyncClient | None = None
+
+
+# `_http2_available()` and `_LoopLocalTransport` have a twin in NeuroHarshit/Agent/chatbot.py, tests/test_clients.py keeps both identical
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)."""
+    try:
+        import h2  # noqa: F401
+        return True
+
+    except ImportError:
+        return False
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections= HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections= HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry= HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+async def _record_request(request: httpx.Request) -> None:
+    record_request()
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    def __init__(self, **transport_kwargs) -> None:
+        """Async transport keeping one connection pool per event loop. Pooled connections belong to the loop that opened them, so a single pool would fail with "Event loop is closed" once a second `asyncio.run()` reuses them. The pools of closed loops are dropped when the next pool is created."""
+        self.transport_kwargs = transport_kwargs
+        self._lock = threading.Lock()
+        self._transports: dict[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = {}
+
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            transport = self._transports.get(loop)
+
+            if transport is None:
+                # the connections of a closed loop can't be closed gracefully anymore, their sockets are closed on garbage collection
+                for closed in [other for other in self._transports if other.is_closed()]:
+                    del self._transports[closed]
+
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(**self.transport_kwargs)
+
+            return transport
+
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+
+    async def aclose(self) -> None:
+        # only the pool of the running loop can be closed from here
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+
+        if transport is not None:
+            await transport.aclose()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Returns the process-wide `httpx.Client` shared by every LLM client.
+
+    Every `ChatOpenAI` would otherwise create its own connection pool, paying a new TCP + TLS handshake per agent. With a shared pool the connections are kept alive and reused across agents and across pipeline runs. HTTP/2 is used when available, so concurrent requests are multiplexed over a single connection.
+
+    Returns:
+        httpx.Client: The shared client, created on the first call.
+    """
+    global _http_client
+
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(
+                http2= _http2_available(),
+                # counting the requests of every traced LLM call, retries show up as extra requests
+                event_hooks= {'request': [lambda request: record_request()]},
+                timeout= HTTP_TIMEOUT,
+                limits= _limits()
+            )
+
+        return _http_client
+
+
+def get_http_async_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide `httpx.AsyncClient` shared by every LLM client, the async counterpart of `get_http_client()` for `ainvoke`/`astream` calls.
+
+    It has the same limits, but every event loop gets its own connection pool, as connections cannot be shared across loops.
+
+    Returns:
+        httpx.AsyncClient: The shared client, created on the first call.
+    """
+    global _http_async_client
+
+    with _lock:
+        if _http_async_client is None or _http_async_client.is_closed:
+            _http_async_client = httpx.AsyncClient(
+                transport= _LoopLocalTransport(http2= _http2_available(), limits= _limits()),
+                event_hooks= {'request': [_record_request]},
+                timeout= HTTP_TIMEOUT
+            )
+
+        return _http_async_client
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import AsyncIterator, Iterator
+
+
+# global budget of in-flight LLM calls, None means unlimited
+_llm_semaphore: threading.BoundedSemaphore | None = None
+
+
+def set_llm_concurrency(limit: int | None) -> None:
+    """Sets the global budget of in-flight LLM calls, shared by every agent of every `ResearchAssistant` in the process. None removes the limit."""
+    global _llm_semaphore
+    _llm_semaphore = threading.BoundedSemaphore(limit) if limit else None
+
+
+@contextmanager
+def llm_slot() -> Iterator[None]:
+    """Holds one slot of the global LLM budget for the duration of the `with` block, a no-op if no budget is set."""
+    semaphore = _llm_semaphore
+
+    if semaphore is None:
+        yield
+        return
+
+    with semaphore:
+        yield
+
+
+@asynccontextmanager
+async def allm_slot() -> AsyncIterator[None]:
+    """Async version of `llm_slot()`, sharing the same budget with the threads. A free slot is polled for with `asyncio.sleep` in between, so the event loop is never blocked, no executor thread is tied up per waiter, and a cancelled waiter never ends up holding a slot."""
+    semaphore = _llm_semaphore
+
+    if semaphore is None:
+        yield
+        return
+
+    delay = 0.005
+    while not semaphore.acquire(blocking= False):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.05)
+
+    try:
+        yield
+
+    finally:
+        semaphore.release()
@@ -0,0 +1,133 @@
+import re
+import hashlib
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+_DOC_SEPARATOR = '\n---\n'
+_CONTENT_PREFIX = 'Content: '
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    64-bit SimHash of a text over its word shingles. Similar texts get fingerprints with a small Hamming distance.
+
+    Args:
+        text (str): Text to fingerprint.
+        shingle_size (int, optional): Number of words per shingle. Defaults to 3.
+
+    Returns:
+        int: The fingerprint.
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    shingles = [' '.join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))]
+
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size= 8).digest(), 'big')
+
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def split_passages(content: str, min_chars: int = 200) -> list[str]:
+    """
+    Splits document content into paragraph-like passages. Wikipedia content has a paragraph per line, while text extracted from arXiv PDFs has a line break after every printed line, so consecutive lines are merged until a passage is at least `min_chars` long and ends a sentence.
+
+    Args:
+        content (str): Content of a document.
+        min_chars (int, optional): Minimum length of a merged passage. Defaults to 200.
+
+    Returns:
+        list[str]: Passages, joining them with '\\n' gives back the content.
+    """
+    passages = []
+    current = []
+    length = 0
+
+    for line in content.split('\n'):
+        current.append(line)
+        length += len(line)
+
+        if length >= min_chars and line.rstrip().endswith(('.', '!', '?', ':')):
+            passages.append('\n'.join(current))
+            current, length = [], 0
+
+    if current:
+        passages.append('\n'.join(current))
+
+    return passages
+
+
+def split_documents(docs: str) -> list[tuple[str, str | None]]:
+    """Splits the combined documents of the tools (`Index/Title/.../Content` blocks separated by `---`) into (header, content) pairs. Blocks without content have None as content, and are kept as-is in the header."""
+    documents = []
+
+    for doc in docs.split(_DOC_SEPARATOR):
+        start = doc.find(_CONTENT_PREFIX)
+
+        if start == -1:
+            documents.append((doc, None))
+
+        else:
+            start += len(_CONTENT_PREFIX)
+            documents.append((doc[:start], doc[start:]))
+
+    return documents
+
+
+def join_documents(documents: list[tuple[str, str | None]]) -> str:
+    """Inverse of `split_documents()`."""
+    return _DOC_SEPARATOR.join(header + (content or '') for header, content in documents)
+
+
+def deduplicate_documents(docs: str, *, max_distance: int = 10, min_chars: int = 80) -> tuple[str, dict[str, int]]:
+    """
+    Removes near-duplicate passages across the documents returned by the tools (`Index/Title/.../Content` blocks separated by `---`). The first occurrence of a passage is kept, later ones whose SimHash is within `max_distance` bits are dropped. Document headers and passages shorter than `min_chars` (e.g. section titles) are always kept.
+
+    Args:
+        docs (str): Combined documents of the tools.
+        max_distance (int, optional): Maximum Hamming distance between fingerprints of near-duplicates. Unrelated passages are ~32 bits apart, a few edited words move a long passage ~5-10 bits. Defaults to 10.
+        min_chars (int, optional): Passages shorter than this are never removed. Defaults to 80.
+
+    Returns:
+        tuple[str, dict[str, int]]: Deduplicated documents and stats with the "passages", "removed" passages, "bytes_before" and "bytes_after".
+    """
+    fingerprints: list[int] = []
+    total = removed = 0
+    output = []
+
+    for header, content in split_documents(docs):
+        if content is None:
+            output.append((header, None))
+            continue
+
+        kept = []
+
+        for passage in split_passages(content):
+            total += 1
+
+            if len(passage.strip()) < min_chars:
+                kept.append(passage)
+                continue
+
+            fingerprint = simhash(passage)
+
+            if any((fingerprint ^ other).bit_count() <= max_distance for other in fingerprints):
+                removed += 1
+                continue
+
+            fingerprints.append(fingerprint)
+            kept.append(passage)
+
+        output.append((header, '\n'.join(kept)))
+
+    deduplicated = join_documents(output)
+    stats = {
+        'passages': total,
+        'removed': removed,
+        'bytes_before': len(docs.encode()),
+        'bytes_after': len(deduplicated.encode())
+    }
+    return deduplicated, stats
@@ -0,0 +1,327 @@
+import re
+import json
+from typing import Any
+
+
+_FENCE_PATTERN = re.compile(r'^\s*```[a-zA-Z]*\s*|\s*```\s*$')
+_TOPIC_ID_PATTERN = re.compile(r'^t\d+$')
+_SUBTOPIC_ID_PATTERN = re.compile(r'^t\d+\.\d+$')
+
+
+class TopicStreamParser:
+    def __init__(self, array_key: str = 'topics'):
+        """
+        Incremental parser for the knowledge JSON streamed by the LLM. Characters are scanned as the chunks arrive, and every object of the root level `array_key` array is emitted as soon as its closing brace is seen, so topics can be processed before the whole response is complete.
+
+        The other arrays and objects of the root level (e.g. "sources") are collected in `self.values` as soon as they are complete, so the objects emitted later can be processed together with them.
+
+        Anything before the root object (e.g. a markdown fence) and after it is ignored.
+
+        Args:
+            array_key (str, optional): Key of the root level array to emit objects from. Defaults to 'topics'.
+        """
+        self.array_key = array_key
+        self.buffer = ''
+        self.values: dict[str, Any] = {}
+
+        # scanner state
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: str | None = None
+        self._root_key: str | None = None
+        self._array_depth: int | None = None
+        self._object_start: int | None = None
+        self._value_start: int | None = None
+        self._root_closed = False
+
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        """Feeds the next chunk of the response.
+
+        Args:
+            chunk (str): Next chunk of the streamed response.
+
+        Returns:
+            list[dict[str, Any]]: Objects of the array that were completed by this chunk.
+        """
+        self.buffer += chunk
+        completed = []
+
+        while self._pos < len(self.buffer) and not self._root_closed:
+            index = self._pos
+            char = self.buffer[index]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+
+                elif char == '\\':
+                    self._escape = True
+
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = self.buffer[self._string_start + 1:index]
+
+                continue
+
+            # skipping everything outside of the root object
+            if not self._stack and char != '{':
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+
+            elif char == ':' and len(self._stack) == 1:
+                self._root_key = self._last_string
+
+            elif char == ',' and len(self._stack) == 1:
+                self._root_key = None
+
+            elif char in '{[':
+                if char == '[' and len(self._stack) == 1 and self._root_key == self.array_key:
+                    self._array_depth = 2
+
+                elif char == '{' and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._object_start = index
+
+                elif len(self._stack) == 1 and self._root_key is not None:
+                    self._value_start = index
+
+                self._stack.append(char)
+
+            elif char in '}]':
+                if self._stack:
+                    self._stack.pop()
+
+                if char == '}' and self._object_start is not None and len(self._stack) == self._array_depth:
+                    try:
+                        completed.append(json.loads(self.buffer[self._object_start:index + 1]))
+
+                    except json.JSONDecodeError:
+                        # malformed object, it is repaired later with the full response
+                        pass
+
+                    self._object_start = None
+
+                elif char == ']' and self._array_depth is not None and len(self._stack) == self._array_depth - 1:
+                    self._array_depth = None
+
+                elif self._value_start is not None and len(self._stack) == 1:
+                    try:
+                        self.values[self._root_key] = json.loads(self.buffer[self._value_start:index + 1])
+
+                    except json.JSONDecodeError:
+                        pass
+
+                    self._value_start = None
+
+                if not self._stack:
+                    self._root_closed = True
+
+        return completed
+
+
+def _root_end(text: str, start: int) -> int:
+    """Index of the brace closing the object opened at `start`, -1 if it never closes (truncated response). Braces inside strings are ignored."""
+    depth = 0
+    in_string = False
+    escape = False
+
+    for index in range(start, len(text)):
+        char = text[index]
+
+        if in_string:
+            if escape:
+                escape = False
+
+            elif char == '\\':
+                escape = True
+
+            elif char == '"':
+                in_string = False
+
+        elif char == '"':
+            in_string = True
+
+        elif char in '{[':
+            depth += 1
+
+        elif char in '}]':
+            depth -= 1
+
+            if depth == 0:
+                return index
+
+    return -1
+
+
+def strip_fences(text: str) -> str:
+    """Removes markdown code fences and any text around the outermost JSON object. If the object never closes (truncated response), everything after its opening brace is kept for `repair_json()`."""
+    text = _FENCE_PATTERN.sub('', text.strip())
+    start = text.find('{')
+
+    if start == -1:
+        return text
+
+    end = _root_end(text, start)
+    return text[start:end + 1] if end != -1 else text[start:]
+
+
+def repair_json(text: str) -> str:
+    """
+    Repairs truncated JSON locally, without another LLM call. Unterminated strings are closed, dangling keys, colons and commas are dropped, and all the open objects/arrays are closed in order.
+
+    Args:
+        text (str): Truncated JSON text.
+
+    Returns:
+        str: Repaired JSON text, not guaranteed to be valid if the input was malformed other than by truncation.
+    """
+    stack = []
+    in_string = False
+    escape = False
+
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+
+            elif char == '\\':
+                escape = True
+
+            elif char == '"':
+                in_string = False
+
+        elif char == '"':
+            in_string = True
+
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+
+        elif char in '}]' and stack:
+            stack.pop()
+
+    if in_string:
+        # a dangling escape character would escape the closing quote
+        text = (text[:-1] if escape else text) + '"'
+
+    text = text.rstrip()
+
+    # dropping whatever can't be completed: trailing commas/colons, and keys without values inside objects
+    while True:
+        stripped = re.sub(r'[,:]\s*$', '', text)
+
+        if stack and stack[-1] == '}':
+            stripped = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*$', r'\1', stripped)
+
+        if stripped == text:
+            break
+
+        text = stripped
+
+    return text + ''.join(reversed(stack))
+
+
+def parse_json(text: str) -> dict[str, Any]:
+    """
+    Parses the JSON response of an LLM, stripping markdown fences and repairing truncated output if needed.
+
+    Args:
+        text (str): Raw LLM response.
+
+    Raises:
+        json.JSONDecodeError: If the response can't be parsed even after repairing.
+        ValueError: If the response is valid JSON, but not an object (e.g. a bare array).
+
+    Returns:
+        dict[str, Any]: Parsed JSON object.
+    """
+    text = strip_fences(text)
+
+    try:
+        parsed = json.loads(text)
+
+    except json.JSONDecodeError:
+        parsed = json.loads(repair_json(text))
+
+    if not isinstance(parsed, dict):
+        raise ValueError(f'Expected a JSON object, got {type(parsed).__name__}.')
+
+    return parsed
+
+
+def validate_knowledge(knowledge: dict[str, Any]) -> list[str]:
+    """
+    Validates the knowledge base against the schema given to the `ExtractorAgent`. Reference ids given as strings are coerced to integers in place.
+
+    Args:
+        knowledge (dict[str, Any]): Parsed knowledge base.
+
+    Returns:
+        list[str]: Schema violations, empty if the knowledge base is valid.
+    """
+    if not isinstance(knowledge, dict):
+        return [f'Knowledge base is not an object, but {type(knowledge).__name__}.']
+
+    errors = []
+
+    for key, kind in (('topic', str), ('sources', list), ('topics', list), ('abstract', str), ('conclusion', str)):
+        if not isinstance(knowledge.get(key), kind) or not knowledge.get(key):
+            errors.append(f'"{key}" is missing or not a non-empty {kind.__name__}.')
+
+    source_ids = set()
+    for source in knowledge.get('sources') or []:
+        if not isinstance(source, dict) or not isinstance(source.get('id'), int):
+            errors.append(f'Source {source} has no integer "id".')
+            continue
+
+        source_ids.add(source['id'])
+        for key in ('title', 'source', 'url'):
+            if not source.get(key):
+                errors.append(f'Source {source['id']} has no "{key}".')
+
+        if not isinstance(source.get('authors'), list):
+            errors.append(f'Source {source['id']} has no "authors" list.')
+
+    def check_node(node: Any, pattern: re.Pattern, name: str) -> None:
+        if not isinstance(node, dict):
+            errors.append(f'{name} is not an object.')
+            return
+
+        if not pattern.match(str(node.get('id', ''))):
+            errors.append(f'{name} has an invalid "id": {node.get('id')}.')
+
+        if not node.get('title'):
+            errors.append(f'{name} has no "title".')
+
+        if not node.get('summary_points'):
+            errors.append(f'{name} has no "summary_points".')
+
+        references = []
+        for reference in node.get('references') or []:
+            try:
+                references.append(int(reference))
+
+            except (TypeError, ValueError):
+                errors.append(f'{name} has an invalid reference: {reference}.')
+
+        node['references'] = references
+        if not references:
+            errors.append(f'{name} has no "references".')
+
+        elif source_ids and not set(references) <= source_ids:
+            errors.append(f'{name} references unknown sources: {sorted(set(references) - source_ids)}.')
+
+    for index, topic in enumerate(knowledge.get('topics') or [], start= 1):
+        check_node(topic, _TOPIC_ID_PATTERN, f'Topic {index}')
+
+        if isinstance(topic, dict):
+            for sub_index, subtopic in enumerate(topic.get('subtopics') or [], start= 1):
+                check_node(subtopic, _SUBTOPIC_ID_PATTERN, f'Subtopic {index}.{sub_index}')
+
+    return errors
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from langchain_core.messages import BaseMessage
+
+from config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_MB
+
+
+def response_cache_key(model: str, temperature: float, messages: list[BaseMessage]) -> str:
+    """
+    Cache key of an LLM call: SHA-256 of the model, the temperature and the formatted messages.
+
+    Args:
+        model (str): Name of the model.
+        temperature (float): Temperature of the LLM.
+        messages (list[BaseMessage]): Formatted prompt messages, e.g. from `instructions.format_messages`.
+
+    Returns:
+        str: Hex digest of the key.
+    """
+    payload = json.dumps(
+        {
+            'model': model,
+            'temperature': temperature,
+            'messages': [(message.type, message.content) for message in messages]
+        },
+        sort_keys= True,
+        ensure_ascii= False,
+        default= str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str, *, max_entries: int = 5_000, max_bytes: int = 256 * 1024 * 1024) -> None:
+        """
+        LLM response cache backed by a local SQLite database, shared across runs and processes. When an insert pushes the cache over `max_entries` or `max_bytes`, the least recently used responses are evicted.
+
+        Args:
+            path (str): Path of the SQLite database, created if missing.
+            max_entries (int, optional): Maximum number of cached responses. Defaults to 5_000.
+            max_bytes (int, optional): Maximum total size of the cached responses. Defaults to 256 MB.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok= True)
+
+        # a single connection guarded by a lock, WAL lets several processes (e.g. batch workers) share the file
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout= 30, check_same_thread= False, isolation_level= None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER, created_at REAL, accessed_at REAL)'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached response for `key`, or None on a miss. A hit marks the response as recently used."""
+        with self._lock:
+            row = self._connection.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            return row[0]
+
+
+    def put(self, key: str, response: str, *, model: str = '') -> None:
+        """Caches `response` for `key`, then evicts the least recently used responses if over a limit."""
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                (key, model, response, len(response.encode()), now, now)
+            )
+            self._evict()
+
+
+    def _evict(self) -> None:
+        """Deletes the least recently used responses until both limits hold. Must be called with `self._lock` held."""
+        count, size = self._connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, entry_size in self._connection.execute('SELECT key, size FROM responses ORDER BY accessed_at'):
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+
+            evicted.append((key,))
+            count -= 1
+            size -= entry_size
+
+        self._connection.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+
+    def clear(self) -> None:
+        """Deletes every cached response."""
+        with self._lock:
+            self._connection.execute('DELETE FROM responses')
+
+
+    def stats(self) -> dict[str, int]:
+        """Returns the number of cached "entries", their total "bytes", and the "hits" and "misses" of this process."""
+        with self._lock:
+            count, size = self._connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+        return {'entries': count, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_lock = threading.Lock()
+_enabled = LLM_CACHE_ENABLED
+_path = LLM_CACHE_PATH
+_cache: ResponseCache | None = None
+
+
+def set_llm_cache(enabled: bool, path: str | None = None) -> None:
+    """Enables or disables the process-wide LLM response cache, optionally at another `path` than `config.LLM_CACHE_PATH`."""
+    global _enabled, _path, _cache
+
+    with _lock:
+        _enabled = enabled
+        new_path = path or _path
+
+        if _cache is not None and (not enabled or new_path != _path):
+            _cache.close()
+            _cache = None
+
+        _path = new_path
+
+
+def get_llm_cache() -> ResponseCache | None:
+    """Returns the process-wide `ResponseCache`, created on the first call, or None if the cache is disabled (see `set_llm_cache()`)."""
+    global _cache
+
+    with _lock:
+        if not _enabled:
+            return None
+
+        if _cache is None:
+            _cache = ResponseCache(
+                _path,
+                max_entries= LLM_CACHE_MAX_ENTRIES,
+                max_bytes= LLM_CACHE_MAX_MB * 1024 * 1024
+            )
+
+        return _cache
@@ -1,51 +1,117 @@
-import logging
 import os
+import json
+import queue
+import atexit
+import logging
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from config import LOG_LEVEL, LOG_QUEUE, LOG_JSON
 
 # Global session log filename
 SESSION_LOG_FILE = None
 
+# handlers shared by every logger, and the background writer in queue mode
+_lock = threading.Lock()
+_handlers: list[logging.Handler] | None = None
+_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats every record as a single JSON line, for log processing tools."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii= False)
+
+
+class LazyQueueHandler(QueueHandler):
+    """`QueueHandler` that enqueues the record as-is. `QueueHandler.prepare` formats the message in the logging thread, here the %-style arguments are merged and formatted by the background writer instead."""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _create_handlers() -> list[logging.Handler]:
+    # writing logs to file
+    file_handler = logging.FileHandler(SESSION_LOG_FILE, mode= 'a', encoding= 'utf-8')
+
+    # terminal output
+    stream_handler = logging.StreamHandler()
+
+    # Common formatter
+    formatter = logging.Formatter(
+        '[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)s',
+        datefmt= '%Y-%m-%d %H:%M:%S'
+    )
+    file_handler.setFormatter(JsonFormatter(datefmt= '%Y-%m-%d %H:%M:%S') if LOG_JSON else formatter)
+    stream_handler.setFormatter(formatter)
+
+    return [file_handler, stream_handler]
+
+
+def _get_handlers() -> list[logging.Handler]:
+    """Creates the session log file and the shared handlers once. In queue mode, loggers only get a `LazyQueueHandler`, and a single `QueueListener` thread writes to the file and the terminal."""
+    global SESSION_LOG_FILE, _handlers, _listener
+
+    with _lock:
+        if _handlers is None:
+            # Initialize session log file once
+            os.makedirs('logs', exist_ok= True)
+            SESSION_LOG_FILE = datetime.now().strftime('logs/session_%Y-%m-%d_%H-%M-%S') + ('.jsonl' if LOG_JSON else '.log')
+            handlers = _create_handlers()
+
+            if LOG_QUEUE:
+                log_queue = queue.SimpleQueue()
+                _listener = QueueListener(log_queue, *handlers, respect_handler_level= True)
+                _listener.start()
+                atexit.register(stop_logging)
+                _handlers = [LazyQueueHandler(log_queue)]
+
+            else:
+                _handlers = handlers
+
+        return _handlers
+
+
+def stop_logging() -> None:
+    """Writes the queued records and stops the background writer. Registered to run at exit."""
+    global _listener
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
 
 def get_logger(name: str) -> logging.Logger:
     """
     Creates a logger instance that writes logs into the same session log file.
 
+    With `config.LOG_QUEUE` (the default), logging calls only put the record on a queue, the formatting and the file/terminal I/O happen in a single background thread, so concurrent agents never wait on each other or on the disk. Pass %-style arguments (`logger.info('Topic: %s', title)`) for messages in hot loops, they are only formatted by the writer, and not at all below `config.LOG_LEVEL`.
+
     Args:
         name (str): Name of the logger (e.g. module or agent name).
 
     Returns:
         logging.Logger: Configured logger object.
     """
-    global SESSION_LOG_FILE
-
-    # Initialize session log file once
-    if SESSION_LOG_FILE is None:
-        os.makedirs('logs', exist_ok= True)
-        SESSION_LOG_FILE = datetime.now().strftime('logs/session_%Y-%m-%d_%H-%M-%S.log')
-
     # logging configuration
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
 
     # Avoid duplicate handlers when logger already configured
     if not logger.handlers:
-        # writing logs to file
-        file_handler = logging.FileHandler(SESSION_LOG_FILE, mode= 'a', encoding= 'utf-8')
-        file_handler.setLevel(logging.INFO)
-
-        # terminal output
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.INFO)
-
-        # Common formatter
-        formatter = logging.Formatter(
-            '[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)s',
-            datefmt= '%Y-%m-%d %H:%M:%S'
-        )
-        file_handler.setFormatter(formatter)
-        stream_handler.setFormatter(formatter)
-
-        logger.addHandler(file_handler)
-        logger.addHandler(stream_handler)
+        for handler in _get_handlers():
+            logger.addHandler(handler)
 
     return logger
@@ -0,0 +1,126 @@
+import re
+import math
+from collections import Counter
+
+from .dedup import split_documents, join_documents, split_passages
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+_OMISSION = '\n[...]\n'
+
+
+def _tokenize(text: str) -> list[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def bm25_scores(query: str, passages: list[str], *, k1: float = 1.5, b: float = 0.75) -> list[float]:
+    """
+    Okapi BM25 score of every passage for the query, with the passages as the corpus.
+
+    Args:
+        query (str): Search query, e.g. the research topic.
+        passages (list[str]): Passages to score.
+        k1 (float, optional): Term frequency saturation. Defaults to 1.5.
+        b (float, optional): Length normalization. Defaults to 0.75.
+
+    Returns:
+        list[float]: Scores, in the order of `passages`.
+    """
+    tokenized = [_tokenize(passage) for passage in passages]
+    query_terms = set(_tokenize(query))
+
+    if not tokenized or not query_terms:
+        return [0.0] * len(passages)
+
+    avg_length = sum(len(tokens) for tokens in tokenized) / len(tokenized) or 1
+    document_frequency = Counter(term for tokens in tokenized for term in set(tokens) & query_terms)
+    idf = {
+        term: math.log(1 + (len(tokenized) - freq + 0.5) / (freq + 0.5))
+        for term, freq in document_frequency.items()
+    }
+
+    scores = []
+    for tokens in tokenized:
+        counts = Counter(tokens)
+        norm = k1 * (1 - b + b * len(tokens) / avg_length)
+        scores.append(sum(
+            idf[term] * counts[term] * (k1 + 1) / (counts[term] + norm)
+            for term in idf if counts[term]
+        ))
+
+    return scores
+
+
+def select_passages(docs: str, query: str, max_chars: int) -> tuple[str, dict[str, int]]:
+    """
+    Keeps the passages most relevant to `query` across all the documents, within a global character budget, instead of truncating every document from its start.
+
+    The first passage of every document (the lead of a Wikipedia article, the title and abstract of a paper) is always kept if it fits. The rest are ranked by BM25 against `query`, earlier passages winning ties, and added while they fit. Kept passages stay in their original order, omitted stretches are marked with "[...]".
+
+    Args:
+        docs (str): Combined documents of the tools.
+        query (str): Query to rank the passages against, e.g. the research topic.
+        max_chars (int): Global budget for the content of all the documents.
+
+    Returns:
+        tuple[str, dict[str, int]]: Selected documents and stats with the "passages", "selected" passages, "chars_before" and "chars_after".
+    """
+    documents = split_documents(docs)
+    passages = [
+        split_passages(content) if content is not None else []
+        for _, content in documents
+    ]
+
+    # (document index, passage index) of every passage
+    positions = [(d, p) for d, doc_passages in enumerate(passages) for p in range(len(doc_passages))]
+    total_chars = sum(len(passages[d][p]) for d, p in positions)
+
+    if total_chars <= max_chars:
+        return docs, {'passages': len(positions), 'selected': len(positions), 'chars_before': len(docs), 'chars_after': len(docs)}
+
+    scores = bm25_scores(query, [passages[d][p] for d, p in positions])
+    ranked = sorted(
+        range(len(positions)),
+        key= lambda i: (positions[i][1] != 0, -scores[i], positions[i][1])
+    )
+
+    selected = set()
+    used = 0
+    for i in ranked:
+        length = len(passages[positions[i][0]][positions[i][1]])
+
+        if used + length <= max_chars:
+            selected.add(positions[i])
+            used += length
+
+    output = []
+    for d, (header, content) in enumerate(documents):
+        if content is None:
+            output.append((header, None))
+            continue
+
+        parts = []
+        previous = -1
+        for p, passage in enumerate(passages[d]):
+            if (d, p) not in selected:
+                continue
+
+            if p != previous + 1:
+                parts.append(_OMISSION)
+
+            parts.append(passage if not parts or parts[-1] == _OMISSION else '\n' + passage)
+            previous = p
+
+        if previous != len(passages[d]) - 1:
+            parts.append(_OMISSION)
+
+        output.append((header, ''.join(parts)))
+
+    selected_docs = join_documents(output)
+    stats = {
+        'passages': len(positions),
+        'selected': len(selected),
+        'chars_before': len(docs),
+        'chars_after': len(selected_docs)
+    }
+    return selected_docs, stats
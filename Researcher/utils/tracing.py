@@ -0,0 +1,265 @@
+import os
+import json
+import inspect
+import threading
+from time import perf_counter
+from datetime import datetime
+from functools import partial, wraps
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Iterator
+
+from config import MODEL_PRICES
+
+
+TRACE_NAME = 'trace.json'
+
+
+class Tracer:
+    def __init__(self, name: str) -> None:
+        """
+        Records the spans of one run: a span per graph node, LLM call and tool call, with its start and end relative to the start of the run, its parent span, and attributes such as the model, prompt/completion tokens, cache hits and HTTP requests (retries).
+
+        Spans are recorded through the context (see `tracing()` and `span()`), so agents and tools don't need a reference to the tracer. Graph nodes, `asyncio` tasks and `asyncio.to_thread` inherit the context, plain thread pools need `propagate()`.
+
+        Args:
+            name (str): Name of the run, e.g. the topic.
+        """
+        self.name = name
+        self.started_at = datetime.now().isoformat(timespec= 'seconds')
+        self.spans: list[dict[str, Any]] = []
+        self._start = perf_counter()
+        self._lock = threading.Lock()
+
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes) -> Iterator[dict[str, Any]]:
+        parent = _current_span.get()
+
+        with self._lock:
+            record = {
+                'id': len(self.spans),
+                'parent': parent['id'] if parent else None,
+                'kind': kind,
+                'name': name,
+                'thread': threading.current_thread().name,
+                'start': perf_counter() - self._start,
+                'end': None,
+                'status': 'ok',
+                **attributes
+            }
+            # reserving the id, the span is filled in place
+            self.spans.append(record)
+
+        token = _current_span.set(record)
+        try:
+            yield record
+
+        except BaseException as e:
+            record['status'] = 'error'
+            record['error'] = repr(e)
+            raise
+
+        finally:
+            record['end'] = perf_counter() - self._start
+            _current_span.reset(token)
+
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            spans = [dict(span) for span in self.spans]
+
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration': perf_counter() - self._start,
+            'spans': spans
+        }
+
+
+_current_tracer: ContextVar[Tracer | None] = ContextVar('tracer', default= None)
+_current_span: ContextVar[dict[str, Any] | None] = ContextVar('span', default= None)
+
+
+@contextmanager
+def tracing(name: str) -> Iterator[Tracer]:
+    """Makes a new `Tracer` the current one for the `with` block."""
+    tracer = Tracer(name)
+    token = _current_tracer.set(tracer)
+
+    try:
+        yield tracer
+
+    finally:
+        _current_tracer.reset(token)
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes) -> Iterator[dict[str, Any]]:
+    """Records a span with the current tracer, a no-op outside of `tracing()`."""
+    tracer = _current_tracer.get()
+
+    if tracer is None:
+        yield {}
+        return
+
+    with tracer.span(kind, name, **attributes) as record:
+        yield record
+
+
+def annotate(**attributes) -> None:
+    """Sets attributes of the current span, if any, e.g. `annotate(cache_hit= True)`."""
+    record = _current_span.get()
+
+    if record is not None:
+        record.update(attributes)
+
+
+def record_request() -> None:
+    """Counts an HTTP request of the current span, more than one means the client retried."""
+    record = _current_span.get()
+
+    if record is not None:
+        record['requests'] = record.get('requests', 0) + 1
+
+
+def traced(kind: str, name: str | None = None) -> Callable:
+    """Decorator recording a span for every call of a function or coroutine function, named after the function by default."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(kind, span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(kind, span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def propagate(func: Callable) -> Callable:
+    """Binds `func` to a copy of the current context, so the current tracer and span are kept when it runs in a thread pool."""
+    return partial(copy_context().run, func)
+
+
+def span_cost(record: dict[str, Any]) -> float:
+    """Cost in USD of an LLM span, from `config.MODEL_PRICES` (USD per 1M prompt and completion tokens). Unknown models cost 0."""
+    prompt_price, completion_price = MODEL_PRICES.get(record.get('model'), (0.0, 0.0))
+    return (record.get('prompt_tokens', 0) * prompt_price + record.get('completion_tokens', 0) * completion_price) / 1_000_000
+
+
+def save_trace(tracer: Tracer, directory: str) -> str:
+    """Saves the trace as `trace.json` in `directory` (the directory of the stored state) and returns its path."""
+    os.makedirs(directory, exist_ok= True)
+    path = os.path.join(directory, TRACE_NAME)
+
+    with open(path, 'w', encoding= 'utf-8') as f:
+        json.dump(tracer.to_dict(), f, indent= 2, ensure_ascii= False)
+
+    return path
+
+
+def load_trace(directory: str) -> dict[str, Any] | None:
+    path = os.path.join(directory, TRACE_NAME)
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r', encoding= 'utf-8') as f:
+        return json.load(f)
+
+
+def format_waterfall(trace: dict[str, Any], width: int = 50) -> str:
+    """
+    Renders the spans of a trace as a text waterfall, one line per span in start order, indented by nesting, with a bar showing when it ran.
+
+    Args:
+        trace (dict[str, Any]): Trace from `load_trace()`.
+        width (int, optional): Width of the bars in characters. Defaults to 50.
+
+    Returns:
+        str: The waterfall.
+    """
+    spans = sorted(trace['spans'], key= lambda record: record['start'])
+    total = max([trace['duration']] + [record['end'] or 0 for record in spans]) or 1
+    by_id = {record['id']: record for record in spans}
+
+    def depth(record: dict) -> int:
+        level = 0
+        while record['parent'] is not None and record['parent'] in by_id:
+            record = by_id[record['parent']]
+            level += 1
+        return level
+
+    lines = [f'Trace of "{trace['name']}" started at {trace['started_at']}, {trace['duration']:.2f}s', '']
+    for record in spans:
+        end = record['end'] if record['end'] is not None else total
+        start_col = int(record['start'] / total * width)
+        length = max(1, int((end - record['start']) / total * width))
+
+        flags = []
+        if record.get('cache_hit'):
+            flags.append('cached')
+        if record.get('requests', 1) > 1:
+            flags.append(f'{record['requests'] - 1} retries')
+        if record['status'] != 'ok':
+            flags.append(record['status'])
+
+        label = ('  ' * depth(record) + f'{record['kind']}:{record['name']}')[:38]
+        bar = ' ' * start_col + '#' * min(length, width - start_col)
+        lines.append(f'{label:<38} |{bar:<{width}}| {end - record['start']:>8.2f}s {' '.join(flags)}'.rstrip())
+
+    return '\n'.join(lines)
+
+
+def format_costs(trace: dict[str, Any]) -> str:
+    """
+    Renders the LLM calls of a trace grouped by agent and model: calls, cache hits, tokens, cost and time, plus the time of every node and tool.
+
+    Args:
+        trace (dict[str, Any]): Trace from `load_trace()`.
+
+    Returns:
+        str: The breakdown.
+    """
+    groups: dict[tuple[str, str], dict[str, float]] = {}
+    for record in trace['spans']:
+        if record['kind'] != 'llm':
+            continue
+
+        group = groups.setdefault((record['name'], record.get('model', '')), {'calls': 0, 'cached': 0, 'prompt': 0, 'completion': 0, 'cost': 0.0, 'seconds': 0.0})
+        group['calls'] += 1
+        group['cached'] += bool(record.get('cache_hit'))
+        group['prompt'] += record.get('prompt_tokens', 0)
+        group['completion'] += record.get('completion_tokens', 0)
+        group['cost'] += span_cost(record)
+        group['seconds'] += (record['end'] or record['start']) - record['start']
+
+    lines = [f'{'agent':<12} {'model':<14} {'calls':>6} {'cached':>7} {'prompt':>9} {'completion':>11} {'cost ($)':>9} {'time (s)':>9}']
+    for (agent, model), group in sorted(groups.items(), key= lambda item: -item[1]['cost']):
+        lines.append(
+            f'{agent:<12} {model:<14} {group['calls']:>6} {group['cached']:>7} {group['prompt']:>9} '
+            f'{group['completion']:>11} {group['cost']:>9.4f} {group['seconds']:>9.2f}'
+        )
+
+    total_cost = sum(group['cost'] for group in groups.values())
+    lines.append(f'{'total':<12} {'':<14} {sum(group['calls'] for group in groups.values()):>6} {'':>7} {'':>9} {'':>11} {total_cost:>9.4f}')
+
+    stages: dict[str, float] = {}
+    for record in trace['spans']:
+        if record['kind'] in ('node', 'tool'):
+            key = f'{record['kind']}:{record['name']}'
+            stages[key] = stages.get(key, 0.0) + (record['end'] or record['start']) - record['start']
+
+    lines += ['', f'{'stage':<38} {'time (s)':>9}']
+    lines += [f'{stage:<38} {seconds:>9.2f}' for stage, seconds in sorted(stages.items(), key= lambda item: -item[1])]
+    return '\n'.join(lines)